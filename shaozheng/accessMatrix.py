@@ -0,0 +1,195 @@
+#
+# accessMatrix.py
+#
+# N 个观测航天器 × M 个目标航天器的通信链路矩阵。
+# 一个 SpacecraftLocation 只有一个主航天器，N×M 链路需要 N 个模块、N×M 个记录器，
+# 每条链路各自读取消息、计算遮挡体位置与天线指向。这里用一个 Python 模型代替：
+#   - 每个采样时刻各消息只读一次（N + M 次，而不是 2NM 次），遮挡体位置/姿态只读一次
+#   - 天线位置与视轴方向按观测者计算一次（N 个），再用 AccessGeometry 广播到 (N, M)
+#   - 结果按行压缩为比特（np.packbits），T 个时刻共 T * ceil(N*M/8) 字节，
+#     读取时展开为 (T, N, M) 布尔数组
+# 判据与 SpacecraftLocation 相同（距离、视锥、椭球遮挡），所有观测者共用一组天线参数。
+#
+# 仿真内每步读取 N + M 条消息的 Python 开销不小；各航天器状态本来就有记录器时，
+# 用 link_matrix_from_states() 在仿真结束后按时间分块一次性广播计算更快。
+#
+
+import numpy as np
+from Basilisk.architecture import messaging, sysModel
+from Basilisk.utilities import macros
+
+from accessSupport import extract_windows
+
+
+def access_matrix(geometry, r_BN_N, r_SN_N, sigma_BN=None, r_PN_N=None, dcm_PN=None):
+    """
+    批量计算 N×M 链路的 hasAccess。
+
+    Args:
+        geometry (AccessGeometry): 所有观测者共用的天线与遮挡参数
+        r_BN_N (ndarray): 观测者位置 ``(..., N, 3)``，前导维度可为时间
+        r_SN_N (ndarray): 目标位置 ``(..., M, 3)``
+        sigma_BN (ndarray): 观测者姿态 MRP ``(..., N, 3)``，缺省为零姿态
+        r_PN_N (ndarray): 遮挡体位置 ``(..., 3)``，缺省在原点
+        dcm_PN (ndarray): 遮挡体固连系 DCM ``(..., 3, 3)``，缺省为单位阵
+
+    Returns:
+        ndarray: 布尔 ``(..., N, M)``
+    """
+    r_BN_N = np.asarray(r_BN_N, dtype=float)[..., :, None, :]
+    r_SN_N = np.asarray(r_SN_N, dtype=float)[..., None, :, :]
+    if sigma_BN is not None:
+        sigma_BN = np.asarray(sigma_BN, dtype=float)[..., :, None, :]
+    if r_PN_N is not None:
+        r_PN_N = np.asarray(r_PN_N, dtype=float)[..., None, None, :]
+    if dcm_PN is not None:
+        dcm_PN = np.asarray(dcm_PN, dtype=float)[..., None, None, :, :]
+    return geometry.evaluate(r_BN_N, r_SN_N, sigma_BN=sigma_BN, r_PN_N=r_PN_N, dcm_PN=dcm_PN).hasAccess
+
+
+class LinkMatrixAccess:
+    """``(T, N, M)`` 比特矩阵的读取接口，依赖 ``times()``、``bits`` 与 ``shape``"""
+    @property
+    def hasAccess(self):
+        """展开的 ``(T, N, M)`` 布尔数组"""
+        n = self.shape[0] * self.shape[1]
+        return np.unpackbits(self.bits, axis=1, count=n).astype(bool).reshape((-1,) + self.shape)
+
+    def link(self, i, j):
+        """观测者 i → 目标 j 的 ``(T,)`` 序列"""
+        k = i * self.shape[1] + j
+        return (self.bits[:, k // 8] >> (7 - k % 8) & 1).astype(bool)
+
+    def windows(self, i, j):
+        """观测者 i → 目标 j 的通信窗口 ``(start, stop, duration)``，单位 s"""
+        return extract_windows(self.times() * macros.NANO2SEC, self.link(i, j))
+
+
+class LinkMatrix(LinkMatrixAccess):
+    """
+    已算好的链路矩阵。
+
+    Args:
+        times (ndarray): 采样时刻 (ns)
+        bits (ndarray): ``(T, ceil(N*M/8))`` uint8
+        shape (tuple): ``(N, M)``
+    """
+    def __init__(self, times, bits, shape):
+        self._times = np.asarray(times, dtype=np.int64)
+        self.bits = bits
+        self.shape = tuple(shape)
+
+    def times(self):
+        return self._times
+
+
+def link_matrix_from_states(geometry, times, r_BN_N, r_SN_N, sigma_BN=None, r_PN_N=None, dcm_PN=None,
+                            chunkEpochs=256, excludePairs=None):
+    """
+    由记录的状态数组计算整段链路矩阵，按 ``chunkEpochs`` 个时刻分块以限制中间数组的内存。
+
+    Args:
+        times (ndarray): 采样时刻 (ns)，长度 T
+        r_BN_N (ndarray): 观测者位置 ``(T, N, 3)``
+        r_SN_N (ndarray): 目标位置 ``(T, M, 3)``
+        sigma_BN (ndarray): 观测者姿态 ``(T, N, 3)``
+        r_PN_N, dcm_PN (ndarray): 遮挡体位置 ``(T, 3)`` 与 DCM ``(T, 3, 3)``
+        excludePairs (ndarray): 布尔 ``(N, M)``，为真的链路始终记为无 access
+
+    Returns:
+        LinkMatrix
+    """
+    r_BN_N = np.asarray(r_BN_N, dtype=float)
+    r_SN_N = np.asarray(r_SN_N, dtype=float)
+    shape = (r_BN_N.shape[1], r_SN_N.shape[1])
+
+    def block(arr, k):
+        return None if arr is None else arr[k:k + chunkEpochs]
+
+    bits = []
+    for k in range(0, len(r_BN_N), chunkEpochs):
+        flags = access_matrix(geometry, r_BN_N[k:k + chunkEpochs], r_SN_N[k:k + chunkEpochs],
+                              block(sigma_BN, k), block(r_PN_N, k), block(dcm_PN, k))
+        if excludePairs is not None:
+            flags &= ~np.asarray(excludePairs, dtype=bool)
+        bits.append(np.packbits(flags.reshape(len(flags), -1), axis=1))
+    if not bits:
+        bits = [np.empty((0, (shape[0] * shape[1] + 7) // 8), dtype=np.uint8)]
+    return LinkMatrix(times, np.concatenate(bits), shape)
+
+
+class AccessMatrix(LinkMatrixAccess, sysModel.SysModel):
+    """
+    在仿真中逐采样时刻计算并记录 N×M 链路矩阵。
+
+    Args:
+        observerMsgs (list): 观测者 ``scStateOutMsg``
+        targetMsgs (list): 目标 ``scStateOutMsg``
+        geometry (AccessGeometry): 天线与遮挡参数
+        planetMsg: 遮挡体 ``SpicePlanetStateMsg``，None 表示遮挡体固定在原点
+        samplingTime (int): 采样间隔 (ns)，None 表示每个任务步都记录
+        excludePairs (ndarray): 布尔 ``(N, M)``，为真的链路始终记为无 access（如观测者与目标是同一航天器）
+    """
+    def __init__(self, observerMsgs, targetMsgs, geometry, planetMsg=None, samplingTime=None,
+                 excludePairs=None):
+        super().__init__()
+        self.ModelTag = "AccessMatrix"
+        # 读取器比每次 msg.read() 少一次负载拷贝
+        self.observerInMsgs = [self._reader(msg) for msg in observerMsgs]
+        self.targetInMsgs = [self._reader(msg) for msg in targetMsgs]
+        self.planetInMsg = None
+        if planetMsg is not None:
+            self.planetInMsg = messaging.SpicePlanetStateMsgReader()
+            self.planetInMsg.subscribeTo(planetMsg)
+        self.geometry = geometry
+        self.samplingTime = samplingTime
+        self.shape = (len(self.observerInMsgs), len(self.targetInMsgs))
+        self.excludePairs = None if excludePairs is None else np.asarray(excludePairs, dtype=bool)
+        self._times = []
+        self._bits = []
+        self._nextTime = 0
+
+    @staticmethod
+    def _reader(msg):
+        reader = messaging.SCStatesMsgReader()
+        reader.subscribeTo(msg)
+        return reader
+
+    def Reset(self, CurrentSimNanos):
+        self._times = []
+        self._bits = []
+        self._nextTime = CurrentSimNanos
+
+    def UpdateState(self, CurrentSimNanos):
+        if CurrentSimNanos < self._nextTime:
+            return
+        if self.samplingTime:
+            while self._nextTime <= CurrentSimNanos:
+                self._nextTime += self.samplingTime
+
+        observers = [reader() for reader in self.observerInMsgs]
+        targets = [reader() for reader in self.targetInMsgs]
+        r_PN_N = dcm_PN = None
+        if self.planetInMsg is not None:
+            planet = self.planetInMsg()
+            r_PN_N = np.asarray(planet.PositionVector, dtype=float)
+            dcm_PN = np.asarray(planet.J20002Pfix, dtype=float)
+        flags = access_matrix(self.geometry,
+                              [payload.r_BN_N for payload in observers],
+                              [payload.r_BN_N for payload in targets],
+                              sigma_BN=[payload.sigma_BN for payload in observers],
+                              r_PN_N=r_PN_N, dcm_PN=dcm_PN)
+        if self.excludePairs is not None:
+            flags &= ~self.excludePairs
+        self._times.append(CurrentSimNanos)
+        self._bits.append(np.packbits(flags, axis=None))
+
+    def times(self):
+        return np.asarray(self._times, dtype=np.int64)
+
+    @property
+    def bits(self):
+        """压缩存储 ``(T, ceil(N*M/8))`` uint8"""
+        if not self._bits:
+            return np.empty((0, (self.shape[0] * self.shape[1] + 7) // 8), dtype=np.uint8)
+        return np.stack(self._bits)
@@ -0,0 +1,234 @@
+#
+# accessSupport.py
+#
+# 通信窗口（access window）后处理：
+#   - extract_windows(): 用 np.diff 一次找出 hasAccess 的上升/下降沿
+#   - 可选对每个边沿在相邻两个采样之间二分细化（需提供可逐时刻重新计算 access 的函数）
+#   - to_utc(): 批量把仿真秒转换为 UTC
+#   - AccessGeometry: 纯 NumPy 的 SpacecraftLocation 几何（距离、视轴夹角、椭球遮挡），
+#     可在完整仿真之前批量预筛几个月的候选几何
+#
+
+import numpy as np
+
+from trajectoryPlayback import HermiteInterpolator
+
+REFINE_TOLERANCE = 1.0  # 边沿细化精度 (s)
+
+
+def _bisect_edges(access_fn, tLo, tHi, valueAtLo, tolerance):
+    """
+    向量化二分：每个区间在 tLo 处 access 为 ``valueAtLo``，在 tHi 处相反。
+    返回状态翻转时刻（取翻转后的第一个时刻，与采样定义一致）。
+    """
+    tLo = tLo.astype(float)
+    tHi = tHi.astype(float)
+    while len(tLo) and np.max(tHi - tLo) > tolerance:
+        mid = 0.5 * (tLo + tHi)
+        same = np.asarray(access_fn(mid), dtype=bool) == valueAtLo
+        tLo = np.where(same, mid, tLo)
+        tHi = np.where(same, tHi, mid)
+    return tHi
+
+
+def extract_windows(times, hasAccess, access_fn=None, tolerance=REFINE_TOLERANCE):
+    """
+    由记录的 hasAccess 序列提取通信窗口。
+
+    窗口定义与逐点状态机相同：开始于第一个有 access 的采样，结束于其后第一个无 access 的采样；
+    仿真结束时仍在窗口内则以最后一个采样为结束。
+
+    Args:
+        times (ndarray): 采样时刻 (s)
+        hasAccess (ndarray): 各时刻是否有 access
+        access_fn (callable): 可选，``access_fn(t) -> bool 数组``，对任意时刻数组重新计算 access；
+            提供时在相邻采样间二分细化每个内部边沿
+        tolerance (float): 细化精度 (s)
+
+    Returns:
+        tuple: ``(start, stop, duration)``，单位 s
+    """
+    times = np.asarray(times, dtype=float)
+    flag = np.asarray(hasAccess).astype(np.int8)
+    if len(flag) == 0:
+        empty = np.empty(0)
+        return empty, empty, empty
+
+    edges = np.diff(flag)
+    rising = np.nonzero(edges > 0)[0] + 1
+    falling = np.nonzero(edges < 0)[0] + 1
+
+    start = times[rising]
+    stop = times[falling]
+    if access_fn is not None:
+        start = _bisect_edges(access_fn, times[rising - 1], start, False, tolerance)
+        stop = _bisect_edges(access_fn, times[falling - 1], stop, True, tolerance)
+
+    # 首尾未闭合的窗口
+    if flag[0]:
+        start = np.concatenate(([times[0]], start))
+    if flag[-1]:
+        stop = np.concatenate((stop, [times[-1]]))
+
+    return start, stop, stop - start
+
+
+def to_utc(timeInit, seconds):
+    """
+    批量把相对 ``timeInit`` 的仿真秒转换为 UTC。
+
+    Args:
+        timeInit (datetime): 仿真起始 UTC
+        seconds (ndarray): 相对起始时刻的秒数
+
+    Returns:
+        ndarray: ``datetime64[us]`` 数组
+    """
+    offsets = np.round(np.asarray(seconds, dtype=float) * 1e6).astype('timedelta64[us]')
+    return np.datetime64(timeInit, 'us') + offsets
+
+
+def mrp2dcm(sigma):
+    """批量 MRP → DCM [BN]，``sigma`` 形状 ``(...,3)``，返回 ``(...,3,3)``"""
+    sigma = np.asarray(sigma, dtype=float)
+    s2 = np.einsum('...i,...i->...', sigma, sigma)
+    tilde = np.zeros(sigma.shape + (3,))
+    tilde[..., 0, 1] = -sigma[..., 2]
+    tilde[..., 0, 2] = sigma[..., 1]
+    tilde[..., 1, 0] = sigma[..., 2]
+    tilde[..., 1, 2] = -sigma[..., 0]
+    tilde[..., 2, 0] = -sigma[..., 1]
+    tilde[..., 2, 1] = sigma[..., 0]
+    tilde2 = tilde @ tilde
+    denom = ((1.0 + s2) ** 2)[..., None, None]
+    return np.eye(3) + (8.0 * tilde2 - 4.0 * (1.0 - s2)[..., None, None] * tilde) / denom
+
+
+class AccessGeometryResult:
+    """
+    :meth:`AccessGeometry.evaluate` 的输出列。
+
+    ``viewAngle`` 为目标相对天线视轴的夹角，对应 AccessMsgPayload 中的 ``elevation = pi/2 - viewAngle``；
+    ``slantRange`` 始终为真实距离（模块在遮挡时输出 0）。
+    """
+    def __init__(self, slantRange, viewAngle, inRange, occulted, inCone, hasAccess):
+        self.slantRange = slantRange
+        self.viewAngle = viewAngle
+        self.inRange = inRange
+        self.occulted = occulted
+        self.inCone = inCone
+        self.hasAccess = hasAccess
+
+
+class AccessGeometry:
+    """
+    与 ``spacecraftLocation.SpacecraftLocation`` 相同判据的批量几何计算。
+
+    参数名与模块属性一致：``aHat_B``、``theta``、``maximumRange``（<0 表示不限）、
+    ``rEquator``/``rPolar``（遮挡椭球）、``r_LB_B``（天线相对本体的位置）。
+    所有输入按 NumPy 广播规则对齐，时间维放在最前面。
+    """
+    def __init__(self, aHat_B=(0.0, 0.0, 0.0), theta=0.0, maximumRange=-1.0,
+                 rEquator=0.0, rPolar=None, r_LB_B=(0.0, 0.0, 0.0)):
+        self.aHat_B = np.asarray(aHat_B, dtype=float).reshape(3)
+        self.theta = theta
+        self.maximumRange = maximumRange
+        self.rEquator = rEquator
+        self.rPolar = rEquator if rPolar is None else rPolar
+        self.r_LB_B = np.asarray(r_LB_B, dtype=float).reshape(3)
+
+    @classmethod
+    def from_module(cls, access):
+        """从已配置好的 SpacecraftLocation 模块复制参数"""
+        return cls(aHat_B=list(access.aHat_B), theta=access.theta, maximumRange=access.maximumRange,
+                   rEquator=access.rEquator, rPolar=access.rPolar, r_LB_B=list(access.r_LB_B))
+
+    def evaluate(self, r_BN_N, r_SN_N, sigma_BN=None, r_PN_N=None, dcm_PN=None):
+        """
+        Args:
+            r_BN_N (ndarray): 主航天器位置 ``(N,3)``
+            r_SN_N (ndarray): 目标航天器位置 ``(N,3)``（可广播）
+            sigma_BN (ndarray): 主航天器姿态 MRP ``(N,3)``，缺省为零姿态
+            r_PN_N (ndarray): 遮挡行星位置，缺省在原点
+            dcm_PN (ndarray): 行星固连系 DCM ``(N,3,3)`` 或 ``(3,3)``，缺省为单位阵
+
+        Returns:
+            AccessGeometryResult
+        """
+        r_BN_N = np.asarray(r_BN_N, dtype=float)
+        r_SN_N = np.asarray(r_SN_N, dtype=float)
+        r_PN_N = np.zeros(3) if r_PN_N is None else np.asarray(r_PN_N, dtype=float)
+        dcm_NB = None
+        if sigma_BN is not None:
+            dcm_NB = np.swapaxes(mrp2dcm(sigma_BN), -1, -2)
+
+        # 天线位置与目标相对天线的位置
+        if dcm_NB is None:
+            r_LN_N = r_BN_N + self.r_LB_B
+        else:
+            r_LN_N = r_BN_N + np.einsum('...ij,j->...i', dcm_NB, self.r_LB_B)
+        r_SL_N = r_SN_N - r_LN_N
+        slantRange = np.linalg.norm(r_SL_N, axis=-1)
+        inRange = (slantRange <= self.maximumRange) | (self.maximumRange < 0)
+
+        # 椭球遮挡：z 轴按 rEquator/rPolar 拉伸成球，再求线段到球心的最近距离
+        r_LP = r_LN_N - r_PN_N
+        r_SP = r_SN_N - r_PN_N
+        if dcm_PN is not None:
+            r_LP = np.einsum('...ij,...j->...i', dcm_PN, r_LP)
+            r_SP = np.einsum('...ij,...j->...i', dcm_PN, r_SP)
+        zScale = np.array([1.0, 1.0, self.rEquator / self.rPolar]) if self.rPolar > 0 else np.ones(3)
+        r_LP = r_LP * zScale
+        r_SP = r_SP * zScale
+        seg = r_SP - r_LP
+        segNorm2 = np.einsum('...i,...i->...', seg, seg)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            param = np.clip(-np.einsum('...i,...i->...', r_LP, seg) / segNorm2, 0.0, 1.0)
+        param = np.nan_to_num(param)
+        closest = r_LP + param[..., None] * seg
+        occulted = np.linalg.norm(closest, axis=-1) <= self.rEquator
+
+        # 视轴夹角
+        aNorm = np.linalg.norm(self.aHat_B)
+        if aNorm > 0:
+            aHat_B = self.aHat_B / aNorm
+            aHat_N = aHat_B if dcm_NB is None else np.einsum('...ij,j->...i', dcm_NB, aHat_B)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cosView = np.einsum('...i,...i->...', r_SL_N, aHat_N * np.ones_like(r_SL_N)) / slantRange
+            viewAngle = np.arccos(np.clip(np.nan_to_num(cosView), -1.0, 1.0))
+            inCone = viewAngle <= self.theta
+        else:
+            viewAngle = np.zeros_like(slantRange)
+            inCone = np.ones_like(inRange)
+
+        hasAccess = inRange & ~occulted & inCone
+        return AccessGeometryResult(slantRange, viewAngle, inRange, occulted, inCone, hasAccess)
+
+
+def make_access_fn(geometry, times, primaryRec, targetRec):
+    """
+    用记录的两星状态（Hermite 插值）构造 ``access_fn(t)``，供 :func:`extract_windows` 细化边沿。
+
+    Args:
+        geometry (AccessGeometry): 与仿真模块一致的几何参数
+        times (ndarray): 记录时刻 (s)
+        primaryRec, targetRec: ``scStateOutMsg`` 记录器（``r_BN_N``/``v_BN_N``/``sigma_BN``）
+    """
+    # Basilisk 记录器单位一致（m、m/s、s），不做速度校验
+    primary = HermiteInterpolator(times, primaryRec.r_BN_N, primaryRec.v_BN_N, checkVelocity=False)
+    target = HermiteInterpolator(times, targetRec.r_BN_N, targetRec.v_BN_N, checkVelocity=False)
+    sigma = np.asarray(primaryRec.sigma_BN, dtype=float)
+
+    def access_fn(t):
+        r_BN_N, _ = primary.evaluate(t)
+        r_SN_N, _ = target.evaluate(t)
+        # 姿态 MRP 在相邻记录之间线性插值；区间内发生影子集切换时取左端点
+        t = np.clip(t, times[0], times[-1])
+        k = np.clip(np.searchsorted(times, t, side='right') - 1, 0, len(times) - 2)
+        w = ((t - times[k]) / (times[k + 1] - times[k]))[:, None]
+        dSigma = sigma[k + 1] - sigma[k]
+        switched = np.linalg.norm(dSigma, axis=1) > 0.5
+        sigma_BN = sigma[k] + np.where(switched[:, None], 0.0, w * dSigma)
+        return geometry.evaluate(r_BN_N, r_SN_N, sigma_BN=sigma_BN).hasAccess
+
+    return access_fn
@@ -0,0 +1,392 @@
+#
+# benchmark.py
+#
+# test1-test6 的分阶段基准测试：构建、InitializeSimulation、ExecuteSimulation、后处理分别计时，
+# 每个场景在若干步长/时长倍率下运行，结果写成 JSON，便于分支之间对比、发现性能回退。
+#
+# 计时不改动各脚本：运行期间临时包装仿真类的 CreateNewTask / ConfigureStopTime（按倍率缩放步长与时长）
+# 以及 InitializeSimulation / ExecuteSimulation（记录时间戳）。
+# 没有安装 Basilisk 时改用本文件中的 StandInSim（纯 NumPy 二体 RK4），按各脚本的航天器数、步长与时长
+# 构造等效负载，输出格式相同。
+#
+#   python -m benchmark --output bench.json
+#   python -m benchmark --output new.json --compare bench.json
+#
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import traceback
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+STAGES = ("construct", "initialize", "execute", "postprocess")
+DEFAULT_STEP_SCALES = (1.0, 2.0)
+DEFAULT_DURATION_SCALES = (0.5, 1.0)
+REGRESSION_THRESHOLD = 0.10  # 总耗时变慢超过 10% 视为回退
+
+NANO2SEC = 1e-9
+SEC2NANO = 1e9
+MU_EARTH = 3.986004415e14
+
+
+def _run_test1():
+    import test1
+    test1.run(False, 'LEO', False, 'Earth')
+
+
+def _run_test2():
+    import test2
+    test2.DATA_FILE = os.path.join(HERE, "DRO.csv")  # 基准在临时目录中运行
+    test2.run()
+
+
+def _run_test3():
+    import test3
+    test3.run(False)
+
+
+def _run_test4():
+    import test4
+    test4.run_rendezvous_sandbox()
+
+
+def _run_test5():
+    import test5
+    test5.run(False)
+
+
+def _run_test6():
+    import test6
+    test6.run(False)
+
+
+SCENARIOS = {
+    'test1': _run_test1,
+    'test2': _run_test2,
+    'test3': _run_test3,
+    'test4': _run_test4,
+    'test5': _run_test5,
+    'test6': _run_test6,
+}
+
+# 各脚本在替身内核中的等效负载：航天器数、步长 (s)、时长 (s)、初始轨道半径 (m)
+STANDIN_PROFILES = {
+    'test1': dict(nSpacecraft=1, stepSec=10.0, durationSec=4320.0, radius=7.0e6),
+    'test2': dict(nSpacecraft=1, stepSec=1.0, durationSec=3600.0, radius=3.8e8),
+    'test3': dict(nSpacecraft=1, stepSec=1.0, durationSec=6052.0, radius=7.178e6),
+    'test4': dict(nSpacecraft=2, stepSec=60.0, durationSec=300.0 * 3600.0, radius=6.778e6),
+    'test5': dict(nSpacecraft=2, stepSec=180.0, durationSec=30.0 * 86400.0, radius=4.2164e7),
+    'test6': dict(nSpacecraft=2, stepSec=120.0, durationSec=20.0 * 86400.0, radius=4.2164e7),
+}
+
+
+class StandInSim:
+    """
+    仿真内核替身：接口名与 SimBaseClass 一致（CreateNewTask / InitializeSimulation /
+    ConfigureStopTime / ExecuteSimulation），内部对所有航天器做向量化二体 RK4 并逐步记录。
+    """
+    def __init__(self, mu=MU_EARTH):
+        self.mu = mu
+        self.taskRate = None
+        self.r0 = []
+        self.v0 = []
+        self.stopTime = 0
+        self.currentTime = 0
+
+    def CreateNewTask(self, taskName, taskRate, InputDelay=None, FirstStart=0):
+        self.taskRate = int(taskRate)
+
+    def add_spacecraft(self, r, v):
+        self.r0.append(np.asarray(r, dtype=float))
+        self.v0.append(np.asarray(v, dtype=float))
+
+    def InitializeSimulation(self):
+        self.r = np.array(self.r0)
+        self.v = np.array(self.v0)
+        self.currentTime = 0
+        self.times = [0]
+        self.r_BN_N = [self.r.copy()]
+
+    def ConfigureStopTime(self, stopTime):
+        self.stopTime = int(stopTime)
+
+    def _accel(self, r):
+        rNorm = np.linalg.norm(r, axis=-1, keepdims=True)
+        return -self.mu * r / rNorm ** 3
+
+    def ExecuteSimulation(self):
+        h = self.taskRate * NANO2SEC
+        r, v = self.r, self.v
+        while self.currentTime + self.taskRate <= self.stopTime:
+            k1r, k1v = v, self._accel(r)
+            k2r, k2v = v + 0.5 * h * k1v, self._accel(r + 0.5 * h * k1r)
+            k3r, k3v = v + 0.5 * h * k2v, self._accel(r + 0.5 * h * k2r)
+            k4r, k4v = v + h * k3v, self._accel(r + h * k3r)
+            r = r + h / 6.0 * (k1r + 2.0 * k2r + 2.0 * k3r + k4r)
+            v = v + h / 6.0 * (k1v + 2.0 * k2v + 2.0 * k3v + k4v)
+            self.currentTime += self.taskRate
+            self.times.append(self.currentTime)
+            self.r_BN_N.append(r)
+        self.r, self.v = r, v
+
+
+def _standin_scenario(profile):
+    def run():
+        sim = StandInSim()
+        sim.CreateNewTask("simTask", profile['stepSec'] * SEC2NANO)
+        radius = profile['radius']
+        speed = np.sqrt(MU_EARTH / radius)
+        for k in range(profile['nSpacecraft']):
+            phase = 0.1 * k
+            sim.add_spacecraft(radius * np.array([np.cos(phase), np.sin(phase), 0.0]),
+                               speed * np.array([-np.sin(phase), np.cos(phase), 0.0]))
+        sim.InitializeSimulation()
+        sim.ConfigureStopTime(profile['durationSec'] * SEC2NANO)
+        sim.ExecuteSimulation()
+
+        # 后处理：与各脚本类似的轨道半径 / 相对距离统计
+        r = np.array(sim.r_BN_N)
+        np.linalg.norm(r, axis=-1).max(axis=0)
+        if r.shape[1] > 1:
+            np.linalg.norm(r[:, 0] - r[:, 1], axis=-1).argmin()
+    return run
+
+
+class StageTimer:
+    """
+    在 with 块内包装仿真类的方法：缩放步长/时长并记录各阶段耗时。
+
+    Args:
+        simClass: ``SimBaseClass.SimBaseClass`` 或 :class:`StandInSim`
+        stepScale (float): 任务步长倍率
+        durationScale (float): 仿真停止时间倍率
+    """
+    def __init__(self, simClass, stepScale=1.0, durationScale=1.0):
+        self.simClass = simClass
+        self.stepScale = stepScale
+        self.durationScale = durationScale
+        self.initialize = 0.0
+        self.execute = 0.0
+        self.lastExecuteEnd = None
+        self._saved = {}
+
+    def __enter__(self):
+        timer = self
+        cls = self.simClass
+        names = ("CreateNewTask", "ConfigureStopTime", "InitializeSimulation", "ExecuteSimulation")
+        self._saved = {name: cls.__dict__.get(name) for name in names}
+        createNewTask = getattr(cls, "CreateNewTask")
+        configureStopTime = getattr(cls, "ConfigureStopTime")
+        initializeSimulation = getattr(cls, "InitializeSimulation")
+        executeSimulation = getattr(cls, "ExecuteSimulation")
+
+        # SimBaseClass 会读取 CreateNewTask.__defaults__，包装函数保持相同的缺省参数
+        def CreateNewTask(sim, taskName, taskRate, InputDelay=None, FirstStart=0):
+            return createNewTask(sim, taskName, int(taskRate * timer.stepScale), InputDelay, FirstStart)
+
+        def ConfigureStopTime(sim, stopTime, *args, **kwargs):
+            return configureStopTime(sim, int(stopTime * timer.durationScale), *args, **kwargs)
+
+        def InitializeSimulation(sim, *args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return initializeSimulation(sim, *args, **kwargs)
+            finally:
+                timer.initialize += time.perf_counter() - t0
+
+        def ExecuteSimulation(sim, *args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return executeSimulation(sim, *args, **kwargs)
+            finally:
+                timer.lastExecuteEnd = time.perf_counter()
+                timer.execute += timer.lastExecuteEnd - t0
+
+        for name, fn in (("CreateNewTask", CreateNewTask), ("ConfigureStopTime", ConfigureStopTime),
+                         ("InitializeSimulation", InitializeSimulation),
+                         ("ExecuteSimulation", ExecuteSimulation)):
+            setattr(cls, name, fn)
+        return self
+
+    def __exit__(self, *exc):
+        for name, fn in self._saved.items():
+            if fn is None:
+                delattr(self.simClass, name)
+            else:
+                setattr(self.simClass, name, fn)
+
+    def stages(self, tStart, tEnd):
+        """由起止时刻与包装记录拆分出四个阶段"""
+        postprocess = tEnd - self.lastExecuteEnd if self.lastExecuteEnd is not None else 0.0
+        construct = (tEnd - tStart) - self.initialize - self.execute - postprocess
+        return {'construct': construct, 'initialize': self.initialize,
+                'execute': self.execute, 'postprocess': postprocess}
+
+
+def basilisk_available():
+    try:
+        from Basilisk.utilities import SimulationBaseClass  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def run_case(scenario, stepScale, durationScale, backend):
+    """运行单个场景一次，异常记录在结果中"""
+    if backend == 'basilisk':
+        from Basilisk.utilities import SimulationBaseClass
+        simClass, fn = SimulationBaseClass.SimBaseClass, SCENARIOS[scenario]
+    else:
+        simClass, fn = StandInSim, _standin_scenario(STANDIN_PROFILES[scenario])
+
+    result = {'stages': None, 'total': None, 'error': ''}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workDir, \
+            StageTimer(simClass, stepScale, durationScale) as timer:
+        os.chdir(workDir)  # Vizard 文件等输出写到临时目录
+        tStart = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            result['error'] = traceback.format_exc(limit=1).strip().splitlines()[-1]
+        tEnd = time.perf_counter()
+        os.chdir(cwd)
+    if not result['error']:
+        result['stages'] = timer.stages(tStart, tEnd)
+        result['total'] = tEnd - tStart
+    if backend == 'basilisk':
+        import matplotlib.pyplot as plt
+        plt.close("all")
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(scenarios=tuple(SCENARIOS), stepScales=DEFAULT_STEP_SCALES,
+                   durationScales=DEFAULT_DURATION_SCALES, repeat=1, backend='auto',
+                   outputFile="benchmark_results.json"):
+    """
+    运行基准并写 JSON。
+
+    Args:
+        scenarios (tuple): 场景名，取自 ``SCENARIOS``
+        stepScales (tuple): 步长倍率
+        durationScales (tuple): 时长倍率
+        repeat (int): 每个组合重复次数，汇总取各阶段最小值
+        backend (str): ``'basilisk'``、``'standin'`` 或 ``'auto'``（有 Basilisk 时用 Basilisk）
+        outputFile (str): JSON 输出路径，None 表示不写
+
+    Returns:
+        dict: ``{'meta': {...}, 'results': [...]}``
+    """
+    if backend == 'auto':
+        backend = 'basilisk' if basilisk_available() else 'standin'
+    if backend == 'basilisk':
+        import matplotlib
+        matplotlib.use("Agg", force=True)
+
+    results = []
+    for scenario in scenarios:
+        for stepScale in stepScales:
+            for durationScale in durationScales:
+                runs = [run_case(scenario, stepScale, durationScale, backend) for _ in range(repeat)]
+                ok = [r for r in runs if not r['error']]
+                entry = {'scenario': scenario, 'stepScale': stepScale, 'durationScale': durationScale,
+                         'runs': runs, 'stages': None, 'total': None,
+                         'error': runs[-1]['error'] if not ok else ''}
+                if ok:
+                    entry['stages'] = {s: min(r['stages'][s] for r in ok) for s in STAGES}
+                    entry['total'] = min(r['total'] for r in ok)
+                results.append(entry)
+                print(_format_row(entry))
+
+    report = {
+        'meta': {
+            'backend': backend,
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+    if outputFile:
+        with open(outputFile, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"基准结果已写入 {outputFile}")
+    return report
+
+
+def _format_row(entry):
+    head = f"{entry['scenario']:<7}step x{entry['stepScale']:<5g}dur x{entry['durationScale']:<5g}"
+    if entry['error']:
+        return head + f"失败: {entry['error']}"
+    return head + "".join(f"{s} {entry['stages'][s]:8.3f}s  " for s in STAGES) + f"total {entry['total']:8.3f}s"
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """
+    对比两份基准结果（dict 或 JSON 路径），打印每个组合的总耗时比值。
+
+    Returns:
+        list: 回退的 ``(scenario, stepScale, durationScale, ratio)``
+    """
+    reports = []
+    for report in (baseline, current):
+        if isinstance(report, str):
+            with open(report) as f:
+                report = json.load(f)
+        reports.append({(e['scenario'], e['stepScale'], e['durationScale']): e for e in report['results']})
+    base, cur = reports
+
+    regressions = []
+    for key, entry in cur.items():
+        old = base.get(key)
+        if old is None or old['total'] is None or entry['total'] is None:
+            continue
+        ratio = entry['total'] / old['total']
+        flag = ""
+        if ratio > 1.0 + threshold:
+            regressions.append(key + (ratio,))
+            flag = "  <-- 回退"
+        print(f"{key[0]:<7}step x{key[1]:<5g}dur x{key[2]:<5g}"
+              f"{old['total']:8.3f}s -> {entry['total']:8.3f}s  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="test1-test6 分阶段基准测试")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--step-scales", nargs="+", type=float, default=list(DEFAULT_STEP_SCALES))
+    parser.add_argument("--duration-scales", nargs="+", type=float, default=list(DEFAULT_DURATION_SCALES))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--backend", default="auto", choices=("auto", "basilisk", "standin"))
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="作为基线的 JSON 文件，有回退时返回非零退出码")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.scenarios, args.step_scales, args.duration_scales,
+                            args.repeat, args.backend, args.output)
+    if args.compare:
+        return 1 if compare(args.compare, report) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,356 @@
+#
+# checkpoint.py
+#
+# 长时间仿真的检查点、续跑与分支。
+#   - Checkpointer 是放在任务末尾（最低优先级）的 Python 模型，每隔 intervalSec 保存一次检查点：
+#     各航天器 hub 状态（r_CN_N、v_CN_N、sigma_BN、omega_BN_B）、仿真时刻、SPICE 历元，
+#     以及各记录器在该时刻之前的数据（增量追加到 recorderStore.ColumnStore，检查点只记录行数）
+#   - 检查点文件在数据写完之后原子替换，进程崩溃或 Ctrl-C 后最近一个检查点总是完整的
+#   - resume() 用 ScenarioBuilder 重新构建仿真，初始状态取检查点、SPICE 历元后移、仿真时间从 0 开始，
+#     记录器拼接为检查点之前的数据 + 续跑数据，时间轴与不中断的运行一致
+#   - fork() 从同一个检查点构建多个分支（如不同的机动），共同的前段只积分一次
+#
+#   builder = ScenarioBuilder(spec)
+#   scenario = builder.build(initialize=False)
+#   add_checkpointer(scenario, "ckpt", intervalSec=6 * 3600.0)
+#   scenario.scSim.InitializeSimulation()
+#   scenario.run()                                   # 中途崩溃 ...
+#   run = resume(builder, load_checkpoint("ckpt"))   # ... 从最近的检查点续跑到描述中的时长
+#   run.recorders["Chaser-Sat"].r_BN_N               # 全程记录
+#
+# 检查点间隔须为任务步长和各记录器采样间隔的整数倍，续跑后的采样时刻才与原运行一致。
+# 在无 SPICE 的场景中续跑与不中断运行逐位相同；有 SPICE 时起始历元以微秒精度保存。
+# 停止条件、步长调度等模型的内部状态不在检查点中，续跑时按当前状态重新开始；
+# 这些模型的配置可作为 settings 存入检查点，resume() 在配置不一致时拒绝续跑。
+#
+
+import glob
+import json
+import os
+
+import numpy as np
+from Basilisk.architecture import sysModel
+from Basilisk.utilities import macros
+
+import spiceKernels
+from recorderStore import TIME_COLUMN, ChunkedRecorder, ColumnStore, open_store
+from resultCache import recorder_columns
+from scenarioBuilder import SIM_TASK_NAME
+
+CHECKPOINT_VERSION = 1
+STATE_FIELDS = ("r_CN_N", "v_CN_N", "sigma_BN", "omega_BN_B")
+RECORDER_DIR = "recorders"
+
+
+def _checkpoint_file(path, nanos):
+    return os.path.join(path, f"checkpoint_{nanos:020d}.json")
+
+
+def _json_settings(settings):
+    """运行配置按 JSON 往返一次（元组变列表），与从检查点读回的值可以直接比较"""
+    return json.loads(json.dumps(settings or {}, sort_keys=True))
+
+
+def _sampling_nanos(recorder):
+    # 只有 ChunkedRecorder 能读出采样间隔，Basilisk 记录器只提供 updateTimeInterval() 设置接口
+    if isinstance(recorder, ChunkedRecorder) and recorder.samplingTime:
+        return int(recorder.samplingTime)
+    return 0
+
+
+class Checkpoint:
+    """
+    一个检查点。
+
+    Attributes:
+        path (str): 检查点目录
+        timeNanos (int): 检查点时刻，自最初运行开始 (ns)
+        states (dict): 航天器名称 → {``r_CN_N``, ``v_CN_N``, ``sigma_BN``, ``omega_BN_B``}
+        epoch (str): 检查点时刻的 SPICE 历元（UTC），无 SPICE 时为 None
+        rows (dict): 记录器名称 → 检查点之前的记录行数
+        settings (dict): 保存时附带的运行配置（停止条件、步长调度等），未给出时为空
+    """
+    def __init__(self, path, data):
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"{path}: 不支持的检查点版本 {data.get('version')}")
+        self.path = path
+        self.timeNanos = data["timeNanos"]
+        self.states = {name: {field: np.asarray(value) for field, value in state.items()}
+                       for name, state in data["states"].items()}
+        self.epoch = data["epoch"]
+        self.settings = data.get("settings", {})
+        self._dirs = data["recorders"]
+        self.rows = {name: entry["rows"] for name, entry in self._dirs.items()}
+
+    @property
+    def timeSec(self):
+        return self.timeNanos * macros.NANO2SEC
+
+    def history(self, name):
+        """记录器 ``name`` 在检查点之前的数据，``{列名: 数组}``（含 ``times``）"""
+        store = open_store(os.path.join(self.path, RECORDER_DIR, self._dirs[name]["dir"]))
+        n = self.rows[name]
+        return {column: store.column(column)[:n] for column in store.columns}
+
+    def apply_states(self, spacecraft):
+        """把检查点状态写入各航天器的初始状态（须在 InitializeSimulation 之前）"""
+        for name, sc in spacecraft.items():
+            state = self.states[name]
+            sc.hub.r_CN_NInit = state["r_CN_N"]
+            sc.hub.v_CN_NInit = state["v_CN_N"]
+            sc.hub.sigma_BNInit = np.reshape(state["sigma_BN"], (3, 1))
+            sc.hub.omega_BN_BInit = np.reshape(state["omega_BN_B"], (3, 1))
+
+
+def list_checkpoints(path):
+    """目录中所有检查点的时刻 (s)，升序"""
+    files = sorted(glob.glob(os.path.join(path, "checkpoint_*.json")))
+    return [int(os.path.basename(f)[len("checkpoint_"):-len(".json")]) * macros.NANO2SEC for f in files]
+
+
+def load_checkpoint(path, timeSec=None):
+    """
+    读取检查点。
+
+    Args:
+        timeSec (float): 取不晚于该时刻的最近一个检查点，None 表示最近一个
+
+    Returns:
+        Checkpoint
+    """
+    times = list_checkpoints(path)
+    if timeSec is not None:
+        times = [t for t in times if t <= timeSec]
+    if not times:
+        raise FileNotFoundError(f"{path} 中没有{'' if timeSec is None else f' {timeSec} s 之前的'}检查点")
+    with open(_checkpoint_file(path, macros.sec2nano(times[-1])), "r") as f:
+        return Checkpoint(path, json.load(f))
+
+
+class JoinedRecorder:
+    """
+    检查点之前的数据与续跑记录器拼接成的全程记录，用法同 Basilisk 记录器（``times()``、``r_BN_N``）。
+    续跑部分的时刻加上检查点时刻。
+    """
+    def __init__(self, history, recorder, offsetNanos):
+        self.history = history
+        self.recorder = recorder
+        self.offsetNanos = offsetNanos
+
+    @property
+    def columns(self):
+        return list(self.history)
+
+    def times(self):
+        return np.concatenate((self.history[TIME_COLUMN],
+                               np.asarray(self.recorder.times(), dtype=np.int64) + self.offsetNanos))
+
+    def __getattr__(self, name):
+        if name.startswith("_") or name in ("history", "recorder", "offsetNanos", "columns"):
+            raise AttributeError(name)
+        if name not in self.history:
+            raise AttributeError(name)
+        return np.concatenate((self.history[name], np.asarray(getattr(self.recorder, name))))
+
+
+class Checkpointer(sysModel.SysModel):
+    """
+    周期性保存检查点。
+
+    Args:
+        spacecraft (dict): 名称 → ``Spacecraft``
+        recorders (dict): 名称 → 记录器（Basilisk 记录器或 ChunkedRecorder）
+        path (str): 检查点目录
+        intervalSec (float): 检查点间隔 (s)
+        spiceObject: SPICE 模块，用于保存检查点时刻的历元
+        parent (Checkpoint): 续跑的起点；仿真时刻从 0 开始，检查点时刻与记录均接在其后
+        settings (dict): 随检查点保存的运行配置，须可 JSON 序列化
+    """
+    def __init__(self, spacecraft, recorders, path, intervalSec, spiceObject=None, parent=None, settings=None):
+        super().__init__()
+        self.ModelTag = "Checkpointer"
+        self.spacecraft = spacecraft
+        self.recorders = recorders
+        self.path = path
+        self.intervalNanos = macros.sec2nano(intervalSec)
+        self.spiceObject = spiceObject
+        self.parent = parent
+        self.settings = _json_settings(settings)
+        self.offsetNanos = parent.timeNanos if parent is not None else 0
+        for name, recorder in recorders.items():
+            period = _sampling_nanos(recorder)
+            if period and self.intervalNanos % period:
+                raise ValueError(f"检查点间隔 {intervalSec} s 不是记录器 '{name}' 采样间隔的整数倍")
+        self.saved = []   # 已保存的检查点时刻 (s)
+        self._stores = {}
+        self._savedRows = {}
+
+    def Reset(self, CurrentSimNanos):
+        os.makedirs(os.path.join(self.path, RECORDER_DIR), exist_ok=True)
+        self.saved = []
+        self._stores = {}
+        self._savedRows = {}
+        # 在原目录续跑时保留起点之前的检查点与记录，其余情况清空目录中已有的检查点
+        sameDir = self.parent is not None and os.path.abspath(self.parent.path) == os.path.abspath(self.path)
+        keepNanos = self.parent.timeNanos if sameDir else -1
+        for f in glob.glob(os.path.join(self.path, "checkpoint_*.json")):
+            if int(os.path.basename(f)[len("checkpoint_"):-len(".json")]) > keepNanos:
+                os.remove(f)
+        prefixRows = self.parent.rows if sameDir else {}
+        for k, name in enumerate(self.recorders):
+            storePath = os.path.join(self.path, RECORDER_DIR, f"rec{k}")
+            if name in prefixRows:
+                store = ColumnStore(storePath, mode="r")
+                store.truncate(prefixRows[name])
+            else:
+                store = ColumnStore(storePath, mode="w")
+                if self.parent is not None:
+                    # 在新目录续跑或分支：先复制起点之前的记录，目录自成一体
+                    history = self.parent.history(name)
+                    for column, arr in history.items():
+                        store.define(column, arr.dtype, arr.shape[1:])
+                    store.append(history)
+            self._stores[name] = store
+            self._savedRows[name] = 0
+
+    def UpdateState(self, CurrentSimNanos):
+        if CurrentSimNanos == 0 or CurrentSimNanos % self.intervalNanos:
+            return
+        self.save(CurrentSimNanos)
+
+    def save(self, CurrentSimNanos):
+        """保存当前时刻的检查点，也可在 ExecuteSimulation 返回后手动调用"""
+        for name, recorder in self.recorders.items():
+            store = self._stores[name]
+            times = np.asarray(recorder.times(), dtype=np.int64)
+            # 本时刻的采样留给续跑的第 0 步
+            stop = int(np.searchsorted(times, CurrentSimNanos, side="left"))
+            start = self._savedRows[name]
+            if not store.columns:
+                store.define(TIME_COLUMN, np.int64, ())
+                for column in recorder_columns(recorder):
+                    arr = np.asarray(getattr(recorder, column))
+                    store.define(column, arr.dtype, arr.shape[1:])
+            if stop > start:
+                block = {TIME_COLUMN: times[start:stop] + self.offsetNanos}
+                for column in store.columns:
+                    if column != TIME_COLUMN:
+                        block[column] = np.asarray(getattr(recorder, column))[start:stop]
+                store.append(block)
+                self._savedRows[name] = stop
+
+        states = {}
+        for name, sc in self.spacecraft.items():
+            payload = sc.scStateOutMsg.read()
+            states[name] = {field: np.asarray(getattr(payload, field), dtype=float).tolist()
+                            for field in STATE_FIELDS}
+        epoch = None
+        if self.spiceObject is not None:
+            epoch = spiceKernels.shift_epoch(self.spiceObject.UTCCalInit, CurrentSimNanos * macros.NANO2SEC)
+        timeNanos = self.offsetNanos + CurrentSimNanos
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "timeNanos": timeNanos,
+            "states": states,
+            "epoch": epoch,
+            "settings": self.settings,
+            "recorders": {name: {"dir": os.path.basename(store.path), "rows": store.rows}
+                          for name, store in self._stores.items()},
+        }
+        target = _checkpoint_file(self.path, timeNanos)
+        tmp = target + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, target)
+        self.saved.append(timeNanos * macros.NANO2SEC)
+
+
+def add_checkpointer(scenario, path, intervalSec, parent=None, spiceObject=None, settings=None):
+    """
+    为 :class:`scenarioBuilder.Scenario` 挂上周期检查点，须在 InitializeSimulation 之前调用。
+
+    Returns:
+        Checkpointer
+    """
+    checkpointer = Checkpointer(scenario.spacecraft, scenario.recorders, path, intervalSec,
+                                spiceObject=spiceObject, parent=parent, settings=settings)
+    # 最低优先级：在本步动力学和记录器之后保存
+    scenario.scSim.AddModelToTask(SIM_TASK_NAME, checkpointer, None, -1000)
+    return checkpointer
+
+
+class ResumedRun:
+    """
+    :func:`resume` 的结果。
+
+    Attributes:
+        scenario: 续跑的 ``Scenario``，其中仿真时刻从检查点起算
+        recorders (dict): 名称 → :class:`JoinedRecorder`，全程记录
+        checkpointer: 续跑时挂上的 :class:`Checkpointer`，未开启时为 None
+    """
+    def __init__(self, scenario, checkpoint, checkpointer=None):
+        self.scenario = scenario
+        self.checkpoint = checkpoint
+        self.checkpointer = checkpointer
+        self.recorders = {name: JoinedRecorder(checkpoint.history(name), recorder, checkpoint.timeNanos)
+                          for name, recorder in scenario.recorders.items()}
+
+    @property
+    def offsetSec(self):
+        """续跑仿真时刻 0 对应的全程时刻 (s)"""
+        return self.checkpoint.timeSec
+
+
+def resume(builder, checkpoint, durationSec=None, modify=None, checkpointDir=None, intervalSec=None,
+           run=True, settings=None, **buildKwargs):
+    """
+    从检查点续跑。
+
+    Args:
+        builder (ScenarioBuilder): 构建原运行的构建器
+        checkpoint (Checkpoint): 起点
+        durationSec (float): 全程时长 (s)，缺省为场景描述中的时长；续跑的仿真时长为其减去检查点时刻
+        modify (callable): ``modify(scenario)``，在 InitializeSimulation 之前修改续跑的场景（如施加机动）
+        checkpointDir (str): 续跑时继续保存检查点的目录，可与 ``checkpoint.path`` 相同
+        intervalSec (float): 续跑的检查点间隔 (s)
+        run (bool): 是否立即运行到 ``durationSec``
+        settings (dict): 本次运行的配置；给出时须与检查点保存的一致，否则抛出 ``ValueError``，
+            续跑保存的检查点也带上这份配置
+        **buildKwargs: 传给 :meth:`ScenarioBuilder.build`（如 ``saveFile``、``stepSec``）
+
+    Returns:
+        ResumedRun
+    """
+    if settings is not None and _json_settings(settings) != checkpoint.settings:
+        raise ValueError(f"{checkpoint.path}: 检查点的运行配置 {checkpoint.settings} 与本次 "
+                         f"{_json_settings(settings)} 不一致，不能续跑；请换用新的检查点目录")
+    initialStates = {name: (state["r_CN_N"], state["v_CN_N"]) for name, state in checkpoint.states.items()}
+    scenario = builder.build(initialStates, epoch=checkpoint.epoch, initialize=False, **buildKwargs)
+    checkpoint.apply_states(scenario.spacecraft)
+    if modify is not None:
+        modify(scenario)
+    checkpointer = None
+    if checkpointDir is not None:
+        checkpointer = add_checkpointer(scenario, checkpointDir, intervalSec, parent=checkpoint,
+                                        spiceObject=builder.spiceObject,
+                                        settings=checkpoint.settings if settings is None else settings)
+    scenario.scSim.InitializeSimulation()
+    result = ResumedRun(scenario, checkpoint, checkpointer)
+    if run:
+        durationSec = builder.spec["durationSec"] if durationSec is None else durationSec
+        scenario.run(durationSec - checkpoint.timeSec)
+    return result
+
+
+def fork(builder, checkpoint, variants, durationSec=None, **buildKwargs):
+    """
+    从同一个检查点运行多个分支。
+
+    Args:
+        variants (dict): 分支名称 → ``modify(scenario)``（None 表示不作修改）
+
+    Returns:
+        dict: 分支名称 → :class:`ResumedRun`
+    """
+    return {name: resume(builder, checkpoint, durationSec, modify=modify, **buildKwargs)
+            for name, modify in variants.items()}
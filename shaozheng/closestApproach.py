@@ -0,0 +1,96 @@
+#
+# closestApproach.py
+#
+# 从记录器的 r_BN_N / v_BN_N 采样中求最近接近时刻 (TCA) 与最小距离。
+# 在距离变化率 r·v 由负变正的采样区间内，用位置+速度三次 Hermite 插值
+# 重建相对轨迹并二分求根，结果不受采样间隔限制，记录器可以采得更稀。
+#
+
+import numpy as np
+
+from trajectoryPlayback import hermite_weights
+
+BISECTION_STEPS = 60
+
+
+def _hermite_relative(s, h, r0, v0, r1, v1):
+    """区间内归一化时间 s 处的相对位置与相对速度，s 形状 (M,)"""
+    wr, wv = hermite_weights(s, h)
+    rho = wr[0][:, None] * r0 + wr[1][:, None] * v0 + wr[2][:, None] * r1 + wr[3][:, None] * v1
+    rhoDot = wv[0][:, None] * r0 + wv[1][:, None] * v0 + wv[2][:, None] * r1 + wv[3][:, None] * v1
+    return rho, rhoDot
+
+
+def refine_intervals(t0, h, r0, v0, r1, v1):
+    """
+    在给定的采样区间内二分求相对距离极小（区间两端的距离变化率应分别为负、非负）。
+
+    Args:
+        t0 (ndarray): 区间起点 (s)，形状 (K,)
+        h (ndarray): 区间长度 (s)
+        r0, v0, r1, v1 (ndarray): 区间两端的相对位置/速度 ``(K,3)``
+
+    Returns:
+        tuple: ``(tca, missDistance, relSpeed)``
+    """
+    lo = np.zeros_like(h)
+    hi = np.ones_like(h)
+    for _ in range(BISECTION_STEPS):
+        mid = 0.5 * (lo + hi)
+        p, pDot = _hermite_relative(mid, h, r0, v0, r1, v1)
+        closing = np.einsum('ij,ij->i', p, pDot) < 0.0
+        lo = np.where(closing, mid, lo)
+        hi = np.where(closing, hi, mid)
+    s = 0.5 * (lo + hi)
+    p, pDot = _hermite_relative(s, h, r0, v0, r1, v1)
+    return t0 + s * h, np.linalg.norm(p, axis=1), np.linalg.norm(pDot, axis=1)
+
+
+def find_closest_approaches(times, rA, vA, rB, vB, threshold=None):
+    """
+    找出两条采样轨迹之间所有的距离局部极小，并做亚采样精度细化。
+
+    Args:
+        times (ndarray): 采样时刻 (s)，长度 N，严格递增
+        rA, vA (ndarray): 物体 A 的 ``(N,3)`` 位置/速度
+        rB, vB (ndarray): 物体 B 的 ``(N,3)`` 位置/速度
+        threshold (float): 只保留最小距离小于该值的事件，None 表示全部保留
+
+    Returns:
+        tuple: ``(tca, missDistance, relSpeed)``，按时间排序的数组，
+        分别为最近接近时刻、最小距离与该时刻的相对速度大小
+    """
+    times = np.asarray(times, dtype=float)
+    rho = np.asarray(rA, dtype=float) - np.asarray(rB, dtype=float)
+    rhoDot = np.asarray(vA, dtype=float) - np.asarray(vB, dtype=float)
+    rangeRate = np.einsum('ij,ij->i', rho, rhoDot)
+
+    # 距离变化率由负（接近）变为非负（远离）的区间内必有极小
+    k = np.nonzero((rangeRate[:-1] < 0.0) & (rangeRate[1:] >= 0.0))[0]
+    if len(k) == 0:
+        empty = np.empty(0)
+        return empty, empty, empty
+
+    tca, missDistance, relSpeed = refine_intervals(times[k], times[k + 1] - times[k],
+                                                   rho[k], rhoDot[k], rho[k + 1], rhoDot[k + 1])
+
+    if threshold is not None:
+        keep = missDistance < threshold
+        tca, missDistance, relSpeed = tca[keep], missDistance[keep], relSpeed[keep]
+    return tca, missDistance, relSpeed
+
+
+def closest_approach(times, rA, vA, rB, vB):
+    """
+    全局最近接近。没有检测到局部极小时（单调接近或远离），退回到端点采样。
+
+    Returns:
+        tuple: ``(tca, missDistance)``
+    """
+    tca, missDistance, _ = find_closest_approaches(times, rA, vA, rB, vB)
+    dist = np.linalg.norm(np.asarray(rA) - np.asarray(rB), axis=1)
+    kEnd = 0 if dist[0] <= dist[-1] else len(dist) - 1
+    if len(tca) == 0 or dist[kEnd] < np.min(missDistance):
+        return times[kEnd], dist[kEnd]
+    j = np.argmin(missDistance)
+    return tca[j], missDistance[j]
@@ -0,0 +1,257 @@
+#
+# conjunctionScreen.py
+#
+# 多航天器交会筛查：给定所有航天器记录器的 r_BN_N / v_BN_N（同一组采样时刻），
+# 找出最小距离小于阈值的所有航天器对，并给出 TCA 与最小距离。
+#
+#   - 近地点/远地点预筛：各航天器在全程的 [最小近地点, 最大远地点] 径向壳层不相交（差距大于阈值）的对直接排除
+#   - 逐采样区间的均匀网格：格子边长 = 阈值 + 区间内两星最大可能位移之和，
+#     区间内可能接近到阈值以内的一对在区间起点必然落在相邻格子中；
+#     只比较同格及 13 个"前向"相邻格中的对，每个区间 O(N log N)（排序 + 二分查找）
+#   - 网格按"时间块"建立而不是按采样区间：长采样区间按 Hermite 插值拆成子区间，短区间则连续合并，
+#     使每块内两星位移之和约为 MAX_REACH_RATIO 倍阈值。格子边长因此与采样间隔无关：
+#     采样稀疏时不会退化为几乎所有对都是候选，采样密集时也不会每个采样点都重建网格
+#   - 航天器不超过 ALL_PAIRS_MAX_SPACECRAFT 颗时不建网格，全部航天器对、全部区间分批向量化检查
+#   - 候选 (对, 区间) 再用距离上界和距离变化率由负变正筛一遍，最后用 closestApproach 的 Hermite 二分细化
+#
+#   pairs, tca, miss, relSpeed = screen(times, r, v, threshold=50e3, mu=muEarth)
+#
+
+import itertools
+
+import numpy as np
+from Basilisk.utilities import macros
+
+from closestApproach import refine_intervals
+from orbitalMotionBatch import rv2elemBatch
+from trajectoryPlayback import hermite_weights
+
+# 区间内速度可能略高于两端速度（如区间内过近地点），位移上界乘以该系数
+SPEED_MARGIN = 1.1
+# 一个网格时间块内两星位移之和的上限（阈值的倍数）
+MAX_REACH_RATIO = 20.0
+# 航天器数不超过该值时检查全部航天器对，不建网格
+ALL_PAIRS_MAX_SPACECRAFT = 32
+# 每批向量化检查的 子区间数 × 航天器（或航天器对）数 上限，限制内存
+_CHUNK_ELEMENTS = 1 << 18
+# 格子坐标打包为 int64 键，每轴 21 位
+_KEY_BITS = 21
+_KEY_OFFSET = 1 << (_KEY_BITS - 1)
+# 同格之外只查一半相邻格，每个无序格对恰好检查一次
+_FORWARD_OFFSETS = np.array([off for off in itertools.product((-1, 0, 1), repeat=3) if off > (0, 0, 0)])
+
+
+def _cell_keys(cells):
+    shifted = cells + _KEY_OFFSET
+    return (shifted[:, 0] << (2 * _KEY_BITS)) | (shifted[:, 1] << _KEY_BITS) | shifted[:, 2]
+
+
+def _expand_ranges(lo, hi):
+    """把每个 i 的 [lo[i], hi[i]) 展开为 ``(i, k)`` 两列"""
+    counts = hi - lo
+    owner = np.repeat(np.arange(len(lo)), counts)
+    starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+    return owner, np.arange(len(owner)) + starts
+
+
+def grid_pairs(positions, cellSize):
+    """
+    用均匀网格找出同格或相邻格中的所有航天器对。
+
+    Args:
+        positions (ndarray): ``(N,3)`` 位置
+        cellSize (float): 格子边长
+
+    Returns:
+        ndarray: ``(K,2)`` 索引对，``i < j``
+    """
+    n = len(positions)
+    # 坐标超出键的范围时放大格子，格子越大结果越保守
+    extent = np.max(np.abs(positions)) if n else 0.0
+    cellSize = max(cellSize, extent / (_KEY_OFFSET - 2))
+    cells = np.floor(positions / cellSize).astype(np.int64)
+    keys = _cell_keys(cells)
+    order = np.argsort(keys, kind="stable")
+    sortedKeys = keys[order]
+
+    pairs = []
+    # 同格：按排序位置只取后面的成员
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    hi = np.searchsorted(sortedKeys, keys, side="right")
+    i, k = _expand_ranges(rank + 1, hi)
+    pairs.append(np.column_stack((i, order[k])))
+    for offset in _FORWARD_OFFSETS:
+        neighborKeys = _cell_keys(cells + offset)
+        lo = np.searchsorted(sortedKeys, neighborKeys, side="left")
+        hi = np.searchsorted(sortedKeys, neighborKeys, side="right")
+        i, k = _expand_ranges(lo, hi)
+        pairs.append(np.column_stack((i, order[k])))
+    pairs = np.concatenate(pairs)
+    return np.sort(pairs, axis=1)
+
+
+def radial_shells(mu, times, positions, velocities):
+    """各航天器全程的最小近地点与最大远地点半径 ``(N,)``，双曲/抛物轨道远地点取无穷"""
+    m, n = positions.shape[:2]
+    oe = rv2elemBatch(mu, positions.reshape(-1, 3), velocities.reshape(-1, 3))
+    rApoap = np.where((oe.e < 1.0) & (oe.rApoap > 0.0), oe.rApoap, np.inf)
+    return np.min(oe.rPeriap.reshape(m, n), axis=0), np.max(rApoap.reshape(m, n), axis=0)
+
+
+def screen(times, positions, velocities, threshold, mu=None):
+    """
+    筛查所有航天器对的近距离交会。
+
+    Args:
+        times (ndarray): 采样时刻 (s)，长度 M，严格递增
+        positions, velocities (ndarray): ``(M, N, 3)``，所有航天器在相同时刻的状态
+        threshold (float): 距离阈值 (m)
+        mu (float): 中心天体引力常数；给出时先做近地点/远地点预筛（位置须以该天体为原点）
+
+    Returns:
+        tuple: ``(pairs, tca, missDistance, relSpeed)``，``pairs`` 为 ``(K,2)`` 航天器索引，按 TCA 排序
+    """
+    times = np.asarray(times, dtype=float)
+    positions = np.asarray(positions, dtype=float)
+    velocities = np.asarray(velocities, dtype=float)
+    n = positions.shape[1]
+
+    shells = None
+    if mu is not None:
+        shells = radial_shells(mu, times, positions, velocities)
+
+    maxReach = MAX_REACH_RATIO * threshold
+    candidates = []
+    if n <= ALL_PAIRS_MAX_SPACECRAFT:
+        # 航天器很少时直接检查全部航天器对，所有区间分批向量化，不建网格
+        a, b = _shell_filter(*np.triu_indices(n, 1), threshold, shells)
+        for chunk in _subintervals(times, positions, velocities, maxReach, len(a)):
+            candidates.append(_interval_candidates(*chunk, a, b, threshold))
+    else:
+        for chunk in _subintervals(times, positions, velocities, maxReach, n):
+            for lo, hi, blockReach in _blocks(chunk[-1], maxReach):
+                block = [column[lo:hi] for column in chunk]
+                pairs = grid_pairs(block[2][0], threshold + 2.0 * np.max(blockReach))
+                a, b = _shell_filter(pairs[:, 0], pairs[:, 1], threshold, shells)
+                candidates.append(_interval_candidates(*block, a, b, threshold))
+    candidates = [c for c in candidates if len(c[0])]
+
+    if not candidates:
+        empty = np.empty(0)
+        return np.empty((0, 2), dtype=np.int64), empty, empty, empty
+    t0, h, a, b, rho0, drho0, rho1, drho1 = (np.concatenate(column) for column in zip(*candidates))
+    tca, missDistance, relSpeed = refine_intervals(t0, h, rho0, drho0, rho1, drho1)
+    keep = missDistance < threshold
+    order = np.argsort(tca[keep], kind="stable")
+    pairs = np.column_stack((a, b))[keep][order]
+    return pairs, tca[keep][order], missDistance[keep][order], relSpeed[keep][order]
+
+
+def _subintervals(times, positions, velocities, maxReach, width):
+    """
+    分批给出子区间数组 ``(t0, h, r0, v0, r1, v1, reach)``：``t0``、``h`` 为 ``(L,)``，
+    状态为 ``(L,N,3)``，``reach`` 为各航天器区间内位移上界 ``(L,N)``。
+    两星位移之和超过 ``maxReach`` 的采样区间拆成等长子区间，子区间端点的状态取自同一条 Hermite 曲线，
+    细化结果与不拆分时一致。每批的子区间数乘以 ``width``（每个子区间要检查的航天器或航天器对数）
+    不超过 ``_CHUNK_ELEMENTS``。
+    """
+    speeds = np.linalg.norm(velocities, axis=2)
+    h = np.diff(times)
+    reach = SPEED_MARGIN * np.maximum(speeds[:-1], speeds[1:]) * h[:, None]
+    nSub = np.maximum(np.ceil(2.0 * np.max(reach, axis=1, initial=0.0) / maxReach), 1).astype(np.int64)
+    ends = np.cumsum(nSub)
+    perChunk = max(_CHUNK_ELEMENTS // max(width, 1), 1)
+    k0 = 0
+    while k0 < len(h):
+        first = ends[k0] - nSub[k0]
+        k1 = max(int(np.searchsorted(ends, first + perChunk, side='right')), k0 + 1)
+        k = np.repeat(np.arange(k0, k1), nSub[k0:k1])
+        m = nSub[k]
+        j = np.arange(len(k)) - (np.repeat(ends[k0:k1] - nSub[k0:k1], nSub[k0:k1]) - first)
+        hk = h[k][:, None, None]
+
+        def state(s):
+            wr, wv = hermite_weights(s[:, None, None], hk)
+            r = wr[0] * positions[k] + wr[1] * velocities[k] + wr[2] * positions[k + 1] + wr[3] * velocities[k + 1]
+            v = wv[0] * positions[k] + wv[1] * velocities[k] + wv[2] * positions[k + 1] + wv[3] * velocities[k + 1]
+            return r, v
+
+        r0, v0 = state(j / m)
+        r1, v1 = state((j + 1) / m)
+        yield times[k] + j * h[k] / m, h[k] / m, r0, v0, r1, v1, reach[k] / m[:, None]
+        k0 = k1
+
+
+def _blocks(reach, maxReach):
+    """
+    把一批子区间按顺序合并为时间块，块内两星位移之和不超过 ``maxReach``（单个子区间除外），每块建一次网格。
+
+    Returns:
+        list: ``(lo, hi, blockReach)``，``blockReach`` 为各航天器块内位移上界 ``(N,)``
+    """
+    blocks = []
+    lo, blockReach = 0, np.zeros(reach.shape[1])
+    for i in range(len(reach)):
+        total = blockReach + reach[i]
+        if i > lo and 2.0 * np.max(total) > maxReach:
+            blocks.append((lo, i, blockReach))
+            lo, total = i, reach[i]
+        blockReach = total
+    if len(reach):
+        blocks.append((lo, len(reach), blockReach))
+    return blocks
+
+
+def _shell_filter(a, b, threshold, shells):
+    """去掉径向壳层不相交（差距大于阈值）的航天器对"""
+    if shells is None:
+        return a, b
+    rMin, rMax = shells
+    overlap = (rMin[a] - threshold <= rMax[b]) & (rMin[b] - threshold <= rMax[a])
+    return a[overlap], b[overlap]
+
+
+def _interval_candidates(t0, h, r0, v0, r1, v1, reach, a, b, threshold):
+    """
+    一批子区间内的候选 (对, 区间)：区间起点的距离上界，以及区间内距离变化率由负变正（区间内有极小）。
+
+    Args:
+        t0, h, r0, v0, r1, v1, reach: 见 :func:`_subintervals`
+        a, b (ndarray): 要检查的航天器对 ``(K,)``
+
+    Returns:
+        tuple: ``(t0, h, a, b, rho0, drho0, rho1, drho1)``，每个候选一行
+    """
+    rho0 = r0[:, a] - r0[:, b]
+    near = np.einsum('lkj,lkj->lk', rho0, rho0) < (threshold + reach[:, a] + reach[:, b]) ** 2
+    row, col = np.nonzero(near)
+    aNear, bNear, rho0 = a[col], b[col], rho0[row, col]
+    drho0 = v0[row, aNear] - v0[row, bNear]
+    rho1 = r1[row, aNear] - r1[row, bNear]
+    drho1 = v1[row, aNear] - v1[row, bNear]
+    keep = (np.einsum('ij,ij->i', rho0, drho0) < 0.0) & (np.einsum('ij,ij->i', rho1, drho1) >= 0.0)
+    row = row[keep]
+    return (t0[row], h[row], aNear[keep], bNear[keep],
+            rho0[keep], drho0[keep], rho1[keep], drho1[keep])
+
+
+def screen_recorders(recorders, threshold, mu=None):
+    """
+    对一组 ``scStateOutMsg`` 记录器做交会筛查，记录器须有相同的采样时刻。
+
+    Args:
+        recorders (dict): 航天器名称 → 记录器（Basilisk 记录器或 ChunkedRecorder）
+
+    Returns:
+        list: ``(名称A, 名称B, tca, missDistance, relSpeed)``，按 TCA 排序
+    """
+    names = list(recorders)
+    times = np.asarray(recorders[names[0]].times(), dtype=np.int64)
+    for name in names[1:]:
+        if not np.array_equal(np.asarray(recorders[name].times(), dtype=np.int64), times):
+            raise ValueError(f"记录器 '{name}' 的采样时刻与 '{names[0]}' 不同")
+    positions = np.stack([np.asarray(recorders[name].r_BN_N, dtype=float) for name in names], axis=1)
+    velocities = np.stack([np.asarray(recorders[name].v_BN_N, dtype=float) for name in names], axis=1)
+    pairs, tca, missDistance, relSpeed = screen(times * macros.NANO2SEC, positions, velocities, threshold, mu)
+    return [(names[i], names[j], t, d, s) for (i, j), t, d, s in zip(pairs, tca, missDistance, relSpeed)]
@@ -0,0 +1,160 @@
+#
+# modelProfiler.py
+#
+# 可选的逐模型耗时分析。C++ 任务循环里调用各模型的 UpdateState，Python 侧无法直接包装，
+# 因此在 AddModelToTask 注册模型时，在它前后各插入一个同优先级的 Python 计时模型：
+# 同一任务内同优先级的模型按注册顺序执行，三者总是相邻，两次计时之差即该模型一步的耗时。
+#
+#   profiler = enable_profiling(scSim)      # 必须在添加模型之前调用
+#   ...                                      # 照常 AddModelToTask / InitializeSimulation
+#   scSim.ExecuteSimulation()                # 结束时打印排序表并写 folded 文件
+#
+# folded 文件每行 "任务;模型 微秒数"，可直接交给 flamegraph.pl 或 speedscope。
+# 每个任务额外有一对空计时模型 "(profiler overhead)"，给出计时本身的开销量级。
+#
+
+import time
+
+from Basilisk.architecture import sysModel
+
+OVERHEAD_NAME = "(profiler overhead)"
+
+
+class ModelStats:
+    """单个模型在一个任务中的累计统计"""
+    def __init__(self, taskName, modelName):
+        self.taskName = taskName
+        self.modelName = modelName
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.t0 = 0.0
+
+
+class _StartMarker(sysModel.SysModel):
+    def __init__(self, stats):
+        super().__init__()
+        self.ModelTag = "profileStart_" + stats.modelName
+        self.stats = stats
+
+    def UpdateState(self, CurrentSimNanos):
+        self.stats.t0 = time.perf_counter()
+
+
+class _StopMarker(sysModel.SysModel):
+    def __init__(self, stats):
+        super().__init__()
+        self.ModelTag = "profileStop_" + stats.modelName
+        self.stats = stats
+
+    def UpdateState(self, CurrentSimNanos):
+        dt = time.perf_counter() - self.stats.t0
+        stats = self.stats
+        stats.calls += 1
+        stats.total += dt
+        if dt > stats.max:
+            stats.max = dt
+
+
+def model_name(model):
+    """优先用 ModelTag，记录器等没有标签的模型用类名"""
+    tag = getattr(model, "ModelTag", "") or ""
+    return tag if tag else type(model).__name__
+
+
+class ModelProfiler:
+    """
+    挂到一个 ``SimBaseClass`` 实例上的逐模型计时器。
+
+    Args:
+        foldedFile (str): 每次 ExecuteSimulation 结束时写入的 folded 文件，None 表示不写
+        report (bool): 每次 ExecuteSimulation 结束时是否打印排序表
+    """
+    def __init__(self, foldedFile="model_profile.folded", report=True):
+        self.foldedFile = foldedFile
+        self.printReport = report
+        self.stats = []
+        self.executeTime = 0.0
+        self._markers = []  # 保持 Python 模型存活
+        self._names = {}
+        self._scSim = None
+
+    def attach(self, scSim):
+        """替换该实例的 AddModelToTask / ExecuteSimulation，之后注册的模型都会被计时"""
+        if self._scSim is not None:
+            raise RuntimeError("ModelProfiler 已挂接到仿真")
+        self._scSim = scSim
+        addModelToTask = scSim.AddModelToTask
+        executeSimulation = scSim.ExecuteSimulation
+        profiler = self
+
+        def AddModelToTask(TaskName, NewModel, ModelData=None, ModelPriority=-1):
+            if isinstance(ModelData, int):
+                ModelPriority = ModelData
+                ModelData = None
+            if not profiler._has_task(TaskName):
+                profiler._register(addModelToTask, TaskName, None, None, ModelPriority)
+            profiler._register(addModelToTask, TaskName, NewModel, ModelData, ModelPriority)
+
+        def ExecuteSimulation():
+            t0 = time.perf_counter()
+            try:
+                return executeSimulation()
+            finally:
+                profiler.executeTime += time.perf_counter() - t0
+                if profiler.printReport:
+                    print(profiler.report())
+                if profiler.foldedFile:
+                    profiler.write_folded(profiler.foldedFile)
+
+        scSim.AddModelToTask = AddModelToTask
+        scSim.ExecuteSimulation = ExecuteSimulation
+        return self
+
+    def _has_task(self, taskName):
+        return any(s.taskName == taskName for s in self.stats)
+
+    def _register(self, addModelToTask, taskName, model, modelData, priority):
+        name = OVERHEAD_NAME if model is None else model_name(model)
+        count = self._names.get((taskName, name), 0)
+        self._names[(taskName, name)] = count + 1
+        if count:
+            name = f"{name}#{count + 1}"
+
+        stats = ModelStats(taskName, name)
+        start, stop = _StartMarker(stats), _StopMarker(stats)
+        addModelToTask(taskName, start, None, priority)
+        if model is not None:
+            addModelToTask(taskName, model, modelData, priority)
+        addModelToTask(taskName, stop, None, priority)
+        self._markers += [start, stop]
+        self.stats.append(stats)
+
+    def sorted_stats(self):
+        return sorted(self.stats, key=lambda s: s.total, reverse=True)
+
+    def report(self, limit=None):
+        """按总耗时降序的统计表"""
+        rows = self.sorted_stats()[:limit]
+        lines = [f"\n--- 模型耗时 (ExecuteSimulation 共 {self.executeTime:.3f} s) ---",
+                 f"{'任务':<12}{'模型':<36}{'调用':>9}{'总计 [ms]':>12}{'平均 [us]':>11}{'最大 [us]':>11}{'占比':>8}"]
+        for s in rows:
+            mean = s.total / s.calls if s.calls else 0.0
+            share = s.total / self.executeTime if self.executeTime > 0 else 0.0
+            lines.append(f"{s.taskName:<12}{s.modelName:<36}{s.calls:>9d}{s.total * 1e3:>12.2f}"
+                         f"{mean * 1e6:>11.1f}{s.max * 1e6:>11.1f}{share:>8.1%}")
+        return "\n".join(lines)
+
+    def write_folded(self, path):
+        """folded 栈格式（任务;模型 微秒数），供火焰图工具读取"""
+        with open(path, "w") as f:
+            for s in self.sorted_stats():
+                micros = int(round(s.total * 1e6))
+                if micros > 0:
+                    frames = [s.taskName.replace(";", "_"), s.modelName.replace(";", "_")]
+                    f.write(";".join(frames) + f" {micros}\n")
+
+
+def enable_profiling(scSim, foldedFile="model_profile.folded", report=True):
+    """为 ``scSim`` 开启逐模型计时，须在添加模型之前调用"""
+    return ModelProfiler(foldedFile, report).attach(scSim)
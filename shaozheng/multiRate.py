@@ -0,0 +1,158 @@
+#
+# multiRate.py
+#
+# 动力学任务的多速率步长调度：远场用粗步长，临近预测事件（交会、access 窗口边沿）时切换到细步长。
+#
+#   - RateController 是一个放在任务末尾（最低优先级）的 Python 模型，每隔 decisionSec 调用一次规则，
+#     规则给出下一段的步长，变化时用 SysProcess.changeTaskPeriod 修改任务周期
+#   - 在任务内修改周期后，下一步落在新周期的整数倍时刻上；要求粗步长（决策间隔）是各细步长的整数倍，
+#     这样各级时间网格相互嵌套，决策时刻总是任务步，切换时刻只取决于仿真状态，结果可复现
+#   - spacecraft 按相邻两步的时间差积分，步长变化不需要额外处理
+#
+#   controller = add_rate_controller(scSim, taskName, DistanceRule(msgA, msgB, [(100e3, 1.0)], 60.0))
+#   ...
+#   controller.switches   # [(切换时刻 s, 新步长 s), ...]
+#
+
+import numpy as np
+from Basilisk.architecture import sysModel
+from Basilisk.utilities import macros
+
+
+class WindowRule:
+    """
+    预测事件窗口内用细步长：``[t, t + horizon]`` 与任一窗口（两侧各扩展 ``padSec``）相交时取 ``fineSec``。
+
+    Args:
+        windows (iterable): ``(t0, t1)`` 时间段 (s)，如预筛得到的 access 窗口边沿附近
+        fineSec (float): 窗口内步长 (s)
+        coarseSec (float): 窗口外步长 (s)
+        padSec (float): 窗口两侧余量 (s)，用于覆盖预测误差
+    """
+    def __init__(self, windows, fineSec, coarseSec, padSec=0.0):
+        windows = np.asarray(list(windows), dtype=float).reshape(-1, 2)
+        self.start = windows[:, 0] - padSec
+        self.stop = windows[:, 1] + padSec
+        self.fineSec = fineSec
+        self.coarseSec = coarseSec
+        self.steps = (fineSec, coarseSec)
+
+    def __call__(self, t, horizon):
+        if np.any((self.start < t + horizon) & (self.stop > t)):
+            return self.fineSec
+        return self.coarseSec
+
+
+class DistanceRule:
+    """
+    按两航天器的相对距离分级选步长。
+
+    以当前距离和接近速率线性外推决策间隔内的最小距离，取阈值大于该距离的最细一级；
+    放宽步长时阈值乘以 ``1 + hysteresis``，避免在阈值附近来回切换。
+
+    Args:
+        stateMsgA, stateMsgB: 两航天器的 ``scStateOutMsg``
+        bands (list): ``[(距离阈值 m, 步长 s), ...]``
+        coarseSec (float): 距离超过所有阈值时的步长 (s)
+        hysteresis (float): 放宽步长时阈值的相对放大量
+    """
+    def __init__(self, stateMsgA, stateMsgB, bands, coarseSec, hysteresis=0.1):
+        self.stateMsgA = stateMsgA
+        self.stateMsgB = stateMsgB
+        self.bands = sorted(bands, key=lambda band: band[1])  # 由细到粗
+        self.coarseSec = coarseSec
+        self.hysteresis = hysteresis
+        self.steps = tuple(step for _, step in self.bands) + (coarseSec,)
+        self.current = coarseSec
+
+    def _step(self, distance, scale):
+        for threshold, step in self.bands:
+            if distance < threshold * scale:
+                return step
+        return self.coarseSec
+
+    def predicted_distance(self, horizon):
+        a, b = self.stateMsgA.read(), self.stateMsgB.read()
+        dr = np.subtract(a.r_BN_N, b.r_BN_N)
+        dv = np.subtract(a.v_BN_N, b.v_BN_N)
+        d = np.linalg.norm(dr)
+        rate = np.dot(dr, dv) / d if d > 0.0 else 0.0
+        return max(d + min(rate, 0.0) * horizon, 0.0)
+
+    def __call__(self, t, horizon):
+        d = self.predicted_distance(horizon)
+        step = self._step(d, 1.0)
+        if step > self.current:
+            step = max(self._step(d, 1.0 + self.hysteresis), self.current)
+        self.current = step
+        return step
+
+
+class RateController(sysModel.SysModel):
+    """
+    运行时切换任务步长的调度模型。
+
+    Args:
+        process: 任务所在的 ``SysProcess``（``ProcessBaseClass.processData``）
+        taskName (str): 被调度的任务
+        rule (callable): ``rule(t, horizon) -> 步长 s``，带 ``steps`` 属性列出可能的步长
+        decisionSec (float): 决策间隔 (s)，须为所有步长的整数倍
+    """
+    def __init__(self, process, taskName, rule, decisionSec):
+        super().__init__()
+        self.ModelTag = "RateController_" + taskName
+        self.process = process
+        self.taskName = taskName
+        self.rule = rule
+        self.decisionSec = decisionSec
+        self.decisionNanos = macros.sec2nano(decisionSec)
+        for step in getattr(rule, "steps", ()):
+            period = macros.sec2nano(step)
+            if period <= 0 or self.decisionNanos % period:
+                raise ValueError(f"步长 {step} s 不能整除决策间隔 {decisionSec} s")
+        self.period = None
+        self.switches = []
+
+    def Reset(self, CurrentSimNanos):
+        self.period = None
+        self.switches = []
+
+    def UpdateState(self, CurrentSimNanos):
+        if CurrentSimNanos % self.decisionNanos:
+            return
+        t = CurrentSimNanos * macros.NANO2SEC
+        stepSec = self.rule(t, self.decisionSec)
+        period = macros.sec2nano(stepSec)
+        if period != self.period:
+            if self.decisionNanos % period:
+                raise ValueError(f"步长 {stepSec} s 不能整除决策间隔 {self.decisionSec} s")
+            self.process.changeTaskPeriod(self.taskName, period)
+            self.period = period
+            self.switches.append((t, stepSec))
+
+
+def find_process(scSim, taskName):
+    """包含任务 ``taskName`` 的 ``SysProcess``"""
+    for proc in scSim.procList:
+        for entry in proc.processData.processTasks:
+            if entry.TaskPtr.TaskName == taskName:
+                return proc.processData
+    raise KeyError(f"没有任务 '{taskName}'")
+
+
+def add_rate_controller(scSim, taskName, rule, decisionSec=None):
+    """
+    为任务 ``taskName`` 挂上多速率调度，须在 InitializeSimulation 之前调用。
+
+    Args:
+        decisionSec (float): 决策间隔 (s)，缺省为规则中最粗的步长
+
+    Returns:
+        RateController
+    """
+    if decisionSec is None:
+        decisionSec = max(rule.steps)
+    controller = RateController(find_process(scSim, taskName), taskName, rule, decisionSec)
+    # 最低优先级：在本步所有模型（含动力学）之后决策
+    scSim.AddModelToTask(taskName, controller, None, -1000)
+    return controller
@@ -0,0 +1,92 @@
+#
+# orbitSweep.py
+#
+# test1.run 参数网格（LEO/GEO/GTO × J2 开/关 × Earth/Mars）的并行扫描。
+# 每个工况在独立进程中以无界面 (Agg) 方式运行，图像写入输出目录，
+# finalDiff、耗时与图像文件汇总到一张 CSV 表。
+#
+
+import csv
+import itertools
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+ORBIT_CASES = ('LEO', 'GEO', 'GTO')
+SPHERICAL_HARMONICS = (False, True)
+PLANET_CASES = ('Earth', 'Mars')
+
+SUMMARY_FIELDS = ('orbitCase', 'useSphericalHarmonics', 'planetCase',
+                  'finalDiff', 'wallTime', 'figures', 'error')
+
+
+def _init_worker():
+    # 必须在导入 pyplot 之前切换到无界面后端
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+
+def run_case(orbitCase, useSphericalHarmonics, planetCase, outDir):
+    """运行单个工况并保存图像，异常记录在结果中而不是中断整个扫描"""
+    row = {'orbitCase': orbitCase, 'useSphericalHarmonics': useSphericalHarmonics,
+           'planetCase': planetCase, 'finalDiff': '', 'wallTime': '', 'figures': '', 'error': ''}
+    t0 = time.perf_counter()
+    try:
+        import matplotlib.pyplot as plt
+        import test1
+
+        finalDiff, figureList = test1.run(False, orbitCase, useSphericalHarmonics, planetCase)
+        figures = []
+        for pltName, fig in figureList.items():
+            path = os.path.join(outDir, pltName + ".png")
+            fig.savefig(path)
+            figures.append(path)
+        plt.close("all")
+        row['finalDiff'] = float(finalDiff)
+        row['figures'] = ";".join(figures)
+    except Exception:
+        row['error'] = traceback.format_exc(limit=1).strip().splitlines()[-1]
+    row['wallTime'] = time.perf_counter() - t0
+    return row
+
+
+def run_sweep(outDir="sweep_output", workers=None, orbitCases=ORBIT_CASES,
+              sphericalHarmonics=SPHERICAL_HARMONICS, planetCases=PLANET_CASES):
+    """
+    在进程池中运行完整笛卡尔积网格。
+
+    Args:
+        outDir (str): 图像与 summary.csv 的输出目录
+        workers (int): 进程数，None 表示使用全部 CPU 核
+
+    Returns:
+        list: 每个工况一行的结果字典，按网格顺序排列
+    """
+    os.makedirs(outDir, exist_ok=True)
+    grid = list(itertools.product(orbitCases, sphericalHarmonics, planetCases))
+
+    rows = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(run_case, *case, outDir): case for case in grid}
+        for future in as_completed(futures):
+            rows[futures[future]] = future.result()
+    rows = [rows[case] for case in grid]
+
+    summaryFile = os.path.join(outDir, "summary.csv")
+    with open(summaryFile, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"{'orbit':<6}{'J2':<4}{'planet':<8}{'finalDiff [m]':>16}{'time [s]':>10}")
+    for row in rows:
+        finalDiff = row['error'] or f"{row['finalDiff']:.6g}"
+        print(f"{row['orbitCase']:<6}{int(row['useSphericalHarmonics']):<4}{row['planetCase']:<8}"
+              f"{finalDiff:>16}{row['wallTime']:>10.2f}")
+    print(f"汇总已写入 {summaryFile}")
+    return rows
+
+
+if __name__ == "__main__":
+    run_sweep()
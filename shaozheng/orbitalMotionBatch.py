@@ -0,0 +1,326 @@
+#
+# orbitalMotionBatch.py
+#
+# Array-in/array-out versions of the Basilisk orbitalMotion conversions.
+# The recorder arrays (posData/velData, shape (N,3)) are converted in one
+# NumPy pass instead of calling orbitalMotion.rv2elem once per sample.
+# rk4PropagateBatch advances many spacecraft at once under point-mass + J2
+# gravity for screening candidate orbits before full Basilisk runs.
+#
+
+from copy import copy
+
+import numpy as np
+
+from Basilisk.utilities import orbitalMotion
+
+# same thresholds as orbitalMotion.rv2elem
+eps = orbitalMotion.eps
+tolerance = orbitalMotion.tolerance
+maxIteration = orbitalMotion.maxIteration
+
+
+class ClassicElementsArray:
+    """
+    Column container mirroring ``orbitalMotion.ClassicElements``.
+
+    Every attribute is a NumPy array with one entry per sample, so code written
+    against ``oeData.rmag``, ``oeData.f`` etc. works unchanged on whole histories.
+    """
+    def __init__(self, a, e, i, Omega, omega, f, rmag=None, alpha=None, rPeriap=None, rApoap=None):
+        self.a = a
+        self.e = e
+        self.i = i
+        self.Omega = Omega
+        self.omega = omega
+        self.f = f
+        self.rmag = rmag
+        self.alpha = alpha
+        self.rPeriap = rPeriap
+        self.rApoap = rApoap
+
+    def __len__(self):
+        return len(np.atleast_1d(self.a))
+
+
+def rv2elemBatch(mu, rVec, vVec):
+    """
+    Vectorized ``orbitalMotion.rv2elem``.
+
+    The four orbit cases (non-circular/circular × inclined/equatorial) are
+    resolved per sample with the same 1e-11 thresholds and angle conventions
+    as the scalar routine, so the results match it sample by sample.
+
+    Args:
+        mu (float): gravitational parameter
+        rVec (ndarray): ``(N,3)`` inertial position history
+        vVec (ndarray): ``(N,3)`` inertial velocity history
+
+    Returns:
+        ClassicElementsArray: element columns of length N
+    """
+    rVec = np.atleast_2d(np.asarray(rVec, dtype=float))
+    vVec = np.atleast_2d(np.asarray(vVec, dtype=float))
+
+    # specific angular momentum, line of nodes and eccentricity vector
+    hVec = np.cross(rVec, vVec)
+    h = np.linalg.norm(hVec, axis=1)
+    p = h * h / mu
+    nVec = np.column_stack((-hVec[:, 1], hVec[:, 0], np.zeros(len(hVec))))
+    n = np.linalg.norm(nVec, axis=1)
+
+    r = np.linalg.norm(rVec, axis=1)
+    v = np.linalg.norm(vVec, axis=1)
+    rDotV = np.einsum('ij,ij->i', rVec, vVec)
+    eVec = (v * v / mu - 1.0 / r)[:, None] * rVec - (rDotV / mu)[:, None] * vVec
+    e = np.linalg.norm(eVec, axis=1)
+
+    # semi-major axis, parabolic samples fall back to -rp as in rv2elem
+    alpha = 2.0 / r - v * v / mu
+    conic = np.abs(alpha) > eps
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = np.where(conic, 1.0 / alpha, -p / 2.0)
+        rApoap = np.where(conic, p / (1.0 - e), -1.0)
+    rPeriap = p / (1.0 + e)
+
+    i = np.arccos(np.clip(hVec[:, 2] / h, -1.0, 1.0))
+
+    eccentric = e >= 1e-11
+    inclined = i >= 1e-11
+    twoPi = 2.0 * np.pi
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # ascending node (zero for equatorial orbits)
+        Omega = np.arccos(np.clip(nVec[:, 0] / n, -1.0, 1.0))
+        Omega = np.where(nVec[:, 1] < 0.0, twoPi - Omega, Omega)
+        Omega = np.where(inclined, Omega, 0.0)
+
+        # argument of periapsis, or true longitude of periapsis if equatorial
+        omegaInc = np.arccos(np.clip(np.einsum('ij,ij->i', nVec, eVec) / n / e, -1.0, 1.0))
+        omegaInc = np.where(eVec[:, 2] < 0.0, twoPi - omegaInc, omegaInc)
+        omegaEq = np.arccos(np.clip(eVec[:, 0] / e, -1.0, 1.0))
+        omegaEq = np.where(eVec[:, 1] < 0.0, twoPi - omegaEq, omegaEq)
+        omega = np.where(eccentric, np.where(inclined, omegaInc, omegaEq), 0.0)
+
+        # true anomaly, argument of latitude or true longitude
+        fEcc = np.arccos(np.clip(np.einsum('ij,ij->i', eVec, rVec) / e / r, -1.0, 1.0))
+        fEcc = np.where(rDotV < 0.0, twoPi - fEcc, fEcc)
+        fLat = np.arccos(np.clip(np.einsum('ij,ij->i', nVec, rVec) / n / r, -1.0, 1.0))
+        fLat = np.where(rVec[:, 2] < 0.0, twoPi - fLat, fLat)
+        fLon = np.arccos(np.clip(rVec[:, 0] / r, -1.0, 1.0))
+        fLon = np.where(rVec[:, 1] < 0.0, twoPi - fLon, fLon)
+    f = np.where(eccentric, fEcc, np.where(inclined, fLat, fLon))
+
+    hyperbolicWrap = (e > 1.0) & (np.abs(f) > np.pi)
+    f = np.where(hyperbolicWrap, f - np.copysign(twoPi, f), f)
+
+    return ClassicElementsArray(a, e, i, Omega, omega, f,
+                                rmag=r, alpha=alpha, rPeriap=rPeriap, rApoap=rApoap)
+
+
+def elem2rvBatch(mu, elements):
+    """
+    Vectorized ``orbitalMotion.elem2rv``.
+
+    Args:
+        mu (float): gravitational parameter
+        elements: object with ``a, e, i, Omega, omega, f`` attributes; each may be a
+            scalar or an array, and they are broadcast against each other (e.g. a fixed
+            orbit with an array of true anomalies)
+
+    Returns:
+        tuple: ``(rVec, vVec)`` arrays of shape ``(N,3)``
+    """
+    a, e, inc, Omega, omega, f = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=float))
+          for x in (elements.a, elements.e, elements.i, elements.Omega, elements.omega, elements.f)))
+
+    if np.any(1.0 + e * np.cos(f) < tolerance):
+        print('WARNING: Radius is near infinite in elem2rv conversion.')
+
+    p = a * (1.0 - e * e)
+    r = p / (1.0 + e * np.cos(f))
+    theta = omega + f
+    cTheta, sTheta = np.cos(theta), np.sin(theta)
+    cOmega, sOmega = np.cos(Omega), np.sin(Omega)
+    cInc, sInc = np.cos(inc), np.sin(inc)
+
+    rVec = np.column_stack((r * (cTheta * cOmega - cInc * sTheta * sOmega),
+                            r * (cTheta * sOmega + cInc * sTheta * cOmega),
+                            r * (sTheta * sInc)))
+
+    # parabolic orbits use p = 2 rp with a = -rp
+    parabola = np.abs(p) < tolerance
+    if np.any(parabola & (np.abs(1.0 - e) < tolerance)):
+        raise ValueError('elem2rvBatch does not support rectilinear orbits')
+    p = np.where(parabola, -2.0 * a, p)
+
+    muOverH = mu / np.sqrt(mu * p)
+    eSw = e * np.sin(omega) + sTheta
+    eCw = e * np.cos(omega) + cTheta
+    vVec = np.column_stack((-muOverH * (cOmega * eSw + cInc * eCw * sOmega),
+                            -muOverH * (sOmega * eSw - cInc * eCw * cOmega),
+                            muOverH * eCw * sInc))
+
+    return rVec, vVec
+
+
+def f2EBatch(f, e):
+    """Vectorized ``orbitalMotion.f2E`` for elliptic orbits (0 <= e < 1)."""
+    return 2.0 * np.arctan2(np.sqrt(1.0 - e) * np.sin(f / 2.0), np.sqrt(1.0 + e) * np.cos(f / 2.0))
+
+
+def E2fBatch(Ecc, e):
+    """Vectorized ``orbitalMotion.E2f`` for elliptic orbits (0 <= e < 1)."""
+    return 2.0 * np.arctan2(np.sqrt(1.0 + e) * np.sin(Ecc / 2.0), np.sqrt(1.0 - e) * np.cos(Ecc / 2.0))
+
+
+def E2MBatch(Ecc, e):
+    """Vectorized ``orbitalMotion.E2M`` for elliptic orbits (0 <= e < 1)."""
+    return Ecc - e * np.sin(Ecc)
+
+
+def M2EBatch(M, e):
+    """
+    Vectorized ``orbitalMotion.M2E``.
+
+    The mean anomalies are wrapped into [-pi, pi) first so multi-revolution inputs
+    converge as fast as a single revolution; the revolutions are added back to the
+    result.  Newton's method on Kepler's equation starts from ``E = M`` like the
+    scalar routine and only the samples whose correction is still above ``eps``
+    keep iterating.
+
+    Args:
+        M (ndarray): mean anomalies (rad)
+        e (float or ndarray): eccentricity (0 <= e < 1)
+
+    Returns:
+        ndarray: eccentric anomalies (rad)
+    """
+    M = np.asarray(M, dtype=float)
+    if np.any((np.asarray(e) < 0.0) | (np.asarray(e) >= 1.0)):
+        raise ValueError('Error: M2EBatch() received e outside 0 <= e < 1')
+    shape = np.broadcast(M, np.asarray(e)).shape
+    M = np.broadcast_to(M, shape).ravel()
+    e = np.broadcast_to(np.asarray(e, dtype=float), shape).ravel()
+    revolutions = np.floor((M + np.pi) / (2.0 * np.pi))
+    Mw = M - 2.0 * np.pi * revolutions
+    E1 = Mw.copy()
+    active = np.ones(M.shape, dtype=bool)
+    for _ in range(maxIteration):
+        Ea, ea = E1[active], e[active]
+        dE = (Ea - ea * np.sin(Ea) - Mw[active]) / (1.0 - ea * np.cos(Ea))
+        E1[active] = Ea - dE
+        active[active] = np.abs(dE) > eps
+        if not np.any(active):
+            break
+    else:
+        print(f'Iteration error in M2EBatch(): {np.count_nonzero(active)} samples did not converge')
+    return (E1 + 2.0 * np.pi * revolutions).reshape(shape)
+
+
+def keplerPropagate(mu, elements, times):
+    """
+    Analytic two-body propagation of one elliptic orbit to many epochs.
+
+    Args:
+        mu (float): gravitational parameter
+        elements (ClassicElements): orbit elements at ``t = 0``
+        times (ndarray): propagation times (s)
+
+    Returns:
+        tuple: ``(rVec, vVec)`` arrays of shape ``(N,3)``
+    """
+    times = np.asarray(times, dtype=float)
+    E0 = orbitalMotion.f2E(elements.f, elements.e)
+    M0 = orbitalMotion.E2M(E0, elements.e)
+    n = np.sqrt(mu / (elements.a * elements.a * elements.a))
+
+    Et = M2EBatch(M0 + n * times, elements.e)
+    oeTraj = copy(elements)
+    oeTraj.f = E2fBatch(Et, elements.e)
+    return elem2rvBatch(mu, oeTraj)
+
+
+def gravityAccelBatch(mu, rVec, J2=0.0, rEquator=0.0):
+    """
+    Point-mass plus zonal J2 acceleration for many positions at once.
+
+    The J2 term assumes the planet pole is the frame z axis, which holds for the
+    inertial frame of a non-rotating central body as in ``test1``.
+
+    Args:
+        mu (float): gravitational parameter
+        rVec (ndarray): ``(..., 3)`` positions relative to the planet
+        J2 (float): unnormalized J2 coefficient, 0 for point-mass gravity
+        rEquator (float): equatorial radius used with ``J2``
+
+    Returns:
+        ndarray: accelerations with the shape of ``rVec``
+    """
+    r2 = np.einsum('...i,...i->...', rVec, rVec)
+    r = np.sqrt(r2)
+    accel = -(mu / (r2 * r))[..., None] * rVec
+    if J2:
+        z2 = rVec[..., 2] * rVec[..., 2] / r2
+        k = 1.5 * J2 * mu * rEquator * rEquator / (r2 * r2 * r)
+        accel[..., 0] += k * rVec[..., 0] * (5.0 * z2 - 1.0)
+        accel[..., 1] += k * rVec[..., 1] * (5.0 * z2 - 1.0)
+        accel[..., 2] += k * rVec[..., 2] * (5.0 * z2 - 3.0)
+    return accel
+
+
+def rk4PropagateBatch(mu, rVec, vVec, times, stepSec, J2=0.0, rEquator=0.0):
+    """
+    Fixed-step RK4 propagation of many spacecraft under point-mass + J2 gravity.
+
+    All states advance together in one vectorized loop, which makes this a fast
+    screening path for large sets of candidate orbits. With point-mass gravity and
+    the same step it reproduces the Basilisk ``spacecraft`` RK4 integration (see
+    ``test1.run_batch``). Output times that are not on the step grid are reached
+    with one shortened step.
+
+    Args:
+        mu (float): gravitational parameter
+        rVec (ndarray): ``(N,3)`` initial positions (a single ``(3,)`` state is allowed)
+        vVec (ndarray): ``(N,3)`` initial velocities
+        times (ndarray): ascending output times (s) measured from the initial epoch
+        stepSec (float): integration step (s)
+        J2 (float): unnormalized J2 coefficient, 0 for point-mass gravity
+        rEquator (float): equatorial radius used with ``J2``
+
+    Returns:
+        tuple: ``(rHist, vHist)`` arrays of shape ``(len(times), N, 3)``
+    """
+    r = np.array(rVec, dtype=float).reshape(-1, 3)
+    v = np.array(vVec, dtype=float).reshape(-1, 3)
+    times = np.atleast_1d(np.asarray(times, dtype=float))
+    if np.any(np.diff(times) < 0.0) or times[0] < 0.0:
+        raise ValueError('rk4PropagateBatch() needs ascending, non-negative output times')
+
+    def accel(pos):
+        return gravityAccelBatch(mu, pos, J2, rEquator)
+
+    rHist = np.empty((len(times),) + r.shape)
+    vHist = np.empty((len(times),) + v.shape)
+    t = 0.0
+    nStep = 0
+    for k, tOut in enumerate(times):
+        while tOut - t > 1e-9 * stepSec:
+            # stay on the step grid (t = nStep * stepSec) unless an output time falls between steps
+            h = min((nStep + 1) * stepSec, tOut) - t
+            a1 = accel(r)
+            v2 = v + 0.5 * h * a1
+            a2 = accel(r + 0.5 * h * v)
+            v3 = v + 0.5 * h * a2
+            a3 = accel(r + 0.5 * h * v2)
+            v4 = v + h * a3
+            a4 = accel(r + h * v3)
+            r = r + h / 6.0 * (v + 2.0 * v2 + 2.0 * v3 + v4)
+            v = v + h / 6.0 * (a1 + 2.0 * a2 + 2.0 * a3 + a4)
+            t += h
+            if abs(t - (nStep + 1) * stepSec) <= 1e-9 * stepSec:
+                nStep += 1
+                t = nStep * stepSec
+        rHist[k] = r
+        vHist[k] = v
+    return rHist, vHist
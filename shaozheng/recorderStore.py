@@ -0,0 +1,219 @@
+#
+# recorderStore.py
+#
+# 分块落盘的列式消息记录器，替代 msg.recorder() 的全内存记录。
+#   - ChunkedRecorder 是一个 Python 模块，按采样间隔读取消息，写入固定行数的内存块，
+#     块满即追加到磁盘，内存占用与仿真时长无关
+#   - 磁盘布局：一个目录，每列一个原始二进制文件（行主序）+ meta.json（dtype、每行形状、已落盘行数）；
+#     meta.json 在数据写完之后才更新，进程中途崩溃时已落盘的块仍可读取
+#   - 可只记录部分列，浮点列可降为 float32；时间列始终为 int64 纳秒
+#   - 读取接口与 Basilisk 记录器一致：rec.times()、rec.r_BN_N 等，返回内存映射数组
+#     （通过记录器读取时先落盘剩余行；只用 open_store 读取时，运行结束后需先调用 flush()）
+#
+
+import json
+import os
+
+import numpy as np
+from Basilisk.architecture import sysModel
+
+META_FILE = "meta.json"
+TIME_COLUMN = "times"
+DEFAULT_CHUNK_ROWS = 4096
+STORE_VERSION = 1
+
+
+def payload_columns(payload):
+    """消息负载中可记录的数值字段名"""
+    names = []
+    for name in dir(payload):
+        if name.startswith("_") or name in ("this", "thisown"):
+            continue
+        value = getattr(payload, name)
+        if callable(value):
+            continue
+        try:
+            arr = np.asarray(value, dtype=float)
+        except (TypeError, ValueError):
+            continue
+        if arr.dtype.kind in "fiub":
+            names.append(name)
+    return names
+
+
+class ColumnStore:
+    """
+    目录形式的列式存储，可追加写入，读取时按列内存映射。
+
+    Args:
+        path (str): 存储目录
+        mode (str): ``'r'`` 只读打开已有存储，``'w'`` 新建（清空同名存储）
+    """
+    def __init__(self, path, mode="r"):
+        self.path = path
+        self.columns = {}  # 列名 -> {"dtype": str, "shape": list}
+        self.rows = 0
+        if mode == "w":
+            os.makedirs(path, exist_ok=True)
+            for name in os.listdir(path):
+                if name.endswith(".bin") or name == META_FILE:
+                    os.remove(os.path.join(path, name))
+            self._write_meta()
+        else:
+            with open(os.path.join(path, META_FILE), "r") as f:
+                meta = json.load(f)
+            if meta.get("version") != STORE_VERSION:
+                raise ValueError(f"{path}: 不支持的存储版本 {meta.get('version')}")
+            self.columns = meta["columns"]
+            self.rows = meta["rows"]
+
+    def _column_file(self, name):
+        return os.path.join(self.path, name + ".bin")
+
+    def _write_meta(self):
+        meta = {"version": STORE_VERSION, "rows": self.rows, "columns": self.columns}
+        tmp = os.path.join(self.path, META_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self.path, META_FILE))
+
+    def define(self, name, dtype, shape):
+        self.columns[name] = {"dtype": np.dtype(dtype).str, "shape": list(shape)}
+
+    def append(self, block):
+        """追加一个块：``block`` 为 {列名: (n, ...) 数组}，各列行数相同"""
+        n = len(next(iter(block.values())))
+        if n == 0:
+            return
+        for name, arr in block.items():
+            with open(self._column_file(name), "ab") as f:
+                f.write(np.ascontiguousarray(arr, dtype=self.columns[name]["dtype"]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        self.rows += n
+        self._write_meta()
+
+    def truncate(self, rows):
+        """丢弃第 ``rows`` 行之后的数据（如从检查点续跑时丢弃检查点之后写入的行）"""
+        rows = min(rows, self.rows)
+        for name, info in self.columns.items():
+            path = self._column_file(name)
+            if os.path.exists(path):
+                rowBytes = np.dtype(info["dtype"]).itemsize * int(np.prod(info["shape"]))
+                os.truncate(path, rows * rowBytes)
+        self.rows = rows
+        self._write_meta()
+
+    def column(self, name):
+        """按已落盘行数内存映射一列"""
+        if name not in self.columns:
+            raise KeyError(f"{self.path} 中没有列 '{name}'，可选 {list(self.columns)}")
+        info = self.columns[name]
+        shape = (self.rows,) + tuple(info["shape"])
+        if self.rows == 0:
+            return np.empty(shape, dtype=info["dtype"])
+        return np.memmap(self._column_file(name), dtype=info["dtype"], mode="r", shape=shape)
+
+    def times(self):
+        return self.column(TIME_COLUMN)
+
+    def __getattr__(self, name):
+        # 与 Basilisk 记录器相同的属性访问：store.r_BN_N
+        if name.startswith("_") or name in ("path", "columns", "rows"):
+            raise AttributeError(name)
+        try:
+            return self.column(name)
+        except KeyError as err:
+            raise AttributeError(str(err)) from None
+
+
+class ChunkedRecorder(sysModel.SysModel):
+    """
+    分块落盘的消息记录器。
+
+    Args:
+        msg: 任意输出消息（如 ``sc.scStateOutMsg``、``access.accessOutMsgs[0]``）
+        path (str): 存储目录
+        samplingTime (int): 采样间隔 (ns)，None 表示每个任务步都记录
+        columns (list): 要记录的负载字段，None 表示全部数值字段
+        float32 (bool): 浮点列是否降为 float32
+        chunkRows (int): 每块行数
+    """
+    def __init__(self, msg, path, samplingTime=None, columns=None, float32=False,
+                 chunkRows=DEFAULT_CHUNK_ROWS):
+        super().__init__()
+        self.ModelTag = "ChunkedRecorder:" + type(msg).__name__
+        self.msg = msg
+        self.samplingTime = samplingTime
+        self.chunkRows = chunkRows
+        self.store = ColumnStore(path, mode="w")
+
+        payload = msg.read()
+        self.columnNames = list(columns) if columns is not None else payload_columns(payload)
+        self.store.define(TIME_COLUMN, np.int64, ())
+        for name in self.columnNames:
+            arr = np.asarray(getattr(payload, name))
+            dtype = np.float32 if float32 and arr.dtype.kind == "f" else arr.dtype
+            self.store.define(name, dtype, arr.shape)
+        self._buffer = {TIME_COLUMN: np.empty(chunkRows, dtype=np.int64)}
+        for name in self.columnNames:
+            info = self.store.columns[name]
+            self._buffer[name] = np.empty((chunkRows,) + tuple(info["shape"]), dtype=info["dtype"])
+        self._count = 0
+        self._nextTime = 0
+
+    def Reset(self, CurrentSimNanos):
+        # 与 Basilisk 记录器一致：重新初始化时清空已有记录
+        self.store = self._reset_store()
+        self._count = 0
+        self._nextTime = CurrentSimNanos
+
+    def _reset_store(self):
+        columns = self.store.columns
+        store = ColumnStore(self.store.path, mode="w")
+        store.columns = columns
+        store._write_meta()
+        return store
+
+    def UpdateState(self, CurrentSimNanos):
+        if CurrentSimNanos < self._nextTime:
+            return
+        if self.samplingTime:
+            while self._nextTime <= CurrentSimNanos:
+                self._nextTime += self.samplingTime
+        payload = self.msg.read()
+        k = self._count
+        self._buffer[TIME_COLUMN][k] = CurrentSimNanos
+        for name in self.columnNames:
+            self._buffer[name][k] = getattr(payload, name)
+        self._count = k + 1
+        if self._count == self.chunkRows:
+            self.flush()
+
+    def flush(self):
+        """把内存块中尚未落盘的行写入磁盘"""
+        if self._count:
+            self.store.append({name: buf[:self._count] for name, buf in self._buffer.items()})
+            self._count = 0
+
+    def times(self):
+        self.flush()
+        return self.store.times()
+
+    def column(self, name):
+        self.flush()
+        return self.store.column(name)
+
+    def __getattr__(self, name):
+        # SWIG 基类的属性先于此处查找；未知名称按记录列处理
+        if name.startswith("_") or name in ("store", "columnNames", "msg"):
+            raise AttributeError(name)
+        store = self.__dict__.get("store")
+        if store is None or name not in store.columns:
+            raise AttributeError(name)
+        return self.column(name)
+
+
+def open_store(path):
+    """只读打开一个已写好的存储（可在仿真进程之外分析）"""
+    return ColumnStore(path, mode="r")
@@ -0,0 +1,211 @@
+#
+# rendezvousMonteCarlo.py
+#
+# test4 双星交会场景的 Monte Carlo 散布分析。
+#   - 高度差、初始相位、仿真时长按可配置分布抽样，每个样本由自己的随机种子在 worker 内生成
+#   - 样本在多进程中并行仿真，每次运行只归约为最小距离与相遇时刻
+#   - 结果以流式统计（Welford 均值/方差 + P² 分位数）聚合，逐行写 CSV，不在内存中保存全部样本
+#
+
+import csv
+import math
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+# 分布写法：('normal', mean, sigma) / ('uniform', low, high) / ('fixed', value)
+DEFAULT_DISPERSIONS = {
+    'altitudeDiff': ('normal', 14.1e3, 2.0e3),     # 追踪星相对目标星的轨道高度差 (m)
+    'phaseDeg': ('uniform', 165.0, 175.0),         # 追踪星沿轨道领先目标星的相位 (deg)
+    'durationHours': ('uniform', 250.0, 300.0),    # 仿真时长 (h)
+}
+DEFAULT_PERCENTILES = (5.0, 50.0, 95.0)
+RESULT_FIELDS = ('sample', 'altitudeDiff', 'phaseDeg', 'durationHours', 'minDist', 'tca')
+
+
+def draw(spec, rng):
+    kind = spec[0]
+    if kind == 'normal':
+        return rng.normal(spec[1], spec[2])
+    if kind == 'uniform':
+        return rng.uniform(spec[1], spec[2])
+    if kind == 'fixed':
+        return spec[1]
+    raise ValueError(f"未知分布类型: {kind}")
+
+
+def initial_states(altitudeDiff, phaseDeg, mu, rTarget):
+    """共面圆轨道：目标星在 x 轴，追踪星高 ``altitudeDiff``、领先 ``phaseDeg``"""
+    rChaser = rTarget + altitudeDiff
+    phase = np.radians(phaseDeg)
+    vT = np.sqrt(mu / rTarget)
+    vC = np.sqrt(mu / rChaser)
+    targetState = (np.array([rTarget, 0.0, 0.0]), np.array([0.0, vT, 0.0]))
+    chaserState = (rChaser * np.array([np.cos(phase), np.sin(phase), 0.0]),
+                   vC * np.array([-np.sin(phase), np.cos(phase), 0.0]))
+    return chaserState, targetState
+
+
+def run_sample(index, seed, dispersions, stepSec, sampleSec):
+    """在 worker 中抽样并仿真一个样本，返回一行结果"""
+    import test4
+    from Basilisk.utilities import macros
+    from closestApproach import closest_approach
+
+    rng = np.random.default_rng(seed)
+    params = {name: draw(spec, rng) for name, spec in dispersions.items()}
+    chaserState, targetState = initial_states(params['altitudeDiff'], params['phaseDeg'],
+                                              test4.MU_EARTH, np.linalg.norm(test4.TARGET_R0))
+
+    scSim, chaserRec, targetRec = test4.create_rendezvous_sim(chaserState, targetState, stepSec, sampleSec)
+    scSim.ConfigureStopTime(macros.hour2nano(params['durationHours']))
+    scSim.ExecuteSimulation()
+
+    tca, minDist = closest_approach(chaserRec.times() * macros.NANO2SEC,
+                                    chaserRec.r_BN_N, chaserRec.v_BN_N,
+                                    targetRec.r_BN_N, targetRec.v_BN_N)
+    return dict(sample=index, minDist=float(minDist), tca=float(tca), **params)
+
+
+class P2Quantile:
+    """Jain & Chlamtac 的 P² 流式分位数估计，只保存 5 个标记点"""
+    def __init__(self, p):
+        self.p = p
+        self.q = []
+        self.n = [0, 1, 2, 3, 4]
+        self.np = [0.0, 2.0 * p, 4.0 * p, 2.0 + 2.0 * p, 4.0]
+        self.dn = [0.0, p / 2.0, p, (1.0 + p) / 2.0, 1.0]
+
+    def add(self, x):
+        q = self.q
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        for i in range(k + 1, 5):
+            self.n[i] += 1
+        for i in range(5):
+            self.np[i] += self.dn[i]
+        for i in range(1, 4):
+            d = self.np[i] - self.n[i]
+            if (d >= 1.0 and self.n[i + 1] - self.n[i] > 1) or (d <= -1.0 and self.n[i - 1] - self.n[i] < -1):
+                d = math.copysign(1.0, d)
+                qi = self._parabolic(i, d)
+                if not q[i - 1] < qi < q[i + 1]:
+                    qi = q[i] + d * (q[i + int(d)] - q[i]) / (self.n[i + int(d)] - self.n[i])
+                q[i] = qi
+                self.n[i] += int(d)
+
+    def _parabolic(self, i, d):
+        q, n = self.q, self.n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        if not self.q:
+            return math.nan
+        if len(self.q) < 5:
+            return float(np.percentile(self.q, 100.0 * self.p))
+        return self.q[2]
+
+
+class StreamingStats:
+    """单个量的流式统计：计数、均值、标准差、最值与分位数"""
+    def __init__(self, percentiles=DEFAULT_PERCENTILES):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.quantiles = {p: P2Quantile(p / 100.0) for p in percentiles}
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        for q in self.quantiles.values():
+            q.add(x)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def summary(self):
+        out = {'count': self.count, 'mean': self.mean, 'std': self.std, 'min': self.min, 'max': self.max}
+        for p, q in self.quantiles.items():
+            out[f'p{p:g}'] = q.value()
+        return out
+
+
+def run_monte_carlo(nSamples=1000, dispersions=None, seed=0, workers=None,
+                    stepSec=60.0, sampleSec=300.0, percentiles=DEFAULT_PERCENTILES,
+                    resultFile="rendezvous_mc.csv"):
+    """
+    并行运行 ``nSamples`` 个散布样本并流式聚合。
+
+    Args:
+        dispersions (dict): 覆盖 ``DEFAULT_DISPERSIONS`` 中的分布
+        seed (int): 主随机种子，各样本种子由 ``SeedSequence.spawn`` 派生，结果可复现
+        workers (int): 进程数，None 表示全部 CPU 核
+        resultFile (str): 逐样本结果 CSV，None 表示不写
+
+    Returns:
+        dict: ``{'minDist': {...}, 'tca': {...}}`` 统计摘要
+    """
+    specs = dict(DEFAULT_DISPERSIONS)
+    specs.update(dispersions or {})
+    seeds = np.random.SeedSequence(seed).spawn(nSamples)
+
+    stats = {'minDist': StreamingStats(percentiles), 'tca': StreamingStats(percentiles)}
+    writer = None
+    f = open(resultFile, "w", newline="") if resultFile else None
+    try:
+        if f is not None:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+        # 同时在途的样本数有上限，已完成的结果立即归约后丢弃
+        maxInFlight = 4 * (workers or os.cpu_count() or 1)
+        pending = set()
+        nextSample = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while nextSample < nSamples or pending:
+                while nextSample < nSamples and len(pending) < maxInFlight:
+                    pending.add(pool.submit(run_sample, nextSample, seeds[nextSample], specs,
+                                            stepSec, sampleSec))
+                    nextSample += 1
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    row = future.result()
+                    stats['minDist'].add(row['minDist'])
+                    stats['tca'].add(row['tca'])
+                    if writer is not None:
+                        writer.writerow(row)
+    finally:
+        if f is not None:
+            f.close()
+
+    summary = {name: s.summary() for name, s in stats.items()}
+    minDist, tca = summary['minDist'], summary['tca']
+    print(f"\n--- Monte Carlo 报告 ({nSamples} 个样本) ---")
+    print(f"最小相对距离 [km]: 均值 {minDist['mean'] / 1000:.2f}, 标准差 {minDist['std'] / 1000:.2f}, "
+          + ", ".join(f"P{p:g} {minDist[f'p{p:g}'] / 1000:.2f}" for p in percentiles))
+    print(f"最近窗口时间 [h]: 均值 {tca['mean'] / 3600:.2f}, 标准差 {tca['std'] / 3600:.2f}, "
+          + ", ".join(f"P{p:g} {tca[f'p{p:g}'] / 3600:.2f}" for p in percentiles))
+    return summary
+
+
+if __name__ == "__main__":
+    run_monte_carlo()
@@ -0,0 +1,264 @@
+#
+# resultCache.py
+#
+# 按场景内容哈希缓存仿真结果，只改绘图、报告格式等后处理时不再重跑积分。
+#   - 键：场景输入（初始状态、步长、时长、采样间隔等）的规范 JSON + 引力场/SPICE 内核等文件的内容摘要
+#     + 代码版本（Basilisk 版本与参与仿真的模块/函数源码），任一项变化即得到新键
+#   - 每个条目一个目录：各记录器一个 recorderStore.ColumnStore 子目录，entry.json 记录名称与附加数值；
+#     先写入临时目录再整体改名，写到一半的条目不会被读到
+#   - 命中时各列以内存映射打开，毫秒级；entry.json 的修改时间即最近使用时间，
+#     写入新条目后按最近最少使用淘汰，直到总大小不超过上限
+#
+#   cache = ResultCache()
+#   key = scenario_key({"r0": rN, "stepSec": 10.0, ...}, files=[gravFile], code=[simulate])
+#   result = cache.get(key)
+#   if result is None:
+#       ... 运行仿真 ...
+#       result = cache.put(key, {"sat": dataRec}, values={"P": P})
+#   posData = result.recorders["sat"].r_BN_N
+#
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from recorderStore import TIME_COLUMN, ColumnStore, open_store
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_ResultCache")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+ENTRY_FILE = "entry.json"
+CACHE_VERSION = 1
+
+_fileDigests = {}  # (绝对路径, 大小, 修改时间) -> 内容摘要
+
+
+def _canonical(value):
+    """把输入转换为可稳定序列化的 JSON 值（NumPy 数组、元组转列表，浮点数保留全部精度）"""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return {"shape": list(value.shape), "data": [_canonical(v) for v in value.ravel().tolist()]}
+    if isinstance(value, np.generic):
+        return _canonical(value.item())
+    if isinstance(value, float):
+        return repr(value)
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    raise TypeError(f"场景输入不支持类型 {type(value).__name__}")
+
+
+def file_digest(path):
+    """文件内容的 SHA-256；大小与修改时间不变时复用上次的结果"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    stamp = (path, stat.st_size, stat.st_mtime_ns)
+    if stamp not in _fileDigests:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _fileDigests[stamp] = digest.hexdigest()
+    return _fileDigests[stamp]
+
+
+def code_version(objects=()):
+    """Basilisk 版本与 ``objects``（模块、函数或类）源码的摘要"""
+    from Basilisk import __version__ as bskVersion
+    digest = hashlib.sha256(bskVersion.encode())
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode())
+    return digest.hexdigest()
+
+
+def scenario_key(inputs, files=(), code=()):
+    """
+    场景结果的内容哈希。
+
+    Args:
+        inputs (dict): 决定仿真结果的全部参数，值可为数值、字符串、列表或 NumPy 数组
+        files (iterable): 仿真读取的数据文件（引力场系数、SPICE 内核等），按内容参与哈希
+        code (iterable): 参与仿真的模块或函数，源码参与哈希
+
+    Returns:
+        str: 十六进制 SHA-256
+    """
+    content = {
+        "version": CACHE_VERSION,
+        "inputs": _canonical(inputs),
+        "files": [file_digest(path) for path in files],
+        "code": code_version(code),
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+def recorder_columns(recorder):
+    """记录器中逐采样记录的列名"""
+    if isinstance(recorder, dict):
+        return [name for name in recorder if name != TIME_COLUMN]
+    for attr in ("columnNames", "columns"):
+        names = getattr(recorder, attr, None)
+        if names is not None:
+            return [name for name in names if name != TIME_COLUMN]
+    # Basilisk 记录器：负载字段是与 times() 等长的数组属性
+    n = len(recorder.times())
+    names = []
+    for name in dir(recorder):
+        if name.startswith("_") or name in ("this", "thisown", "times", "timesWritten"):
+            continue
+        try:
+            value = getattr(recorder, name)
+        except Exception:
+            continue
+        if callable(value):
+            continue
+        arr = np.asarray(value)
+        if arr.dtype.kind in "fiub" and arr.ndim >= 1 and len(arr) == n:
+            names.append(name)
+    return names
+
+
+def _recorder_times(recorder):
+    if isinstance(recorder, dict):
+        return recorder[TIME_COLUMN]
+    return recorder.times()
+
+
+def _column(recorder, name):
+    if isinstance(recorder, dict):
+        return recorder[name]
+    return getattr(recorder, name)
+
+
+def _tree_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+class CachedResult:
+    """
+    一个缓存条目。
+
+    Attributes:
+        key (str): 场景哈希
+        recorders (dict): 记录器名称 → ``ColumnStore``，用法同 Basilisk 记录器（``times()``、``r_BN_N``）
+        values (dict): 写入时附带的数值结果
+    """
+    def __init__(self, key, path):
+        self.key = key
+        self.path = path
+        with open(os.path.join(path, ENTRY_FILE), "r") as f:
+            entry = json.load(f)
+        self.values = entry["values"]
+        self.recorders = {name: open_store(os.path.join(path, sub)) for name, sub in entry["recorders"].items()}
+
+
+class ResultCache:
+    """
+    磁盘上的仿真结果缓存。
+
+    Args:
+        path (str): 缓存目录
+        maxBytes (int): 总大小上限，超出时淘汰最近最少使用的条目
+    """
+    def __init__(self, path=DEFAULT_CACHE_DIR, maxBytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.maxBytes = maxBytes
+        os.makedirs(path, exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key)
+
+    def get(self, key):
+        """
+        读取条目并标记为最近使用。
+
+        Returns:
+            CachedResult: 未命中时为 None
+        """
+        path = self._entry_path(key)
+        entryFile = os.path.join(path, ENTRY_FILE)
+        if not os.path.exists(entryFile):
+            return None
+        os.utime(entryFile)
+        return CachedResult(key, path)
+
+    def put(self, key, recorders, columns=None, values=None):
+        """
+        写入一个条目并按大小上限淘汰旧条目。
+
+        Args:
+            recorders (dict): 名称 → 记录器（Basilisk 记录器、ChunkedRecorder、ColumnStore，
+                或含 ``times`` 列的 {列名: 数组} 字典）
+            columns (dict): 名称 → 要保存的列，缺省保存全部逐采样字段
+            values (dict): 随结果保存的 JSON 可序列化数值（如停止条件触发时刻）
+
+        Returns:
+            CachedResult
+        """
+        columns = columns or {}
+        tmp = self._entry_path(f"{key}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        subdirs = {}
+        for k, (name, recorder) in enumerate(recorders.items()):
+            sub = f"rec{k}"
+            store = ColumnStore(os.path.join(tmp, sub), mode="w")
+            block = {TIME_COLUMN: np.asarray(_recorder_times(recorder), dtype=np.int64)}
+            for column in columns.get(name) or recorder_columns(recorder):
+                block[column] = np.asarray(_column(recorder, column))
+            for column, arr in block.items():
+                store.define(column, arr.dtype, arr.shape[1:])
+            store.append(block)
+            subdirs[name] = sub
+        with open(os.path.join(tmp, ENTRY_FILE), "w") as f:
+            json.dump({"version": CACHE_VERSION, "created": time.time(),
+                       "recorders": subdirs, "values": values or {}}, f)
+
+        path = self._entry_path(key)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # 其他进程已写入同一场景
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict(keep=key)
+        return CachedResult(key, path)
+
+    def entries(self):
+        """``[(最近使用时间, 大小, 键), ...]``，按最近使用时间升序"""
+        entries = []
+        for key in os.listdir(self.path):
+            entryFile = os.path.join(self._entry_path(key), ENTRY_FILE)
+            if ".tmp-" in key or not os.path.exists(entryFile):
+                continue
+            entries.append((os.path.getmtime(entryFile), _tree_size(self._entry_path(key)), key))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        """淘汰最近最少使用的条目直到总大小不超过上限，``keep`` 指定的条目保留"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.maxBytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for _, _, key in self.entries():
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
+
@@ -0,0 +1,421 @@
+#
+# scenarioBuilder.py
+#
+# 声明式场景描述 + 仿真构建器。
+# 各脚本重复的 SimBaseClass → CreateNewProcess → CreateNewTask → gravBodyFactory → elem2rv
+# → enableUnityVisualization 样板代码集中到这里，场景由 JSON/YAML/dict 描述：
+#
+#   {
+#     "name": "LEO",
+#     "stepSec": 10.0, "durationSec": 6000.0,
+#     "bodies": [{"name": "earth", "central": true}],
+#     "spice": {"time": "2026 January 04 15:00:00.0", "zeroBase": "Earth"},      # 可选
+#     "spacecraft": [
+#       {"name": "LEO-Satellite", "mass": 750.0,
+#        "elements": {"a": 7178e3, "e": 0.001, "i": 45.0, "Omega": 90.0, "omega": 0.0, "f": 0.0}},
+#       {"name": "Other", "state": {"r": [7e6, 0, 0], "v": [0, 7.5e3, 0]}}
+#     ],
+#     "recorders": [{"spacecraft": "LEO-Satellite", "sampleSec": 60.0},
+#                   {"spacecraft": "Other", "store": "other_states", "columns": ["r_BN_N"], "float32": true}],
+#     "access": [{"name": "link", "primary": "LEO-Satellite", "targets": ["Other"],
+#                 "aHat_B": [1, 0, 0], "thetaDeg": 20.0, "maximumRange": 5e8, "occultingBody": "earth"}],
+#     "linkMatrices": [{"name": "relay", "observers": ["LEO-Satellite", "Other"],          # N×M 链路，见 accessMatrix
+#                       "targets": ["LEO-Satellite", "Other"], "thetaDeg": 60.0, "occultingBody": "earth"}],
+#     "viz": {"saveFile": "LEO_Simulation"}
+#   }
+#
+# 单位：长度 m，速度 m/s，根数中的角度为度。描述在 ScenarioBuilder 构造时校验一次，
+# 引力体（含球谐文件）与 SPICE 内核也只在构造时加载；build() 每次新建 SimBaseClass，
+# 可以覆盖初始状态、步长、采样间隔后重复构建，不再重新创建引力体或读取数据文件。
+#
+
+import json
+import os
+
+import numpy as np
+from Basilisk import __path__
+from Basilisk.simulation import spacecraft, spacecraftLocation
+from Basilisk.utilities import SimulationBaseClass, macros, orbitalMotion, simIncludeGravBody, vizSupport
+
+import spiceKernels
+from accessMatrix import AccessMatrix
+from accessSupport import AccessGeometry
+from modelProfiler import enable_profiling
+from recorderStore import DEFAULT_CHUNK_ROWS, ChunkedRecorder
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+bskPath = __path__[0]
+
+SIM_PROCESS_NAME = "simProcess"
+SIM_TASK_NAME = "simTask"
+
+ELEMENT_KEYS = ("a", "e", "i", "Omega", "omega", "f")
+_TOP_KEYS = {"name", "stepSec", "durationSec", "bodies", "spice", "spacecraft", "recorders", "access",
+             "linkMatrices", "viz"}
+_BODY_KEYS = {"name", "central", "sphericalHarmonics"}
+_REC_KEYS = {"spacecraft", "sampleSec", "store", "columns", "float32", "chunkRows"}
+_SC_KEYS = {"name", "mass", "inertia", "elements", "state", "centralBody", "sigma_BN", "omega_BN_B"}
+_ACCESS_KEYS = {"name", "primary", "targets", "aHat_B", "thetaDeg", "maximumRange",
+                "occultingBody", "polarFlattening", "r_LB_B", "sampleSec"}
+_MATRIX_KEYS = _ACCESS_KEYS - {"primary"} | {"observers"}
+
+
+def load_spec(path):
+    """从 .json / .yaml / .yml 文件读取场景描述（YAML 需要安装 PyYAML）"""
+    with open(path, "r", encoding="utf-8") as f:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            if yaml is None:
+                raise ImportError("读取 YAML 场景描述需要 PyYAML")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def _is_vector(value, size=3):
+    try:
+        return np.asarray(value, dtype=float).shape == (size,)
+    except (TypeError, ValueError):
+        return False
+
+
+def validate_spec(spec):
+    """
+    检查场景描述，所有问题一次性收集后抛出 ``ValueError``。
+
+    Returns:
+        dict: 原描述（便于链式调用）
+    """
+    errors = []
+
+    def unknown(keys, allowed, where):
+        for key in sorted(set(keys) - allowed):
+            errors.append(f"{where}: 未知字段 '{key}'")
+
+    if not isinstance(spec, dict):
+        raise ValueError("场景描述必须是 dict")
+    unknown(spec, _TOP_KEYS, "场景")
+
+    for key in ("stepSec", "durationSec"):
+        value = spec.get(key)
+        if not isinstance(value, (int, float)) or value <= 0:
+            errors.append(f"'{key}' 必须是正数")
+
+    bodyNames = []
+    for k, body in enumerate(spec.get("bodies", [])):
+        unknown(body, _BODY_KEYS, f"bodies[{k}]")
+        name = body.get("name")
+        if name not in simIncludeGravBody.BODY_DATA:
+            errors.append(f"bodies[{k}]: 未知引力体 '{name}'，可选 {list(simIncludeGravBody.BODY_DATA)}")
+        harmonics = body.get("sphericalHarmonics")
+        if harmonics is not None and not {"file", "degree"} <= set(harmonics):
+            errors.append(f"bodies[{k}]: sphericalHarmonics 需要 'file' 与 'degree'")
+        bodyNames.append(name)
+    centrals = [b.get("name") for b in spec.get("bodies", []) if b.get("central")]
+    if len(centrals) != 1:
+        errors.append(f"必须恰好有一个中心引力体，当前为 {centrals}")
+
+    scNames = []
+    for k, sc in enumerate(spec.get("spacecraft", [])):
+        where = f"spacecraft[{k}]"
+        unknown(sc, _SC_KEYS, where)
+        if not sc.get("name"):
+            errors.append(f"{where}: 缺少 'name'")
+        elif sc["name"] in scNames:
+            errors.append(f"{where}: 重名航天器 '{sc['name']}'")
+        scNames.append(sc.get("name"))
+        if ("elements" in sc) == ("state" in sc):
+            errors.append(f"{where}: 'elements' 与 'state' 必须且只能给出一个")
+        if "elements" in sc:
+            missing = [key for key in ELEMENT_KEYS if key not in sc["elements"]]
+            if missing:
+                errors.append(f"{where}: 轨道根数缺少 {missing}")
+            center = sc.get("centralBody", centrals[0] if centrals else None)
+            if center not in bodyNames:
+                errors.append(f"{where}: centralBody '{center}' 不在 bodies 中")
+            elif centrals and center != centrals[0] and "spice" not in spec:
+                errors.append(f"{where}: 相对非中心引力体 '{center}' 的根数需要 spice 星历")
+        if "state" in sc and not (_is_vector(sc["state"].get("r")) and _is_vector(sc["state"].get("v"))):
+            errors.append(f"{where}: state 需要三维 'r' 与 'v'")
+        if "inertia" in sc and not (_is_vector(sc["inertia"]) or _is_vector(sc["inertia"], 9)):
+            errors.append(f"{where}: inertia 应为 3 个主惯量或 9 个分量")
+    if not scNames:
+        errors.append("至少需要一个航天器")
+
+    for k, rec in enumerate(spec.get("recorders", [])):
+        unknown(rec, _REC_KEYS, f"recorders[{k}]")
+        if ("columns" in rec or "float32" in rec or "chunkRows" in rec) and "store" not in rec:
+            errors.append(f"recorders[{k}]: 'columns'/'float32'/'chunkRows' 只用于落盘记录器，需要 'store'")
+        if rec.get("spacecraft") not in scNames:
+            errors.append(f"recorders[{k}]: 航天器 '{rec.get('spacecraft')}' 不存在")
+
+    links = [(f"access[{k}]", link, _ACCESS_KEYS, [link.get("primary")])
+             for k, link in enumerate(spec.get("access", []))]
+    links += [(f"linkMatrices[{k}]", link, _MATRIX_KEYS, list(link.get("observers", [])))
+              for k, link in enumerate(spec.get("linkMatrices", []))]
+    for where, link, allowed, observers in links:
+        unknown(link, allowed, where)
+        if not link.get("name"):
+            errors.append(f"{where}: 缺少 'name'")
+        for name in observers + list(link.get("targets", [])):
+            if name not in scNames:
+                errors.append(f"{where}: 航天器 '{name}' 不存在")
+        if not observers:
+            errors.append(f"{where}: 'observers' 不能为空")
+        if not link.get("targets"):
+            errors.append(f"{where}: 'targets' 不能为空")
+        if link.get("occultingBody") is not None and link["occultingBody"] not in bodyNames:
+            errors.append(f"{where}: 遮挡体 '{link['occultingBody']}' 不在 bodies 中")
+
+    if errors:
+        raise ValueError("场景描述无效:\n  " + "\n  ".join(errors))
+    return spec
+
+
+class Scenario:
+    """
+    :meth:`ScenarioBuilder.build` 的结果。
+
+    Attributes:
+        scSim: ``SimBaseClass``
+        spacecraft (dict): 名称 → ``Spacecraft``
+        recorders (dict): 航天器名称 → ``scStateOutMsg`` 记录器（给出 ``store`` 时为 ChunkedRecorder）
+        access (dict): 链路名称 → ``(SpacecraftLocation, [每个目标的 access 记录器])``
+        linkMatrices (dict): 链路矩阵名称 → ``AccessMatrix``（``(T, N, M)`` 比特记录）
+        viz: ``enableUnityVisualization`` 的返回值，未开启时为 None
+        profiler: 逐模型计时器（``build(profile=True)``），未开启时为 None
+    """
+    def __init__(self, scSim, durationSec):
+        self.scSim = scSim
+        self.durationSec = durationSec
+        self.spacecraft = {}
+        self.recorders = {}
+        self.access = {}
+        self.linkMatrices = {}
+        self.epochMsg = None
+        self.viz = None
+        self.profiler = None
+
+    def run(self, durationSec=None):
+        """运行到 ``durationSec``（缺省为描述中的时长），可多次调用续跑"""
+        self.scSim.ConfigureStopTime(macros.sec2nano(self.durationSec if durationSec is None else durationSec))
+        self.scSim.ExecuteSimulation()
+        for recorder in self.recorders.values():
+            if isinstance(recorder, ChunkedRecorder):
+                recorder.flush()
+        return self
+
+
+class ScenarioBuilder:
+    """
+    校验场景描述并加载引力体 / SPICE，之后可反复 :meth:`build`。
+
+    Args:
+        spec (dict | str): 场景描述或 JSON/YAML 文件路径
+    """
+    def __init__(self, spec):
+        if isinstance(spec, str):
+            spec = load_spec(spec)
+        self.spec = validate_spec(spec)
+
+        self.gravFactory = simIncludeGravBody.gravBodyFactory()
+        self.bodies = {}
+        for body in spec["bodies"]:
+            gravBody = self.gravFactory.createBody(body["name"])
+            gravBody.isCentralBody = bool(body.get("central", False))
+            harmonics = body.get("sphericalHarmonics")
+            if harmonics is not None:
+                gravBody.useSphericalHarmonicsGravityModel(
+                    harmonics["file"].replace("%BSK_PATH%", bskPath), harmonics["degree"])
+            self.bodies[body["name"]] = gravBody
+        self.centralBody = next(b["name"] for b in spec["bodies"] if b.get("central"))
+
+        # 内核交由进程级管理器加载，重复构建不再 furnsh
+        self.spiceObject = None
+        self._kernelPaths = None
+        spice = spec.get("spice")
+        if spice is not None:
+            self.spiceObject = self.gravFactory.createSpiceInterface(
+                time=spice["time"], epochInMsg=spice.get("epochInMsg", True), spiceKernelFileNames=[])
+            self.spiceObject.zeroBase = spice.get("zeroBase", self.centralBody.capitalize())
+            self._kernelPaths = spiceKernels.acquire(self.spiceObject.SPICEDataPath)
+            self.spiceObject.SPICELoaded = True
+
+        self._bodyStates = {}
+
+    def close(self):
+        """归还 SPICE 内核"""
+        if self._kernelPaths is not None:
+            spiceKernels.release(self._kernelPaths)
+            self._kernelPaths = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def body_state(self, name):
+        """引力体在起始历元相对中心引力体的 (r, v)，来自 SPICE，结果缓存"""
+        if name == self.centralBody:
+            return np.zeros(3), np.zeros(3)
+        if name not in self._bodyStates:
+            from Basilisk.utilities.pyswice_spk_utilities import spkRead
+            state = 1000.0 * spkRead(name, self.spec["spice"]["time"], 'J2000', self.centralBody)
+            self._bodyStates[name] = (state[0:3], state[3:6])
+        return self._bodyStates[name]
+
+    def initial_state(self, scSpec):
+        """由描述中的 ``elements`` 或 ``state`` 计算惯性系初始 (r, v)"""
+        if "state" in scSpec:
+            return (np.asarray(scSpec["state"]["r"], dtype=float),
+                    np.asarray(scSpec["state"]["v"], dtype=float))
+        center = scSpec.get("centralBody", self.centralBody)
+        elements = scSpec["elements"]
+        oe = orbitalMotion.ClassicElements()
+        oe.a = elements["a"]
+        oe.e = elements["e"]
+        oe.i = elements["i"] * macros.D2R
+        oe.Omega = elements["Omega"] * macros.D2R
+        oe.omega = elements["omega"] * macros.D2R
+        oe.f = elements["f"] * macros.D2R
+        r, v = orbitalMotion.elem2rv(self.bodies[center].mu, oe)
+        rBody, vBody = self.body_state(center)
+        return np.asarray(r) + rBody, np.asarray(v) + vBody
+
+    def build(self, initialStates=None, stepSec=None, sampleSec=None, durationSec=None,
+              saveFile="", initialize=True, profile=False, epoch=None):
+        """
+        构建一个新的仿真。
+
+        Args:
+            initialStates (dict): 航天器名称 → ``(r, v)``，覆盖描述中的初始状态
+            stepSec (float): 覆盖积分步长
+            sampleSec (float): 覆盖所有记录器的采样间隔
+            durationSec (float): 覆盖 :meth:`Scenario.run` 的缺省时长
+            saveFile (str): 覆盖 Vizard 文件名；None 表示本次不开启可视化
+            initialize (bool): 是否调用 ``InitializeSimulation``
+            profile (bool): 是否开启逐模型计时（见 modelProfiler）
+            epoch (str): 覆盖 SPICE 起始历元（UTC），从检查点续跑时仿真时间从 0 开始、历元后移
+
+        Returns:
+            Scenario
+        """
+        spec = self.spec
+        initialStates = initialStates or {}
+        scSim = SimulationBaseClass.SimBaseClass()
+        scenario = Scenario(scSim, spec["durationSec"] if durationSec is None else durationSec)
+        if profile:
+            scenario.profiler = enable_profiling(scSim)
+
+        # 创建进程（遗漏这一步会导致积分卡住）
+        dynProcess = scSim.CreateNewProcess(SIM_PROCESS_NAME)
+        dynProcess.addTask(scSim.CreateNewTask(SIM_TASK_NAME, macros.sec2nano(stepSec or spec["stepSec"])))
+        if self.spiceObject is not None:
+            scSim.AddModelToTask(SIM_TASK_NAME, self.spiceObject, 1)
+            # SPICE 模块在各次构建间共用，每次都重新设定起始历元
+            self.spiceObject.UTCCalInit = epoch or spec["spice"]["time"]
+            if spec["spice"].get("epochInMsg", True):
+                scenario.epochMsg = spiceKernels.epoch_msg(epoch) if epoch else self.gravFactory.epochMsg
+                self.spiceObject.epochInMsg.subscribeTo(scenario.epochMsg)
+
+        for scSpec in spec["spacecraft"]:
+            sc = spacecraft.Spacecraft()
+            sc.ModelTag = scSpec["name"]
+            if "mass" in scSpec:
+                sc.hub.mHub = scSpec["mass"]
+            if "inertia" in scSpec:
+                inertia = np.asarray(scSpec["inertia"], dtype=float)
+                sc.hub.IHubPntBc_B = np.diag(inertia) if inertia.size == 3 else inertia.reshape(3, 3)
+            scSim.AddModelToTask(SIM_TASK_NAME, sc)
+            self.gravFactory.addBodiesTo(sc)
+
+            r, v = initialStates.get(scSpec["name"]) or self.initial_state(scSpec)
+            sc.hub.r_CN_NInit = np.asarray(r, dtype=float)
+            sc.hub.v_CN_NInit = np.asarray(v, dtype=float)
+            sc.hub.sigma_BNInit = np.reshape(scSpec.get("sigma_BN", [0.0, 0.0, 0.0]), (3, 1))
+            sc.hub.omega_BN_BInit = np.reshape(scSpec.get("omega_BN_B", [0.0, 0.0, 0.0]), (3, 1))
+            scenario.spacecraft[scSpec["name"]] = sc
+
+        for rec in spec.get("recorders", []):
+            period = sampleSec or rec.get("sampleSec")
+            msg = scenario.spacecraft[rec["spacecraft"]].scStateOutMsg
+            if "store" in rec:
+                # 分块落盘，长时间多星仿真内存不随时长增长
+                recorder = ChunkedRecorder(msg, rec["store"], macros.sec2nano(period) if period else None,
+                                           columns=rec.get("columns"), float32=rec.get("float32", False),
+                                           chunkRows=rec.get("chunkRows", DEFAULT_CHUNK_ROWS))
+            else:
+                recorder = msg.recorder(macros.sec2nano(period)) if period else msg.recorder()
+            scSim.AddModelToTask(SIM_TASK_NAME, recorder)
+            scenario.recorders[rec["spacecraft"]] = recorder
+
+        for link in spec.get("access", []):
+            access = spacecraftLocation.SpacecraftLocation()
+            access.ModelTag = link["name"]
+            access.primaryScStateInMsg.subscribeTo(scenario.spacecraft[link["primary"]].scStateOutMsg)
+            for target in link["targets"]:
+                access.addSpacecraftToModel(scenario.spacecraft[target].scStateOutMsg)
+            access.aHat_B = link.get("aHat_B", [1.0, 0.0, 0.0])
+            access.theta = np.radians(link.get("thetaDeg", 0.0))
+            access.maximumRange = link.get("maximumRange", -1.0)
+            if "r_LB_B" in link:
+                access.r_LB_B = link["r_LB_B"]
+            if link.get("occultingBody") is not None:
+                body = self.bodies[link["occultingBody"]]
+                access.rEquator = body.radEquator
+                access.rPolar = body.radEquator * (1.0 - link.get("polarFlattening", 0.0))
+                # 非中心引力体作遮挡体时需要它的星历位置
+                if self.spiceObject is not None:
+                    index = list(self.bodies).index(link["occultingBody"])
+                    access.planetInMsg.subscribeTo(self.spiceObject.planetStateOutMsgs[index])
+            scSim.AddModelToTask(SIM_TASK_NAME, access)
+
+            period = sampleSec or link.get("sampleSec")
+            recorders = []
+            for msg in access.accessOutMsgs:
+                recorder = msg.recorder(macros.sec2nano(period)) if period else msg.recorder()
+                scSim.AddModelToTask(SIM_TASK_NAME, recorder)
+                recorders.append(recorder)
+            scenario.access[link["name"]] = (access, recorders)
+
+        for link in spec.get("linkMatrices", []):
+            geometry = AccessGeometry(aHat_B=link.get("aHat_B", [1.0, 0.0, 0.0]),
+                                      theta=np.radians(link.get("thetaDeg", 0.0)),
+                                      maximumRange=link.get("maximumRange", -1.0),
+                                      r_LB_B=link.get("r_LB_B", [0.0, 0.0, 0.0]))
+            planetMsg = None
+            if link.get("occultingBody") is not None:
+                body = self.bodies[link["occultingBody"]]
+                geometry.rEquator = body.radEquator
+                geometry.rPolar = body.radEquator * (1.0 - link.get("polarFlattening", 0.0))
+                if self.spiceObject is not None:
+                    index = list(self.bodies).index(link["occultingBody"])
+                    planetMsg = self.spiceObject.planetStateOutMsgs[index]
+            period = sampleSec or link.get("sampleSec")
+            # 观测者与目标是同一航天器的链路不计
+            excludePairs = np.equal.outer(np.array(link["observers"], dtype=object),
+                                          np.array(link["targets"], dtype=object))
+            matrix = AccessMatrix([scenario.spacecraft[name].scStateOutMsg for name in link["observers"]],
+                                  [scenario.spacecraft[name].scStateOutMsg for name in link["targets"]],
+                                  geometry, planetMsg=planetMsg,
+                                  samplingTime=macros.sec2nano(period) if period else None,
+                                  excludePairs=excludePairs)
+            matrix.ModelTag = link["name"]
+            scSim.AddModelToTask(SIM_TASK_NAME, matrix)
+            scenario.linkMatrices[link["name"]] = matrix
+
+        viz = spec.get("viz")
+        if saveFile == "":
+            saveFile = viz.get("saveFile") if viz else None
+        if saveFile is not None and vizSupport.vizFound:
+            if not os.path.exists("_VizFiles"):
+                os.makedirs("_VizFiles")
+            scenario.viz = vizSupport.enableUnityVisualization(
+                scSim, SIM_TASK_NAME, list(scenario.spacecraft.values()), saveFile=saveFile)
+
+        if initialize:
+            scSim.InitializeSimulation()
+        return scenario
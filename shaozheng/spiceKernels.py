@@ -0,0 +1,136 @@
+#
+# spiceKernels.py
+#
+# 进程级 SPICE 内核管理：每个内核在一个进程里只 furnsh 一次，按使用者引用计数。
+# 引用计数归零时默认不卸载，同一 worker 中后续场景直接复用已加载的内核；
+# 需要释放内存时调用 unload_unused()。
+#
+
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from Basilisk.topLevelModules import pyswice
+
+# et2utc_c "C" 格式，可直接作为 UTCCalInit 或 createSpiceInterface 的 time
+UTC_FORMAT = "%Y %b %d %H:%M:%S.%f"
+
+# test5 / test6 使用的内核
+DEFAULT_KERNELS = ("de430.bsp", "naif0012.tls", "de-403-masses.tpc", "pck00010.tpc")
+
+_lock = threading.Lock()
+_users = {}  # 绝对路径 -> 当前使用者数
+
+
+def _resolve(dataPath, kernels):
+    return [os.path.abspath(os.path.join(dataPath, k)) for k in kernels]
+
+
+def acquire(dataPath, kernels=DEFAULT_KERNELS):
+    """
+    登记对一组内核的使用，未加载的内核在此时 furnsh。
+
+    Returns:
+        list: 内核绝对路径，交给 :func:`release` 归还
+    """
+    paths = _resolve(dataPath, kernels)
+    with _lock:
+        for path in paths:
+            if path not in _users:
+                pyswice.furnsh_c(path)
+                _users[path] = 0
+            _users[path] += 1
+    return paths
+
+
+def release(paths, unload=False):
+    """
+    归还 :func:`acquire` 得到的内核。
+
+    Args:
+        paths (list): 内核绝对路径
+        unload (bool): 引用计数归零时是否立即卸载，默认保留以便后续场景复用
+    """
+    with _lock:
+        for path in paths:
+            if _users.get(path, 0) <= 0:
+                raise RuntimeError(f"SPICE 内核未被占用却被释放: {path}")
+            _users[path] -= 1
+            if unload and _users[path] == 0:
+                pyswice.unload_c(path)
+                del _users[path]
+
+
+def unload_unused():
+    """卸载所有当前无人使用的内核"""
+    with _lock:
+        for path in [p for p, n in _users.items() if n == 0]:
+            pyswice.unload_c(path)
+            del _users[path]
+
+
+def loaded_kernels():
+    """返回 {内核路径: 使用者数} 的快照"""
+    with _lock:
+        return dict(_users)
+
+
+@contextmanager
+def spice_kernels(dataPath, kernels=DEFAULT_KERNELS):
+    """在 with 块内保证 ``kernels`` 已加载"""
+    paths = acquire(dataPath, kernels)
+    try:
+        yield paths
+    finally:
+        release(paths)
+
+
+@contextmanager
+def spice_interface(gravFactory, time, kernels=DEFAULT_KERNELS, **kwargs):
+    """
+    ``gravFactory.createSpiceInterface`` 的包装。
+
+    内核交由本管理器加载（不再由工厂逐次 furnsh/unload），with 块结束时只归还引用，
+    因此同一进程中重复构建场景只付一次内核加载开销。
+
+    Yields:
+        SpiceInterface: 已配置好的 SPICE 模块
+    """
+    spiceObject = gravFactory.createSpiceInterface(time=time, spiceKernelFileNames=[], **kwargs)
+    with spice_kernels(spiceObject.SPICEDataPath, kernels):
+        spiceObject.SPICELoaded = True
+        yield spiceObject
+
+
+def shift_epoch(timeString, offsetSec):
+    """
+    ``timeString`` 之后 ``offsetSec`` 秒（按 ET 计，含闰秒）的 UTC 时刻，需已加载闰秒内核。
+
+    Returns:
+        str: ``"2026 JAN 05 15:00:00.000000"`` 形式的 UTC 字符串
+    """
+    et = pyswice.new_doubleArray(1)
+    pyswice.str2et_c(timeString, et)
+    etEpoch = pyswice.doubleArray_getitem(et, 0)
+    pyswice.delete_doubleArray(et)
+    return pyswice.et2utc_c(etEpoch + offsetSec, "C", 6, 255, "Yo")
+
+
+def epoch_msg(timeString):
+    """
+    由 :func:`shift_epoch` 格式的 UTC 字符串构造 ``EpochMsg``。
+
+    与 ``timeStringToGregorianUTCMsg`` 不同，这里不 furnsh/unload 闰秒内核，
+    不会卸载本管理器正在使用的内核。
+    """
+    from Basilisk.architecture import messaging
+    epoch = datetime.strptime(timeString, UTC_FORMAT)
+    payload = messaging.EpochMsgPayload()
+    payload.year = epoch.year
+    payload.month = epoch.month
+    payload.day = epoch.day
+    payload.hours = epoch.hour
+    payload.minutes = epoch.minute
+    payload.seconds = epoch.second + epoch.microsecond / 1e6
+    return messaging.EpochMsg().write(payload)
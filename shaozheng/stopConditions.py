@@ -0,0 +1,104 @@
+#
+# stopConditions.py
+#
+# 基于被监测量的提前终止条件。
+# 用 Basilisk 自带的事件系统（createNewEvent，terminal=True）实现：ExecuteSimulation 每隔 checkSec
+# 检查一次条件，条件成立时记录触发时刻并结束本次 ExecuteSimulation，后续时间不再积分。
+#
+#   stop = stop_on_distance(scSim, chaser.scStateOutMsg, target.scStateOutMsg, 50e3, checkSec=60.0)
+#   scSim.ConfigureStopTime(macros.hour2nano(300.0))
+#   scSim.ExecuteSimulation()
+#   if stop.triggered:
+#       print(stop.report())
+#
+# 条件函数只读取一次输出消息并做少量 NumPy 运算，检查间隔取任务步长的整数倍即可。
+# 触发时刻精度为 checkSec；需要精确时刻时用记录数据做插值（如 closestApproach）。
+#
+
+import numpy as np
+from Basilisk.utilities import macros
+
+
+class StopMonitor:
+    """一个停止条件的触发记录"""
+    def __init__(self, name):
+        self.name = name
+        self.triggered = False
+        self.time = None    # 触发时刻 (s)
+        self.value = None   # 触发时的监测量
+
+    def report(self):
+        if not self.triggered:
+            return f"停止条件 '{self.name}' 未触发"
+        return f"停止条件 '{self.name}' 在 {self.time / 3600.0:.4f} 小时触发 (监测量 {self.value:.6g})"
+
+
+def add_stop_condition(scSim, name, quantity, predicate, checkSec):
+    """
+    注册一个通用停止条件。
+
+    Args:
+        scSim: ``SimBaseClass`` 实例
+        name (str): 事件名，同一仿真内唯一
+        quantity (callable): 无参函数，返回当前监测量
+        predicate (callable): ``predicate(value) -> bool``，为真时终止
+        checkSec (float): 检查间隔 (s)
+
+    Returns:
+        StopMonitor
+    """
+    monitor = StopMonitor(name)
+
+    def condition(sim):
+        value = quantity()
+        if predicate(value):
+            monitor.value = value
+            return True
+        return False
+
+    def action(sim):
+        monitor.triggered = True
+        monitor.time = sim.TotalSim.CurrentNanos * macros.NANO2SEC
+
+    # exactRateMatch=False：检查间隔不是任务步长整数倍时也会在间隔到期后的第一步检查
+    scSim.createNewEvent(name, macros.sec2nano(checkSec), eventActive=True,
+                         conditionFunction=condition, actionFunction=action,
+                         terminal=True, exactRateMatch=False)
+    return monitor
+
+
+def stop_on_distance(scSim, stateMsgA, stateMsgB, threshold, checkSec, name="stopOnDistance"):
+    """两航天器相对距离小于 ``threshold`` (m) 时终止"""
+    def distance():
+        return float(np.linalg.norm(np.subtract(stateMsgA.read().r_BN_N, stateMsgB.read().r_BN_N)))
+    return add_stop_condition(scSim, name, distance, lambda d: d < threshold, checkSec)
+
+
+def stop_on_access(scSim, accessMsg, checkSec, rising=True, name="stopOnAccess"):
+    """
+    ``hasAccess`` 跳变时终止。
+
+    Args:
+        accessMsg: ``AccessMsg`` 输出消息（如 ``access.accessOutMsgs[0]``）
+        rising (bool): True 在窗口开始（0→1）时终止，False 在窗口结束（1→0）时终止
+    """
+    state = {"previous": None}
+
+    def hasAccess():
+        return int(accessMsg.read().hasAccess)
+
+    def changed(value):
+        previous, state["previous"] = state["previous"], value
+        return previous is not None and previous != value and value == int(rising)
+
+    return add_stop_condition(scSim, name, hasAccess, changed, checkSec)
+
+
+def stop_on_altitude(scSim, stateMsg, minAltitude, radius, checkSec, name="stopOnAltitude"):
+    """
+    航天器高度低于 ``minAltitude`` (m) 时终止（球形中心天体，半径 ``radius``）。
+    ``r_BN_N`` 需以该天体为原点，即中心天体或 SPICE ``zeroBase``。
+    """
+    def altitude():
+        return float(np.linalg.norm(stateMsg.read().r_BN_N)) - radius
+    return add_stop_condition(scSim, name, altitude, lambda h: h < minAltitude, checkSec)
@@ -1,5 +1,4 @@
 import os
-from copy import copy
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -8,13 +7,46 @@ from Basilisk import __path__
 bskPath = __path__[0]
 fileName = os.path.basename(os.path.splitext(__file__)[0])
 
-from Basilisk.simulation import spacecraft
-from Basilisk.utilities import (SimulationBaseClass, macros, orbitalMotion,
-                                simIncludeGravBody, unitTestSupport, vizSupport)
+from Basilisk.utilities import macros, orbitalMotion, simIncludeGravBody, unitTestSupport
+
+import orbitalMotionBatch
+import scenarioBuilder
+from resultCache import ResultCache, scenario_key
+from scenarioBuilder import ScenarioBuilder
 
 # always import the Basilisk messaging support
 
-def run(show_plots, orbitCase, useSphericalHarmonics, planetCase):
+def initial_orbit(orbitCase, mu):
+    """
+    Initial orbit of the given case.
+
+    Returns:
+        tuple: ``(oe, rN, vN)`` with ``oe`` recomputed from the inertial state so the elements are consistent
+    """
+    oe = orbitalMotion.ClassicElements()
+    rLEO = 7000. * 1000      # meters
+    rGEO = 42000. * 1000     # meters
+    if orbitCase == 'GEO':
+        oe.a = rGEO
+        oe.e = 0.00001
+        oe.i = 0.0 * macros.D2R
+    elif orbitCase == 'GTO':
+        oe.a = (rLEO + rGEO) / 2.0
+        oe.e = 1.0 - rLEO / oe.a
+        oe.i = 0.0 * macros.D2R
+    else:                   # LEO case, default case 0
+        oe.a = rLEO
+        oe.e = 0.0001
+        oe.i = 33.3 * macros.D2R
+    oe.Omega = 48.2 * macros.D2R
+    oe.omega = 347.8 * macros.D2R
+    oe.f = 85.3 * macros.D2R
+    rN, vN = orbitalMotion.elem2rv(mu, oe)
+    oe = orbitalMotion.rv2elem(mu, rN, vN)      # this stores consistent initial orbit elements
+    return oe, rN, vN
+
+
+def run(show_plots, orbitCase, useSphericalHarmonics, planetCase, cache=None):
     """
     At the end of the python script you can specify the following example parameters.
 
@@ -33,124 +65,36 @@ def run(show_plots, orbitCase, useSphericalHarmonics, planetCase):
         useSphericalHarmonics (Bool): False to use first order gravity approximation: :math:`\\frac{GMm}{r^2}`
 
         planetCase (str): {'Earth', 'Mars'}
-    """
-
-    # Create simulation variable names
-    simTaskName = "simTask"
-    simProcessName = "simProcess"
-
-    #  Create a sim module as an empty container
-    scSim = SimulationBaseClass.SimBaseClass()
-
-    # (Optional) If you want to see a simulation progress bar in the terminal window, the
-    # use the following SetProgressBar(True) statement
-    scSim.SetProgressBar(True)
-
-    #  create the simulation process
-    dynProcess = scSim.CreateNewProcess(simProcessName)
-
-    # create the dynamics task and specify the integration update time
-    simulationTimeStep = macros.sec2nano(10.)
-    dynProcess.addTask(scSim.CreateNewTask(simTaskName, simulationTimeStep))
-
-    # setup the simulation tasks/objects
-    # initialize spacecraft object and set properties
-    # The dynamics simulation is setup using a Spacecraft() module.
-    scObject = spacecraft.Spacecraft()
-    scObject.ModelTag = "bsk-Sat"
 
-    # add spacecraft object to the simulation process
-    scSim.AddModelToTask(simTaskName, scObject)
+        cache (ResultCache): optional result cache; when the scenario inputs, gravity file and simulation
+            code are unchanged the recorded states are reloaded instead of re-running the integration
+    """
 
     # setup Gravity Body
-    # The first step to adding gravity objects is to create the gravity body factor class.  Note that
-    # this call will create an empty gravitational body list each time this script is called.  Thus, there
-    # is not need to clear any prior list of gravitational bodies.
-    gravFactory = simIncludeGravBody.gravBodyFactory()
-
-    # To attach an Earth or Mars gravity model to this spacecraft, the following macros  invoked.
-    # The gravFactor() class stores the Earth gravitational object within the class, but it also returns a
-    # handler to this gravitational object as a convenience.  The celestial object position and velocity
-    # vectors are all defaulted to zero values.  If non-zero values are required, this can be manually
-    # overridden.  If multiple bodies are simulated, then their positions can be
-    # dynamically updated.  See scenarioOrbitMultiBody.py to learn how this is
-    # done via a SPICE object.
+    # The planet is described declaratively and scenarioBuilder creates the simulation container, the
+    # dynamics process/task, the gravity body factory and the spacecraft from that description.  The
+    # spherical harmonics are turned off by default; the Earth file only includes a zeroth order and J2 term,
+    # so degree 2 includes J2, while the Mars file is used up to degree 100.
     if planetCase == 'Mars':
-        planet = gravFactory.createMarsBarycenter()
-        planet.isCentralBody = True           # ensure this is the central gravitational body
-        if useSphericalHarmonics:
-            planet.useSphericalHarmonicsGravityModel(bskPath + '/supportData/LocalGravData/GGM2BData.txt', 100)
-
+        body = {"name": "mars barycenter", "central": True}
+        gravFile = bskPath + '/supportData/LocalGravData/GGM2BData.txt'
+        degree = 100
     else:  # Earth
-        planet = gravFactory.createEarth()
-        planet.isCentralBody = True          # ensure this is the central gravitational body
-        if useSphericalHarmonics:
-            # If extra customization is required, see the createEarth() macro to change additional values.
-            # For example, the spherical harmonics are turned off by default.  To engage them, the following code
-            # is used
-            planet.useSphericalHarmonicsGravityModel(bskPath + '/supportData/LocalGravData/GGM03S-J2-only.txt', 2)
-
-            # The value 2 indicates that the first two harmonics, excluding the 0th order harmonic,
-            # are included.  This harmonics data file only includes a zeroth order and J2 term.
-    mu = planet.mu
-
-    # Finally, the gravitational body must be connected to the spacecraft object.  This is done with
-    gravFactory.addBodiesTo(scObject)
-    # Here the complete list of gravitational bodies is automatically assigned to the spacecraft, regardless if
-    # it is only one body like Earth or Mars, or a list of multiple bodies.
-
-    # Note that the default planets position and velocity vectors in the gravitational body are set to zero.  If
-    # alternate position or velocity vectors are required, this can be done by creating the planet ephemeris message
-    # that is connected to the gravity effector input message `planetBodyInMsg`.
-    # If time varying planet ephemeris messages are to be included use the Spice module.  For non-zero messages
-    # the planet's default ephemeris would be replaced with the desired custom values.
+        body = {"name": "earth", "central": True}
+        gravFile = bskPath + '/supportData/LocalGravData/GGM03S-J2-only.txt'
+        degree = 2
+    if useSphericalHarmonics:
+        body["sphericalHarmonics"] = {"file": gravFile, "degree": degree}
+    else:
+        gravFile = None
+    mu = simIncludeGravBody.BODY_DATA[body["name"]].mu
 
     #
     #   setup orbit and simulation time
     #
     # setup the orbit using classical orbit elements
-    oe = orbitalMotion.ClassicElements()
-    rLEO = 7000. * 1000      # meters
-    rGEO = 42000. * 1000     # meters
-    if orbitCase == 'GEO':
-        oe.a = rGEO
-        oe.e = 0.00001
-        oe.i = 0.0 * macros.D2R
-    elif orbitCase == 'GTO':
-        oe.a = (rLEO + rGEO) / 2.0
-        oe.e = 1.0 - rLEO / oe.a
-        oe.i = 0.0 * macros.D2R
-    else:                   # LEO case, default case 0
-        oe.a = rLEO
-        oe.e = 0.0001
-        oe.i = 33.3 * macros.D2R
-    oe.Omega = 48.2 * macros.D2R
-    oe.omega = 347.8 * macros.D2R
-    oe.f = 85.3 * macros.D2R
-    rN, vN = orbitalMotion.elem2rv(mu, oe)
-    oe = orbitalMotion.rv2elem(mu, rN, vN)      # this stores consistent initial orbit elements
     # with circular or equatorial orbit, some angles are arbitrary
-
-
-    # To set the spacecraft initial conditions, the following initial position and velocity variables are set:
-    scObject.hub.r_CN_NInit = rN  # m   - r_BN_N
-    scObject.hub.v_CN_NInit = vN  # m/s - v_BN_N
-
-    # These vectors specify the inertial position and velocity vectors relative to the planet of the
-    # spacecraft center of mass location.  Note that there are 2 points that can be tracked.  The user always
-    # specifies the spacecraft center of mass location with the above code.  If the simulation output should be
-    # about another body fixed point B, this can be done as well.  This is useful in particular with more challenging
-    # dynamics where the center of mass moves relative to the body.  The following vector would specify the location of
-    # the spacecraft hub center of mass (Bc) relative to this body fixed point, as in
-    #
-    #    scObject.hub.r_BcB_B = [[0.0], [0.0], [1.0]]
-    #
-
-    # If this vector is not specified, as in this tutorial scenario, then it defaults to zero.  If only a rigid hub
-    # is modeled, the Bc (hub center of mass) is the same as C (spacecraft center of mass).  If the spacecraft contains
-    # state effectors such as hinged panels, fuel slosh, imbalanced reaction wheels, etc., then the points
-    # Bc and C would not be the same.  Thus, in this simple simulation the body fixed point B and
-    # spacecraft center of mass are identical.
+    oe, rN, vN = initial_orbit(orbitCase, mu)
 
     # set the simulation time
     n = np.sqrt(mu / oe.a / oe.a / oe.a)
@@ -165,57 +109,49 @@ def run(show_plots, orbitCase, useSphericalHarmonics, planetCase):
         numDataPoints = 400
     else:
         numDataPoints = 100
-    # The msg recorder can be told to sample at an with a minimum hold period in nano-seconds.
-    # If no argument is provided, i.e. msg.recorder(), then a default 0ns minimum time period is used
-    # which causes the msg to be recorded on every task update rate.
-    # The recorder can be put onto a separate task with its own update rate.  However, this can be
-    # trickier to do as the recording timing must be carefully balanced with the module msg writing
-    # to avoid recording an older message.
+    # The msg recorder samples with a minimum hold period; without one every task update is recorded.
+    simulationTimeStep = macros.sec2nano(10.)
     samplingTime = unitTestSupport.samplingTime(simulationTime, simulationTimeStep, numDataPoints)
-    # create a logging task object of the spacecraft output message at the desired down sampling ratio
-    dataRec = scObject.scStateOutMsg.recorder(samplingTime)
-    scSim.AddModelToTask(simTaskName, dataRec)
-
-    # Vizard Visualization Option
-    # ---------------------------
-    # If you wish to transmit the simulation data to the United based Vizard Visualization application,
-    # then uncomment the following
-    # line from the python scenario script.  This will cause the BSK simulation data to
-    # be stored in a binary file inside the _VizFiles sub-folder with the scenario folder.  This file can be read in by
-    # Vizard and played back after running the BSK simulation.
-    # To enable this, uncomment this line:
-
-    viz = vizSupport.enableUnityVisualization(scSim, simTaskName, scObject,
-                                              # saveFile=__file__
-                                              # liveStream=True
-                                              )
-
-    # The vizInterface module must be built into BSK.  This is done if the correct CMake options are selected.
-    # The default CMake will include this vizInterface module in the BSK build.  See the BSK HTML documentation on
-    # more information of CMake options.
-
-    # By using the gravFactory support class to create and add planetary bodies the vizInterface module will
-    # automatically be able to find the correct celestial body ephemeris names.  If these names are changed, then the
-    # vizSupport.py support library has to be customized.
-    # Currently Vizard supports playback of stored simulation data files as well as live streaming.
-    # Further, some display elements such as thruster or reaction wheel panels are only visible if
-    # such devices are being simulated in BSK.
-
-    # While Vizard has many visualization features that can be customized from within the application, many Vizard
-    # settings can also be scripted from the Basilisk python script.  A complete discussion on these options and
-    # features can be found the the Vizard documentation pages.
-
-    # Before the simulation is ready to run, it must be initialized.  The following code uses a
-    # convenient macro routine
-    # which initializes each BSK module (run self init, cross init and reset) and clears the BSK logging stack.
-
-    #   initialize Simulation:  This function runs the self_init()
-    #   and reset() routines on each module.
-    scSim.InitializeSimulation()
-
-    #   configure a simulation stop time and execute the simulation run
-    scSim.ConfigureStopTime(simulationTime)
-    scSim.ExecuteSimulation()
+
+    # The spacecraft initial conditions are the inertial position and velocity of the spacecraft center of
+    # mass relative to the planet.  Only the translational motion is tracked, so the default hub mass and
+    # inertia are kept.  No Vizard file is written (``saveFile`` is None); set one in the builder call to
+    # store a binary file in the _VizFiles sub-folder for playback.
+    spec = {
+        "name": "bsk-Sat",
+        "stepSec": simulationTimeStep * macros.NANO2SEC,
+        "durationSec": simulationTime * macros.NANO2SEC,
+        "bodies": [body],
+        "spacecraft": [{"name": "bsk-Sat", "state": {"r": list(rN), "v": list(vN)}}],
+        "recorders": [{"spacecraft": "bsk-Sat", "sampleSec": samplingTime * macros.NANO2SEC}],
+    }
+    builder = ScenarioBuilder(spec)
+    planet = builder.bodies[body["name"]]
+
+    # The recorded states only depend on the inputs below, the gravity file and the code of this function,
+    # so a cached result with the same content hash can stand in for the recorder.
+    cached = None
+    if cache is not None:
+        key = scenario_key({"planetCase": planetCase, "useSphericalHarmonics": useSphericalHarmonics,
+                            "rN": np.asarray(rN), "vN": np.asarray(vN), "mu": mu,
+                            "simulationTimeStep": simulationTimeStep, "simulationTime": simulationTime,
+                            "samplingTime": samplingTime},
+                           files=[gravFile] if gravFile else [],
+                           code=[initial_orbit, run, scenarioBuilder])
+        cached = cache.get(key)
+
+    if cached is None:
+        #   build the simulation (this runs InitializeSimulation(), i.e. the self_init()
+        #   and reset() routines on each module), then execute it to the stop time
+        scenario = builder.build(saveFile=None)
+        # (Optional) show a simulation progress bar in the terminal window
+        scenario.scSim.SetProgressBar(True)
+        scenario.run()
+        dataRec = scenario.recorders["bsk-Sat"]
+        if cache is not None:
+            cached = cache.put(key, {"dataRec": dataRec}, columns={"dataRec": ["r_BN_N", "v_BN_N"]})
+    if cached is not None:
+        dataRec = cached.recorders["dataRec"]
     # Note that this module simulates both the translational and rotational motion of the spacecraft.
     # In this scenario only the translational (i.e. orbital) motion is tracked.  This means the rotational motion
     # remains at a default inertial frame orientation in this scenario.  There is no appreciable speed hit to
@@ -289,12 +225,9 @@ def plotOrbits(timeAxis, posData, velData, oe, mu, P, orbitCase, useSphericalHar
         planetRadius = planet.radEquator / 1000
         ax.add_artist(plt.Circle((0, 0), planetRadius, color=planetColor))
         # draw the actual orbit
-        rData = []
-        fData = []
-        for idx in range(0, len(posData)):
-            oeData = orbitalMotion.rv2elem(mu, posData[idx], velData[idx])
-            rData.append(oeData.rmag)
-            fData.append(oeData.f + oeData.omega - oe.omega)
+        oeData = orbitalMotionBatch.rv2elemBatch(mu, posData, velData)
+        rData = oeData.rmag
+        fData = oeData.f + oeData.omega - oe.omega
         plt.plot(rData * np.cos(fData) / 1000, rData * np.sin(fData) / 1000, color='#aa0000', linewidth=3.0
                  )
         # draw the full osculating orbit from the initial conditions
@@ -312,17 +245,8 @@ def plotOrbits(timeAxis, posData, velData, oe, mu, P, orbitCase, useSphericalHar
         fig = plt.gcf()
         ax = fig.gca()
         ax.ticklabel_format(useOffset=False, style='plain')
-        Deltar = np.empty((0, 3))
-        E0 = orbitalMotion.f2E(oe.f, oe.e)
-        M0 = orbitalMotion.E2M(E0, oe.e)
-        n = np.sqrt(mu/(oe.a*oe.a*oe.a))
-        oe2 = copy(oe)
-        for idx in range(0, len(posData)):
-            M = M0 + n * timeAxis[idx] * macros.NANO2SEC
-            Et = orbitalMotion.M2E(M, oe.e)
-            oe2.f = orbitalMotion.E2f(Et, oe.e)
-            rv, vv = orbitalMotion.elem2rv(mu, oe2)
-            Deltar = np.append(Deltar, [posData[idx] - rv], axis=0)
+        rv, vv = orbitalMotionBatch.keplerPropagate(mu, oe, timeAxis * macros.NANO2SEC)
+        Deltar = posData - rv
         for idx in range(3):
             plt.plot(timeAxis * macros.NANO2SEC / P, Deltar[:, idx] ,
                      color=unitTestSupport.getLineColor(idx, 3),
@@ -340,10 +264,8 @@ def plotOrbits(timeAxis, posData, velData, oe, mu, P, orbitCase, useSphericalHar
         fig = plt.gcf()
         ax = fig.gca()
         ax.ticklabel_format(useOffset=False, style='plain')
-        smaData = []
-        for idx in range(0, len(posData)):
-            oeData = orbitalMotion.rv2elem(mu, posData[idx], velData[idx])
-            smaData.append(oeData.a / 1000.)
+        oeData = orbitalMotionBatch.rv2elemBatch(mu, posData, velData)
+        smaData = oeData.a / 1000.
         plt.plot(timeAxis * macros.NANO2SEC / P, smaData, color='#aa0000',
                  )
         plt.xlabel('Time [orbits]')
@@ -353,10 +275,65 @@ def plotOrbits(timeAxis, posData, velData, oe, mu, P, orbitCase, useSphericalHar
     figureList[pltName] = plt.figure(2)
     return figureList, finalDiff
 
+def run_batch(orbitCases=('LEO', 'GTO', 'GEO'), useSphericalHarmonics=False, planetCase='Earth',
+              stepSec=10.):
+    """
+    Fast screening counterpart of :func:`run` without Basilisk dynamics.
+
+    All ``orbitCases`` are propagated together with ``orbitalMotionBatch.rk4PropagateBatch``
+    (point-mass gravity, plus J2 when ``useSphericalHarmonics`` is set) using the same step,
+    simulation time and recorder sample times as :func:`run`.
+
+    Args:
+        orbitCases (tuple): orbit cases, see :func:`run`
+        useSphericalHarmonics (bool): add the planet J2 term
+        planetCase (str): {'Earth', 'Mars'}
+        stepSec (float): integration step (s), 10 s as in :func:`run`
+
+    Returns:
+        dict: orbitCase -> finalDiff, the final distance from the Kepler orbit as in :func:`plotOrbits`;
+        with J2 this measures the J2 drift rather than the integration error
+    """
+    gravFactory = simIncludeGravBody.gravBodyFactory()
+    if planetCase == 'Mars':
+        planet = gravFactory.createMarsBarycenter()
+        J2, rEquator = orbitalMotion.J2_MARS, orbitalMotion.REQ_MARS * 1000.
+    else:
+        planet = gravFactory.createEarth()
+        J2, rEquator = orbitalMotion.J2_EARTH, orbitalMotion.REQ_EARTH * 1000.
+    mu = planet.mu
+    if not useSphericalHarmonics:
+        J2 = 0.
+
+    simulationTimeStep = macros.sec2nano(stepSec)
+    orbits, sampleTimes = [], []
+    for orbitCase in orbitCases:
+        oe, rN, vN = initial_orbit(orbitCase, mu)
+        P = 2. * np.pi / np.sqrt(mu / oe.a / oe.a / oe.a)
+        simulationTime = macros.sec2nano((3. if useSphericalHarmonics else 0.75) * P)
+        numDataPoints = 400 if useSphericalHarmonics else 100
+        samplingTime = unitTestSupport.samplingTime(simulationTime, simulationTimeStep, numDataPoints)
+        orbits.append((oe, rN, vN))
+        sampleTimes.append(np.arange(0, simulationTime + 1, samplingTime))
+
+    # one batch over the union of all sample times
+    timeAxis = np.unique(np.concatenate(sampleTimes))
+    rHist, _ = orbitalMotionBatch.rk4PropagateBatch(mu, [rN for _, rN, _ in orbits], [vN for _, _, vN in orbits],
+                                                    timeAxis * macros.NANO2SEC, stepSec, J2, rEquator)
+
+    finalDiff = {}
+    for idx, (orbitCase, (oe, _, _), times) in enumerate(zip(orbitCases, orbits, sampleTimes)):
+        rv, _ = orbitalMotionBatch.keplerPropagate(mu, oe, times[-1:] * macros.NANO2SEC)
+        k = np.searchsorted(timeAxis, times[-1])
+        finalDiff[orbitCase] = np.linalg.norm(rHist[k, idx] - rv[0])
+    return finalDiff
+
+
 if __name__ == "__main__":
     run(
         True,        # show_plots
         'LEO',       # orbit Case (LEO, GTO, GEO)
         False,       # useSphericalHarmonics
-        'Earth'      # planetCase (Earth, Mars)
+        'Earth',     # planetCase (Earth, Mars)
+        cache=ResultCache()  # reload the recorded states when only the plots change
     )
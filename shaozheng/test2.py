@@ -8,15 +8,18 @@
 #   - 第13-18列: 卫星 (x, y, z, vx, vy, vz)
 #
 # 生成 Basilisk 日志（.data + .bin），供 Vizard 可视化。
+# run(multi_body=True) 时同一张表中的地球、月球、卫星共用一个时间索引一起回放。
 #
 
 import os
 import numpy as np
-import pandas as pd
 
 from Basilisk.simulation import spacecraft
 from Basilisk.architecture import messaging
-from Basilisk.utilities import SimulationBaseClass, macros, vizSupport
+from Basilisk.utilities import SimulationBaseClass, macros, simIncludeGravBody, vizSupport
+
+from trajectoryPlayback import (DRO_VELOCITY_SCALE, TABLE_BODIES, HermiteInterpolator, PrecomputedPlayback,
+                                load_trajectory_table)
 
 # ----------------------------
 # 用户配置
@@ -24,57 +27,83 @@ from Basilisk.utilities import SimulationBaseClass, macros, vizSupport
 DATA_FILE = "DRO.csv"
 OUTPUT_NAME = "satellite_traj"
 DT_LOG = 1.0  # 日志记录步长（秒），可与数据采样率一致
+SPACECRAFT_BODIES = ("satellite",)  # 多体回放时按航天器处理的列组，其余按星历处理
+VELOCITY_SCALE = DRO_VELOCITY_SCALE  # 速度列换算为 位置单位/秒（DRO.csv 速度为 CR3BP 归一化单位）
 
 def read_trajectory(file_path):
-    """读取 DRO.csv 并提取卫星轨迹"""
-    df = pd.read_csv(file_path, header=None)
-
-    if df.shape[1] < 19:
-        raise ValueError("CSV 至少需要 19 列：time + Earth(6) + Moon(6) + Satellite(6)")
-
-    times = df.iloc[:, 0].values.astype(float)
-    positions = df.iloc[:, 13:16].values.astype(float)  # x, y, z
-    velocities = df.iloc[:, 16:19].values.astype(float) # vx, vy, vz
-
-    if not np.all(np.diff(times) > 0):
-        raise ValueError("时间列必须严格递增")
-
+    """读取 DRO.csv 并提取卫星轨迹（只解析卫星列，带二进制缓存）"""
+    times, states = load_trajectory_table(file_path, bodies=("satellite",))
+    positions, velocities = states["satellite"]
     return times, positions, velocities
 
 class TrajectoryPlayer:
-    """在每一步插值并更新卫星状态消息"""
-    def __init__(self, times, positions, velocities):
+    """在每一步插值卫星状态，由调用方写入 Spacecraft hub"""
+    def __init__(self, times, positions, velocities, dt=None, n_steps=None, velocity_scale=VELOCITY_SCALE):
         self.times = times
         self.positions = positions
         self.velocities = velocities
-        self.scStateOutMsg = messaging.SCStatesMsg()
+        self.interpolator = HermiteInterpolator(times, positions, velocities, velocityScale=velocity_scale)
+        # 给定任务步长时，仿真开始前一次性向量化插值全部任务时刻（仿真时间从 0 开始）
+        if dt is not None:
+            self.playback = PrecomputedPlayback(self.interpolator, 0.0, dt, n_steps)
+        else:
+            self.playback = self.interpolator
 
     def updateState(self, current_time_nano):
         t = current_time_nano * macros.NANO2SEC
-        r, v = self.interpolate_state(t)
-        msg = messaging.SCStatesMsgPayload()
-        msg.r_BN_N = r.tolist()
-        msg.v_BN_N = v.tolist()
-        msg.sigma_BN = [0.0, 0.0, 0.0]      # 无姿态，单位四元数对应
-        msg.omega_BN_B = [0.0, 0.0, 0.0]
-        self.scStateOutMsg.write(msg)
+        return self.interpolate_state(t)
 
     def interpolate_state(self, sim_time):
-        times = self.times
-        if sim_time <= times[0]:
-            return self.positions[0], self.velocities[0]
-        if sim_time >= times[-1]:
-            return self.positions[-1], self.velocities[-1]
-
-        idx = np.searchsorted(times, sim_time) - 1
-        t0, t1 = times[idx], times[idx + 1]
-        w = (sim_time - t0) / (t1 - t0)
-        r = self.positions[idx] + w * (self.positions[idx + 1] - self.positions[idx])
-        v = self.velocities[idx] + w * (self.velocities[idx + 1] - self.velocities[idx])
+        return self.playback.interpolate_state(sim_time)
+
+class MultiBodyPlayer:
+    """
+    多体回放：表中所有物体共用一个时间索引。
+
+    各物体状态叠成 ``(N,nBody,3)``，每个 tick 只用游标算一次 Hermite 权重，
+    一次组合即得到全部物体的状态，物体数增加不会增加插值次数；按需逐步计算，不预先展开整段回放。
+    星历物体写 SpicePlanetStateMsg（接到引力体上供 Vizard 显示），
+    航天器物体（``spacecraft_bodies``）的状态由调用方写入 Spacecraft hub，不另发消息。
+    """
+    def __init__(self, times, states, spacecraft_bodies=SPACECRAFT_BODIES, velocity_scale=VELOCITY_SCALE):
+        self.bodies = list(states)
+        positions = np.stack([states[b][0] for b in self.bodies], axis=1)
+        velocities = np.stack([states[b][1] for b in self.bodies], axis=1)
+        self.interpolator = HermiteInterpolator(times, positions, velocities, velocityScale=velocity_scale)
+
+        self.planetStateOutMsgs = {}
+        self._planetPayloads = []  # (行号, 负载, 消息)，负载只创建一次，每步只改位置/速度
+        for k, body in enumerate(self.bodies):
+            if body in spacecraft_bodies:
+                continue
+            payload = messaging.SpicePlanetStateMsgPayload()
+            payload.PlanetName = body
+            payload.J20002Pfix = np.eye(3).tolist()
+            self.planetStateOutMsgs[body] = messaging.SpicePlanetStateMsg()
+            self._planetPayloads.append((k, payload, self.planetStateOutMsgs[body]))
+
+    def body_index(self, body):
+        return self.bodies.index(body)
+
+    def updateState(self, current_time_nano):
+        t = current_time_nano * macros.NANO2SEC
+        r, v = self.interpolate_state(t)
+        for k, payload, planetMsg in self._planetPayloads:
+            payload.PositionVector = r[k].tolist()
+            payload.VelocityVector = v[k].tolist()
+            planetMsg.write(payload, current_time_nano)
         return r, v
 
-def run():
-    times, positions, velocities = read_trajectory(DATA_FILE)
+    def interpolate_state(self, sim_time):
+        """返回 ``(nBody,3)`` 的位置与速度，行顺序同 ``self.bodies``"""
+        return self.interpolator.interpolate_state(sim_time)
+
+def run(multi_body=False):
+    if multi_body:
+        times, states = load_trajectory_table(DATA_FILE, bodies=TABLE_BODIES)
+        positions, velocities = states["satellite"]
+    else:
+        times, positions, velocities = read_trajectory(DATA_FILE)
     print(f"加载 {len(times)} 个轨迹点，时间范围: [{times[0]}, {times[-1]}] 秒")
 
     sim = SimulationBaseClass.SimBaseClass()
@@ -97,37 +126,39 @@ def run():
 
     sim.AddModelToTask(simTaskName, scObject)
 
-    # 自定义任务：每步更新状态
+    # 设置仿真时长
+    SIM_DURATION = times[-1] + DT_LOG
+    # 整段约 367 万步，逐步用游标插值，不预先展开（PrecomputedPlayback 只适合短回放）
+    if multi_body:
+        player = MultiBodyPlayer(times, states)
+        satIndex = player.body_index("satellite")
+
+        # 星历物体接入引力体消息，Vizard 可直接显示地球、月球
+        gravFactory = simIncludeGravBody.gravBodyFactory()
+        planets = {"earth": gravFactory.createEarth, "moon": gravFactory.createMoon}
+        for body, planetMsg in player.planetStateOutMsgs.items():
+            planets[body]().planetBodyInMsg.subscribeTo(planetMsg)
+        gravFactory.addBodiesTo(scObject)
+    else:
+        player = TrajectoryPlayer(times, positions, velocities)
+        satIndex = None
+
+    # 自定义任务：每步更新状态（插值由 player 统一完成）
     class StateUpdater:
-        def __init__(self, times, positions, velocities):
-            self.times = times
-            self.positions = positions
-            self.velocities = velocities
+        def __init__(self, player, select=None):
+            self.player = player
+            self.select = select
 
         def UpdateState(self, current_time_nano):
-            t = current_time_nano * macros.NANO2SEC
-            r, v = self.interpolate_state(t)
+            r, v = self.player.updateState(current_time_nano)
+            if self.select is not None:
+                r, v = r[self.select], v[self.select]
             scObject.hub.r_CN_N = r.tolist()
             scObject.hub.v_CN_N = v.tolist()
 
-        def interpolate_state(self, sim_time):
-            times = self.times
-            if sim_time <= times[0]:
-                return self.positions[0], self.velocities[0]
-            if sim_time >= times[-1]:
-                return self.positions[-1], self.velocities[-1]
-            idx = np.searchsorted(times, sim_time) - 1
-            t0, t1 = times[idx], times[idx + 1]
-            w = (sim_time - t0) / (t1 - t0)
-            r = self.positions[idx] + w * (self.positions[idx + 1] - self.positions[idx])
-            v = self.velocities[idx] + w * (self.velocities[idx + 1] - self.velocities[idx])
-            return r, v
-
-    updater = StateUpdater(times, positions, velocities)
+    updater = StateUpdater(player, satIndex)
     sim.AddModelToTask(simTaskName, updater, ModelPriority=99)  # 高优先级，早于 scObject
 
-    # 设置仿真时长
-    SIM_DURATION = times[-1] + DT_LOG
     sim.ConfigureStopTime(macros.sec2nano(SIM_DURATION))
     sim.SetTimeStep(taskRate)
 
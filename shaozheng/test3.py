@@ -31,71 +31,34 @@ scObject.hub.v_CN_N = [0.0, 7.5 * 1000, 0.0]     # 米/秒
 
 import os
 import numpy as np
-from Basilisk.simulation import spacecraft
-from Basilisk.utilities import SimulationBaseClass, macros, orbitalMotion, simIncludeGravBody, vizSupport
+
+from scenarioBuilder import ScenarioBuilder
+
+# 场景描述：地球点质量引力、LEO 轨道根数、1 s 步长、Vizard 文件名
+SCENARIO_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios", "leo.json")
+
 
 def run(show_plots):
-    # 1. 创建仿真容器
-    simTaskName = "simTask"
-    simProcessName = "simProcess"
-    scSim = SimulationBaseClass.SimBaseClass()
-    
-    # 显示进度条
-    scSim.SetProgressBar(True)
-
-    # 2. 创建进程和任务
-    dynProcess = scSim.CreateNewProcess(simProcessName)
-    simulationTimeStep = macros.sec2nano(1.0) # 步长设为 1.0 秒
-    dynProcess.addTask(scSim.CreateNewTask(simTaskName, simulationTimeStep))
-
-    # 3. 初始化航天器对象
-    scObject = spacecraft.Spacecraft()
-    scObject.ModelTag = "LEO-Satellite"
-    scSim.AddModelToTask(simTaskName, scObject)
-
-    # 4. 设置引力体 (使用 gravBodyFactory)
-    gravFactory = simIncludeGravBody.gravBodyFactory()
-    earth = gravFactory.createEarth()
-    earth.isCentralBody = True
-    mu = earth.mu
-    
-    # 将引力体关联到航天器
-    gravFactory.addBodiesTo(scObject)
-
-    # 5. 配置你提供的 LEO 轨道参数
-    oe = orbitalMotion.ClassicElements()
-    oe.a = 7178.0 * 1000.0          # 半长轴 (m)
-    oe.e = 0.001                    # 偏心率
-    oe.i = 45.0 * macros.D2R        # 倾角
-    oe.Omega = 90.0 * macros.D2R    # 升交点赤经
-    oe.omega = 0.0 * macros.D2R     # 近地点幅角
-    oe.f = 0.0 * macros.D2R         # 真近点角 (由 M=0 推导)
-
-    # 转换为状态向量
-    rN, vN = orbitalMotion.elem2rv(mu, oe)
-    scObject.hub.r_CN_NInit = rN
-    scObject.hub.v_CN_NInit = vN
-
-    # 6. 开启可视化 (使用 vizSupport)
-    # 这会在当前目录下生成一个 .bin 文件供 Vizard 回放
-    if True:
-        viz = vizSupport.enableUnityVisualization(scSim, simTaskName, scObject, 
-                                                  saveFile="LEO_Simulation")
-        # 如果需要实时流传输，可以取消注释下面这行
-        # viz.liveStream = True
-
-    # 7. 设置仿真时间 (运行 1 个轨道周期)
-    n = np.sqrt(mu / oe.a**3)
+    # 1. 读取场景描述，创建引力体（仿真容器、进程、任务由构建器统一创建）
+    builder = ScenarioBuilder(SCENARIO_FILE)
+    mu = builder.bodies["earth"].mu
+    a = builder.spec["spacecraft"][0]["elements"]["a"]
+
+    # 2. 设置仿真时间 (运行 1 个轨道周期)
+    n = np.sqrt(mu / a**3)
     P = 2. * np.pi / n
-    simulationTime = macros.sec2nano(P)
 
-    # 8. 初始化并运行
-    scSim.InitializeSimulation()
-    scSim.ConfigureStopTime(simulationTime)
-    scSim.ExecuteSimulation()
+    # 3. 构建仿真：根数 → 状态向量、开启可视化（_VizFiles 下生成 .bin 文件供 Vizard 回放）
+    scenario = builder.build(durationSec=P)
+    # 显示进度条
+    scenario.scSim.SetProgressBar(True)
+
+    # 4. 运行
+    scenario.run()
 
     print(f"仿真完成。轨道周期: {P/60:.2f} 分钟")
     return
 
+
 if __name__ == "__main__":
-    run(show_plots=True)
\ No newline at end of file
+    run(show_plots=True)
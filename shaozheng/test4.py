@@ -82,83 +82,385 @@ AI分析: 导致这个结果的原因并不是参数“不合理”，而是因
 
 import os
 import numpy as np
-from Basilisk.simulation import spacecraft
-from Basilisk.utilities import (SimulationBaseClass, macros, orbitalMotion, 
-                                simIncludeGravBody, vizSupport, unitTestSupport)
-
-def run_rendezvous_sandbox():
-    # 1. 创建仿真容器
-    scSim = SimulationBaseClass.SimBaseClass()
-    scSim.SetProgressBar(True)
-    
-    simProcessName = "simProcess"
-    simTaskName = "simTask"
-
-    # 2. 创建进程
-    dynProcess = scSim.CreateNewProcess(simProcessName)
-
-    # 3. 创建任务并指定步长 (严格对照样本：60.0秒)
-    simulationTimeStep = macros.sec2nano(60.0)
-    # 显式使用 addTask 确保调度器对齐
-    dynProcess.addTask(scSim.CreateNewTask(simTaskName, simulationTimeStep))
-
-    # 4. 初始化航天器
-    chaser = spacecraft.Spacecraft(); chaser.ModelTag = "Chaser-Sat"
-    target = spacecraft.Spacecraft(); target.ModelTag = "Target-Sat"
-    scSim.AddModelToTask(simTaskName, chaser)
-    scSim.AddModelToTask(simTaskName, target)
-
-    # 5. 设置引力体 (使用 gravBodyFactory)
-    gravFactory = simIncludeGravBody.gravBodyFactory()
-    earth = gravFactory.createEarth()
-    earth.isCentralBody = True
-    gravFactory.addBodiesTo(chaser)
-    gravFactory.addBodiesTo(target)
-
-    # 6. 配置初始状态向量 (J2000 坐标系)
-    # 目标卫星 (Target)
-    target.hub.r_CN_NInit = np.array([6778.137, 0.0, 0.0]) * 1000.0
-    target.hub.v_CN_NInit = np.array([0.0, 7.6726, 0.0]) * 1000.0
-    # 追踪卫星 (Chaser)
-    chaser.hub.r_CN_NInit = np.array([-6689.23, 1178.45, 0.0]) * 1000.0
-    chaser.hub.v_CN_NInit = np.array([-1.328, -7.548, 0.0]) * 1000.0
-
-    # 计算采样间隔
-    samplingTime = macros.sec2nano(300.0)
-    # 创建记录器并关联到任务
-    chaserRec = chaser.scStateOutMsg.recorder(samplingTime)
-    targetRec = target.scStateOutMsg.recorder(samplingTime)
-    scSim.AddModelToTask(simTaskName, chaserRec)
-    scSim.AddModelToTask(simTaskName, targetRec)
-
-
-    # 7. 可视化配置 (对照样本：先创建目录)
-    if not os.path.exists("_VizFiles"):
-        os.makedirs("_VizFiles")
-    if vizSupport.vizFound:
-        # 使用官方支持的列表方式
-        viz = vizSupport.enableUnityVisualization(scSim, simTaskName, [chaser, target], 
-                                                  saveFile="LEO_Rendezvous")
-
-    # 8. 初始化与执行
-    scSim.InitializeSimulation()
-    simulationTime = macros.hour2nano(300.0)
+from Basilisk.utilities import macros, orbitalMotion
+
+import multiRate
+import scenarioBuilder
+import stopConditions
+from checkpoint import add_checkpointer, fork, list_checkpoints, load_checkpoint, resume
+from closestApproach import closest_approach
+from conjunctionScreen import screen_recorders
+from multiRate import DistanceRule, add_rate_controller
+from orbitalMotionBatch import keplerPropagate
+from resultCache import scenario_key
+from scenarioBuilder import SIM_TASK_NAME, ScenarioBuilder
+from stopConditions import stop_on_distance
+from vizDecimation import decimate_recording
+
+# 初始状态向量 (J2000 坐标系)
+# 目标卫星 (Target)
+TARGET_R0 = np.array([6778.137, 0.0, 0.0]) * 1000.0
+TARGET_V0 = np.array([0.0, 7.6726, 0.0]) * 1000.0
+# 追踪卫星 (Chaser)
+CHASER_R0 = np.array([-6689.23, 1178.45, 0.0]) * 1000.0
+CHASER_V0 = np.array([-1.328, -7.548, 0.0]) * 1000.0
+
+MU_EARTH = orbitalMotion.MU_EARTH * 1e9  # m^3/s^2，与 gravFactory.createEarth() 一致
+CONJUNCTION_THRESHOLD = 50e3  # 交会筛查距离阈值 (m)
+
+# 多速率步长：相对距离（外推到下一决策时刻）低于阈值时的步长，远场用 60 s
+ADAPTIVE_BANDS = [(300e3, 10.0), (100e3, 1.0)]
+
+# 检查点间隔，须为记录器采样间隔 (300 s) 的整数倍
+CHECKPOINT_INTERVAL_SEC = 12.0 * 3600.0
+
+
+# 双星交会场景描述（见 scenarioBuilder），初始状态在每次构建时覆盖
+RENDEZVOUS_SPEC = {
+    "name": "LEO_Rendezvous",
+    "stepSec": 60.0,
+    "durationSec": 300.0 * 3600.0,
+    "bodies": [{"name": "earth", "central": True}],
+    "spacecraft": [
+        {"name": "Chaser-Sat", "state": {"r": CHASER_R0.tolist(), "v": CHASER_V0.tolist()}},
+        {"name": "Target-Sat", "state": {"r": TARGET_R0.tolist(), "v": TARGET_V0.tolist()}},
+    ],
+    "recorders": [{"spacecraft": "Chaser-Sat", "sampleSec": 300.0},
+                  {"spacecraft": "Target-Sat", "sampleSec": 300.0}],
+    "viz": {"saveFile": "LEO_Rendezvous"},
+}
+
+_builder = None
+
+
+def rendezvous_builder():
+    """进程内共享的构建器，引力体只创建一次"""
+    global _builder
+    if _builder is None:
+        _builder = ScenarioBuilder(RENDEZVOUS_SPEC)
+    return _builder
+
+
+def create_rendezvous_sim(chaserState, targetState, stepSec, sampleSec, saveFile=None):
+    """
+    搭建双星仿真：进程/任务、两颗航天器、地球引力、记录器，可选 Vizard 输出。
+
+    Args:
+        chaserState (tuple): 追踪星初始 (r, v)，单位 m, m/s
+        targetState (tuple): 目标星初始 (r, v)
+        stepSec (float): 积分步长 (s)
+        sampleSec (float): 记录器采样间隔 (s)
+        saveFile (str): Vizard 文件名，None 时不开启可视化
+
+    Returns:
+        tuple: ``(scSim, chaserRec, targetRec)``
+    """
+    scenario = rendezvous_builder().build({"Chaser-Sat": chaserState, "Target-Sat": targetState},
+                                          stepSec=stepSec, sampleSec=sampleSec, saveFile=saveFile)
+    return scenario.scSim, scenario.recorders["Chaser-Sat"], scenario.recorders["Target-Sat"]
+
+
+def estimate_encounter_time(mu, chaserState, targetState):
+    """
+    由两星平均角速度之差（相位追赶率）估算共面近圆轨道的相遇时刻。
+
+    Returns:
+        tuple: ``(tEncounter, tSynodic)``，单位 s
+    """
+    n = []
+    for r, v in (chaserState, targetState):
+        a = 1.0 / (2.0 / np.linalg.norm(r) - np.dot(v, v) / mu)
+        n.append(np.sqrt(mu / a ** 3))
+    dn = n[0] - n[1]  # > 0 表示追踪星角速度更快
+
+    # 目标星沿运动方向领先追踪星的相位角 [0, 2pi)
+    rC, vC = chaserState
+    rT = targetState[0]
+    hHat = np.cross(rC, vC) / np.linalg.norm(np.cross(rC, vC))
+    phase = np.arctan2(np.dot(hHat, np.cross(rC, rT)), np.dot(rC, rT)) % (2.0 * np.pi)
+
+    tSynodic = 2.0 * np.pi / abs(dn)
+    if dn > 0.0:
+        return phase / dn, tSynodic
+    return (2.0 * np.pi - phase) / -dn, tSynodic
+
+
+def kepler_state(mu, state, t):
+    """二体解析外推 ``state = (r, v)`` 到 ``t`` 秒后；场景只含中心引力点质量，与积分结果一致到积分误差"""
+    oe = orbitalMotion.rv2elem(mu, np.asarray(state[0], dtype=float), np.asarray(state[1], dtype=float))
+    rVec, vVec = keplerPropagate(mu, oe, [t])
+    return rVec[0], vVec[0]
+
+
+def relative_distance(chaserRec, targetRec):
+    return np.linalg.norm(chaserRec.r_BN_N - targetRec.r_BN_N, axis=1)
+
+
+def run_rendezvous_search(coarseStep=60.0, coarseSample=600.0, fineStep=1.0,
+                          nCandidates=3, maxHours=2000.0):
+    """
+    粗-细两级搜索最近交会，替代固定 300 小时的长时间试算。
+
+    1. 按相位追赶率估算相遇时刻 ``tEst``，两星状态用二体解析解直接外推到窗口起点
+       ``tEst - margin``，粗步长只积分 ``[tEst - margin, tEst + margin]``；
+       极小落在窗口起点时窗口前移，距离在末尾仍在减小时继续延长，直到出现极小值或达到 ``maxHours``。
+    2. 取粗采样距离中最小的 ``nCandidates`` 个局部极小，
+       从其前一个采样点的状态出发，以细步长只重算该极小两侧的一小段。
+
+    Returns:
+        tuple: ``(minDist, tca)``，单位 m, s
+    """
+    chaserState = (CHASER_R0, CHASER_V0)
+    targetState = (TARGET_R0, TARGET_V0)
+    tEst, tSynodic = estimate_encounter_time(MU_EARTH, chaserState, targetState)
+    print(f"相位追赶估算相遇时间: {tEst / 3600.0:.2f} 小时 (会合周期 {tSynodic / 3600.0:.2f} 小时)")
+
+    # 1. 粗搜索：窗口之前的一段用解析外推跳过
+    margin = max(0.1 * tEst, 4.0 * coarseSample)
+    tStart = max(tEst - margin, 0.0)
+    while True:
+        scSim, chaserRec, targetRec = create_rendezvous_sim(kepler_state(MU_EARTH, chaserState, tStart),
+                                                            kepler_state(MU_EARTH, targetState, tStart),
+                                                            coarseStep, coarseSample)
+        tStop = min(tEst + margin, maxHours * 3600.0)
+        while True:
+            scSim.ConfigureStopTime(macros.sec2nano(tStop - tStart))
+            scSim.ExecuteSimulation()
+            relDist = relative_distance(chaserRec, targetRec)
+            stillClosing = np.argmin(relDist) >= len(relDist) - 2
+            if not stillClosing or tStop >= maxHours * 3600.0:
+                break
+            tStop = min(tStop + 0.1 * tSynodic, maxHours * 3600.0)
+        if np.argmin(relDist) > 1 or tStart == 0.0:
+            break
+        # 估算偏晚，极小在窗口之前
+        tStart = max(tStart - 0.1 * tSynodic, 0.0)
+    if stillClosing:
+        print(f"警告: {maxHours:.0f} 小时内距离仍在减小，未找到最近点")
+
+    times = tStart + chaserRec.times() * macros.NANO2SEC
+    interior = np.arange(1, len(relDist) - 1)
+    localMin = interior[(relDist[interior] <= relDist[interior - 1]) & (relDist[interior] <= relDist[interior + 1])]
+    if len(localMin) == 0:
+        localMin = np.array([np.argmin(relDist)])
+    candidates = localMin[np.argsort(relDist[localMin])[:nCandidates]]
+
+    # 2. 细化：只在候选极小附近用细步长重算
+    minDist, tca = np.inf, np.nan
+    for k in candidates:
+        k0 = max(k - 1, 0)
+        t0 = times[k0]
+        span = times[min(k + 1, len(times) - 1)] - t0
+        fineSim, fineChaserRec, fineTargetRec = create_rendezvous_sim(
+            (chaserRec.r_BN_N[k0], chaserRec.v_BN_N[k0]),
+            (targetRec.r_BN_N[k0], targetRec.v_BN_N[k0]),
+            fineStep, fineStep)
+        fineSim.ConfigureStopTime(macros.sec2nano(span))
+        fineSim.ExecuteSimulation()
+        fineDist = relative_distance(fineChaserRec, fineTargetRec)
+        j = np.argmin(fineDist)
+        if fineDist[j] < minDist:
+            minDist = fineDist[j]
+            tca = t0 + fineChaserRec.times()[j] * macros.NANO2SEC
+
+    print(f"\n--- 粗细搜索报告 ---")
+    print(f"粗搜索积分窗口: {tStart / 3600.0:.2f} - {tStop / 3600.0:.2f} 小时")
+    print(f"最小相对距离: {minDist/1000.0:.2f} km")
+    print(f"最近窗口时间: {tca / 3600.0:.2f} 小时")
+    return minDist, tca
+
+
+def simulate_rendezvous_sandbox(stopDistance=None, adaptive=False, checkpointDir=None):
+    """
+    300 小时轨道相位仿真，只做积分与记录，报告见 :func:`run_rendezvous_sandbox`。
+
+    Args:
+        checkpointDir (str): 检查点目录；每隔 ``CHECKPOINT_INTERVAL_SEC`` 保存一次，
+            目录中已有检查点时从最近一个续跑（中断后重新调用即可）。最近的检查点已到全程终点时重新完整运行；
+            续跑不写 Vizard 记录，以免覆盖完整运行的记录
+
+    Returns:
+        tuple: ``(recorders, values)``，``values`` 含停止条件报告、步长切换记录与续跑起点
+    """
+    builder = rendezvous_builder()
+    models = {}
+    initialStates = {"Chaser-Sat": (CHASER_R0, CHASER_V0), "Target-Sat": (TARGET_R0, TARGET_V0)}
+    # 场景（描述与初始状态）、停止条件与步长调度的配置随检查点保存，配置不同的检查点不能续跑
+    settings = {"scenario": scenario_key({"spec": RENDEZVOUS_SPEC, "initialStates": initialStates}),
+                "stopDistance": stopDistance, "adaptive": adaptive, "adaptiveBands": ADAPTIVE_BANDS}
+
+    def setup(scenario):
+        scSim = scenario.scSim
+        scSim.SetProgressBar(True)
+        if stopDistance is not None:
+            models["stop"] = stop_on_distance(scSim, scenario.spacecraft["Chaser-Sat"].scStateOutMsg,
+                                              scenario.spacecraft["Target-Sat"].scStateOutMsg,
+                                              stopDistance, checkSec=60.0)
+        if adaptive:
+            rule = DistanceRule(scenario.spacecraft["Chaser-Sat"].scStateOutMsg,
+                                scenario.spacecraft["Target-Sat"].scStateOutMsg,
+                                ADAPTIVE_BANDS, coarseSec=60.0)
+            models["controller"] = add_rate_controller(scSim, SIM_TASK_NAME, rule)
+
+    # 1-7. 创建仿真容器、进程/任务 (步长 60.0 秒)、航天器、引力体、记录器与可视化
+    durationSec = RENDEZVOUS_SPEC["durationSec"]
+    simulationTime = macros.sec2nano(durationSec)
+    offsetSec = 0.0
+    checkpoint = None
+    if checkpointDir is not None and list_checkpoints(checkpointDir):
+        checkpoint = load_checkpoint(checkpointDir)
+        if checkpoint.timeSec >= durationSec:
+            print(f"{checkpointDir} 中的运行已完成，重新完整运行")
+            checkpoint = None
+    if checkpoint is not None:
+        print(f"从 {checkpoint.timeSec / 3600.0:.2f} 小时的检查点续跑（不写 Vizard 记录）")
+        resumed = resume(builder, checkpoint, modify=setup, checkpointDir=checkpointDir,
+                         intervalSec=CHECKPOINT_INTERVAL_SEC, run=False, settings=settings,
+                         stepSec=60.0, sampleSec=300.0, saveFile=None)
+        scenario, recorders, offsetSec = resumed.scenario, resumed.recorders, resumed.offsetSec
+        simulationTime -= checkpoint.timeNanos
+    else:
+        scenario = builder.build(initialStates, stepSec=60.0, sampleSec=300.0, saveFile="LEO_Rendezvous",
+                                 initialize=False)
+        setup(scenario)
+        if checkpointDir is not None:
+            add_checkpointer(scenario, checkpointDir, CHECKPOINT_INTERVAL_SEC, settings=settings)
+        scenario.scSim.InitializeSimulation()
+        recorders = scenario.recorders
+    scSim = scenario.scSim
+
+    # 8. 执行
     scSim.ConfigureStopTime(simulationTime)
-    
+
     print(f"正在启动 300 小时轨道相位仿真...")
     scSim.ExecuteSimulation()
     print(f"仿真顺利完成！")
+    stop, controller = models.get("stop"), models.get("controller")
+    stopState = None
+    if stop is not None and stop.triggered:
+        stop.time += offsetSec
+        # 记录器每 300 s 采样一次，触发时刻的状态单独保存，报告中的距离才与停止值一致
+        stopState = {"time": stop.time}
+        for name, sc in scenario.spacecraft.items():
+            state = sc.scStateOutMsg.read()
+            stopState[name] = [list(state.r_BN_N), list(state.v_BN_N)]
+    values = {"stopReport": stop.report() if stop is not None else None,
+              "stopState": stopState,
+              "resumedFromSec": offsetSec if offsetSec > 0.0 else None,
+              "switches": [(t + offsetSec, step) for t, step in controller.switches[1:]]
+              if controller is not None else []}
+    return recorders, values
+
+
+def fork_rendezvous(checkpointDir, forkHours=240.0, burns=(-0.05, 0.0, 0.05)):
+    """
+    从 ``forkHours`` 之前最近的检查点分出若干沿迹机动分支，比较各分支的最近接近。
+    检查点之前的 ``forkHours`` 小时只积分一次（由 ``checkpointDir`` 中已有的运行提供）。
+
+    Args:
+        burns (tuple): 追踪星沿速度方向的脉冲 (m/s)
+
+    Returns:
+        dict: 脉冲 → ``(tca, missDistance)``
+    """
+    def along_track(dv):
+        def modify(scenario):
+            hub = scenario.spacecraft["Chaser-Sat"].hub
+            v = np.ravel(hub.v_CN_NInit)
+            hub.v_CN_NInit = v + dv * v / np.linalg.norm(v)
+        return modify
+
+    checkpoint = load_checkpoint(checkpointDir, forkHours * 3600.0)
+    print(f"从 {checkpoint.timeSec / 3600.0:.2f} 小时的检查点分出 {len(burns)} 个分支")
+    runs = fork(rendezvous_builder(), checkpoint, {dv: along_track(dv) for dv in burns},
+                durationSec=300.0 * 3600.0, stepSec=60.0, sampleSec=300.0, saveFile=None)
+    results = {}
+    for dv, run in runs.items():
+        chaserRec, targetRec = run.recorders["Chaser-Sat"], run.recorders["Target-Sat"]
+        tca, missDist = closest_approach(chaserRec.times() * macros.NANO2SEC,
+                                         chaserRec.r_BN_N, chaserRec.v_BN_N,
+                                         targetRec.r_BN_N, targetRec.v_BN_N)
+        print(f"脉冲 {dv:+.3f} m/s: 最近接近 {tca / 3600.0:.4f} 小时, {missDist / 1000.0:.3f} km")
+        results[dv] = (tca, missDist)
+    return results
+
+
+def run_rendezvous_sandbox(stopDistance=None, adaptive=False, cache=None, checkpointDir=None):
+    """
+    300 小时轨道相位仿真与报告。
+
+    Args:
+        stopDistance (float): 相对距离阈值 (m)；给出时距离首次低于阈值即提前结束仿真
+        adaptive (bool): 是否按相对距离切换步长（见 ``ADAPTIVE_BANDS``），交会附近细化积分
+        cache (ResultCache): 结果缓存；场景输入与仿真代码不变时直接载入记录数据，只重做后处理
+        checkpointDir (str): 检查点目录，见 :func:`simulate_rendezvous_sandbox`
+    """
+    # 缓存只保存记录器，命中时磁盘上的 Vizard 记录可能来自其他运行
+    vizWritten = True
+    if cache is None:
+        recorders, values = simulate_rendezvous_sandbox(stopDistance, adaptive, checkpointDir)
+    else:
+        key = scenario_key({"spec": RENDEZVOUS_SPEC, "stopDistance": stopDistance, "adaptive": adaptive,
+                            "adaptiveBands": ADAPTIVE_BANDS},
+                           code=[scenarioBuilder, stopConditions, multiRate, rendezvous_builder,
+                                 simulate_rendezvous_sandbox])
+        cached = cache.get(key)
+        if cached is None:
+            recorders, values = simulate_rendezvous_sandbox(stopDistance, adaptive, checkpointDir)
+            cached = cache.put(key, recorders, values=values)
+        else:
+            print(f"载入缓存的仿真结果 ({key[:12]})")
+            vizWritten = False
+        recorders, values = cached.recorders, cached.values
+    chaserRec, targetRec = recorders["Chaser-Sat"], recorders["Target-Sat"]
+    if values["stopReport"] is not None:
+        print(values["stopReport"])
+    for t, step in values["switches"]:
+        print(f"{t / 3600.0:.4f} 小时: 步长切换为 {step:g} s")
+
+    times = chaserRec.times() * macros.NANO2SEC
+    rC, vC = chaserRec.r_BN_N, chaserRec.v_BN_N
+    rT, vT = targetRec.r_BN_N, targetRec.v_BN_N
+    stopState = values["stopState"]
+    if stopState is not None and stopState["time"] > times[-1]:
+        # 提前停止时补上触发时刻的状态
+        times = np.append(times, stopState["time"])
+        rC = np.vstack([rC, stopState["Chaser-Sat"][0]])
+        vC = np.vstack([vC, stopState["Chaser-Sat"][1]])
+        rT = np.vstack([rT, stopState["Target-Sat"][0]])
+        vT = np.vstack([vT, stopState["Target-Sat"][1]])
+    relDist = np.linalg.norm(rC - rT, axis=1)
 
-    posChaser = chaserRec.r_BN_N
-    posTarget = targetRec.r_BN_N
-    relDist = np.linalg.norm(posChaser - posTarget, axis=1)
-    
     minDist = np.min(relDist)
-    minTimeHrs = chaserRec.times()[np.argmin(relDist)] * macros.NANO2SEC / 3600.0
+    minTimeHrs = times[np.argmin(relDist)] / 3600.0
+
+    # 采样间隔内用 Hermite 插值细化最近点
+    tca, missDist = closest_approach(times, rC, vC, rT, vT)
 
     print(f"\n--- 仿真沙盒报告 ---")
     print(f"最小相对距离: {minDist/1000.0:.2f} km")
     print(f"最近窗口时间: {minTimeHrs:.2f} 小时")
+    print(f"插值最小相对距离: {missDist/1000.0:.3f} km")
+    print(f"最近接近时刻 (TCA): {tca / 3600.0:.4f} 小时")
+
+    # 场景中全部航天器两两筛查（多星场景同样适用）
+    for nameA, nameB, t, d, _ in screen_recorders(recorders, CONJUNCTION_THRESHOLD, MU_EARTH):
+        print(f"交会: {nameA} - {nameB} 于 {t / 3600.0:.4f} 小时, 最小距离 {d / 1000.0:.3f} km")
+
+    # Vizard 记录按回放误差抽稀，最近接近时刻前后保留原始帧
+    vizFile = os.path.join("_VizFiles", "LEO_Rendezvous_UnityViz.bin")
+    if not vizWritten:
+        print("结果来自缓存，本次未写 Vizard 记录，跳过抽稀")
+    elif values["resumedFromSec"] is not None:
+        print(f"从 {values['resumedFromSec'] / 3600.0:.2f} 小时续跑，本次未写 Vizard 记录，跳过抽稀")
+    elif os.path.exists(vizFile):
+        outFile, info = decimate_recording(vizFile, keepTimes=[tca])
+        if outFile is None:
+            print(f"Vizard 记录抽稀: {info['frames']} 帧均超出回放误差容差，保留原记录")
+        else:
+            print(f"Vizard 记录抽稀: {info['frames']} -> {info['keptFrames']} 帧, "
+                  f"{info['inputBytes'] / 1e6:.2f} MB -> {info['outputBytes'] / 1e6:.3f} MB ({outFile})")
 
 if __name__ == "__main__":
-    run_rendezvous_sandbox()
\ No newline at end of file
+    # 脚本的主要产物是 Vizard 记录，缓存命中时不会写出；需要只重做报告时传入 cache=ResultCache()
+    run_rendezvous_sandbox()
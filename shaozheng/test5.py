@@ -15,190 +15,80 @@ AI缺乏训练以及合适样本参考的情况下真写不来（涉及到了多
 """
 
 
-import numpy as np
-import matplotlib.pyplot as plt
-
-from Basilisk.utilities import (
-    SimulationBaseClass,
-    macros,
-    orbitalMotion,
-    simIncludeGravBody,
-    vizSupport
-)
-from Basilisk.simulation import spacecraft, spacecraftLocation
-from Basilisk.topLevelModules import pyswice
-from Basilisk.utilities.pyswice_spk_utilities import spkRead
-from datetime import datetime, timedelta
-
-
-def run(show_plots=True):
-
-    # ==================================================
-    # 1. 仿真基础设置
-    # ==================================================
-    simTaskName = "simTask"
-    simProcessName = "simProcess"
-
-    scSim = SimulationBaseClass.SimBaseClass()
-    scSim.SetProgressBar(True)
-    dynProcess = scSim.CreateNewProcess(simProcessName)
+import os
 
-    timeStep = macros.sec2nano(180.0)   # 180 秒
-    dynProcess.addTask(scSim.CreateNewTask(simTaskName, timeStep))
-
-    simTime = macros.day2nano(30)    # 仿真 30 天
-
-    # ==================================================
-    # 2. 引力环境：地球 + 月球
-    # ==================================================
-    gravFactory = simIncludeGravBody.gravBodyFactory()
-
-    earth = gravFactory.createEarth()
-    earth.isCentralBody = True
-
-    moon = gravFactory.createMoon()
-    moon.isCentralBody = False
+import matplotlib.pyplot as plt
 
-    muEarth = earth.mu
-    muMoon = moon.mu
+from Basilisk.utilities import macros, vizSupport
+from datetime import datetime
+
+from accessSupport import AccessGeometry, extract_windows, make_access_fn, to_utc
+from scenarioBuilder import ScenarioBuilder
+from stopConditions import stop_on_access
+
+SCENARIO_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios", "geo_llo_access.json")
+SPICE_TIME_FORMAT = "%Y %B %d %H:%M:%S.%f"
+
+
+def run(show_plots=True, stopAfterFirstWindow=False):
+    """
+    GEO → LLO 通信窗口仿真（30 天）。
+
+    Args:
+        show_plots (bool): 是否绘制 Access 时间轴
+        stopAfterFirstWindow (bool): 第一个通信窗口结束即停止仿真（功能性验证只需一个窗口）
+    """
+
+    # ==================================================
+    # 1-6. 场景构建（见 scenarios/geo_llo_access.json）
+    #   引力环境：地球 + 月球，月球按 SPICE 星历运动
+    #   GEO 卫星（地心根数）、LLO 卫星（月心根数，按起始历元的月球状态换算到地心）
+    #   GEO → LLO 通信几何（Access）、两星状态记录（用于窗口边沿细化）
+    # SPICE 内核交由进程级管理器加载，with 块结束时即使异常也归还引用
+    # ==================================================
+    with ScenarioBuilder(SCENARIO_FILE) as builder:
+        scenario = builder.build(initialize=False)
+        scSim = scenario.scSim
+        scSim.SetProgressBar(True)
+        timeStep = macros.sec2nano(builder.spec["stepSec"])
+
+        access, (accessRec,) = scenario.access["GEO_to_LLO_Access"]
+        geoRec = scenario.recorders["GEO"]
+        lloRec = scenario.recorders["LLO"]
+
+        # ==================================================
+        # 7. Unity 可视化
+        # ==================================================
+        if scenario.viz is not None:
+            vizSupport.addLocation(
+                scenario.viz,
+                stationName="GEO_Antenna",
+                parentBodyName="GEO",
+                r_GP_P=[1.5, 0.0, 0.0],
+                gHat_P=[1.0, 0.0, 0.0],
+                fieldOfView=2 * access.theta,
+                range=access.maximumRange,
+                color="cyan"
+            )
+
+            scenario.viz.settings.showLocationCommLines = 1
+            scenario.viz.settings.showLocationCones = 1
+            scenario.viz.settings.showLocationLabels = 1
+
+        # ==================================================
+        # 8. 运行仿真
+        # ==================================================
+        stopMonitor = None
+        if stopAfterFirstWindow:
+            stopMonitor = stop_on_access(scSim, access.accessOutMsgs[0], macros.NANO2SEC * timeStep, rising=False)
+
+        scSim.InitializeSimulation()
+        scenario.run()
+        if stopMonitor is not None:
+            print(stopMonitor.report())
 
     # UTC 初始时间（全仿真时间锚点）
-    timeInitString = "2026 January 04 15:00:00.0"
-    spiceTimeFormat = "%Y %B %d %H:%M:%S.%f"
-    timeInit = datetime.strptime(timeInitString, spiceTimeFormat)
-
-    spiceObject = gravFactory.createSpiceInterface(
-        time=timeInitString,
-        epochInMsg=True
-    )
-    spiceObject.zeroBase = 'Earth'
-    scSim.AddModelToTask(simTaskName, spiceObject, 1)
-
-    pyswice.furnsh_c(spiceObject.SPICEDataPath + 'de430.bsp')
-    pyswice.furnsh_c(spiceObject.SPICEDataPath + 'naif0012.tls')
-    pyswice.furnsh_c(spiceObject.SPICEDataPath + 'de-403-masses.tpc')
-    pyswice.furnsh_c(spiceObject.SPICEDataPath + 'pck00010.tpc')
-
-    # ==================================================
-    # 3. GEO 卫星
-    # ==================================================
-    geo = spacecraft.Spacecraft()
-    geo.ModelTag = "GEO"
-
-    geo.hub.mHub = 3500.0
-    geo.hub.IHubPntBc_B = np.diag([2500., 1800., 2000.])
-
-    gravFactory.addBodiesTo(geo)
-    scSim.AddModelToTask(simTaskName, geo)
-
-    oe_geo = orbitalMotion.ClassicElements()
-    oe_geo.a = 42164e3
-    oe_geo.e = 1e-4
-    oe_geo.i = 0.1 * macros.D2R
-    oe_geo.Omega = 90.0 * macros.D2R
-    oe_geo.omega = 0.0
-    oe_geo.f = 0.0
-
-    rGEO, vGEO = orbitalMotion.elem2rv(muEarth, oe_geo)
-    geo.hub.r_CN_NInit = rGEO
-    geo.hub.v_CN_NInit = vGEO
-    geo.hub.sigma_BNInit = [[0.0], [0.0], [0.0]]
-    geo.hub.omega_BN_BInit = [[0.0], [0.0], [0.0]]
-
-    # ==================================================
-    # 4. LLO 卫星
-    # ==================================================
-    llo = spacecraft.Spacecraft()
-    llo.ModelTag = "LLO"
-
-    llo.hub.mHub = 500.0
-    llo.hub.IHubPntBc_B = np.diag([300., 250., 200.])
-
-    gravFactory.addBodiesTo(llo)
-    scSim.AddModelToTask(simTaskName, llo)
-
-    oe_llo = orbitalMotion.ClassicElements()
-    oe_llo.a = (1738.0 + 100.0) * 1e3
-    oe_llo.e = 0.01
-    oe_llo.i = 90.0 * macros.D2R
-    oe_llo.Omega = 0.0
-    oe_llo.omega = 0.0
-    oe_llo.f = 0.0
-
-    rLLO_M, vLLO_M = orbitalMotion.elem2rv(muMoon, oe_llo)
-
-    moonState = 1000 * spkRead(
-        'moon',
-        timeInitString,
-        'J2000',
-        'earth'
-    )
-
-    rMoon_N = moonState[0:3]
-    vMoon_N = moonState[3:6]
-
-    llo.hub.r_CN_NInit = rMoon_N + rLLO_M
-    llo.hub.v_CN_NInit = vMoon_N + vLLO_M
-    llo.hub.sigma_BNInit = [[0.0], [0.0], [0.0]]
-    llo.hub.omega_BN_BInit = [[0.0], [0.0], [0.0]]
-
-    # ==================================================
-    # 5. GEO → LLO 通信几何（Access）
-    # ==================================================
-    access = spacecraftLocation.SpacecraftLocation()
-    access.ModelTag = "GEO_to_LLO_Access"
-
-    access.primaryScStateInMsg.subscribeTo(geo.scStateOutMsg)
-    access.addSpacecraftToModel(llo.scStateOutMsg)
-
-    access.aHat_B = [1, 0, 0]
-    # 放宽波束，增大范围
-    access.theta = np.radians(20.0)
-    access.maximumRange = 5.0e8
-
-    access.rEquator = earth.radEquator
-    access.rPolar = earth.radEquator * 0.996
-
-    scSim.AddModelToTask(simTaskName, access)
-
-    # ==================================================
-    # 6. 数据记录
-    # ==================================================
-    accessRec = access.accessOutMsgs[0].recorder()
-    scSim.AddModelToTask(simTaskName, accessRec)
-
-    # ==================================================
-    # 7. Unity 可视化
-    # ==================================================
-    if vizSupport.vizFound:
-        viz = vizSupport.enableUnityVisualization(
-            scSim,
-            simTaskName,
-            [geo, llo],
-            saveFile="GEO_LLO_Access"
-        )
-
-        vizSupport.addLocation(
-            viz,
-            stationName="GEO_Antenna",
-            parentBodyName="GEO",
-            r_GP_P=[1.5, 0.0, 0.0],
-            gHat_P=[1.0, 0.0, 0.0],
-            fieldOfView=2 * access.theta,
-            range=access.maximumRange,
-            color="cyan"
-        )
-
-        viz.settings.showLocationCommLines = 1
-        viz.settings.showLocationCones = 1
-        viz.settings.showLocationLabels = 1
-
-    # ==================================================
-    # 8. 运行仿真
-    # ==================================================
-    scSim.InitializeSimulation()
-    scSim.ConfigureStopTime(simTime)
-    scSim.ExecuteSimulation()
+    timeInit = datetime.strptime(builder.spec["spice"]["time"], SPICE_TIME_FORMAT)
 
     # ==================================================
     # 9. 通信窗口 → UTC（实现 A）
@@ -206,29 +96,17 @@ def run(show_plots=True):
     times = accessRec.times() * macros.NANO2SEC
     hasAccess = accessRec.hasAccess
 
-    accessWindows = []
-    inAccess = False
-    tStart = 0.0
-
-    for t, a in zip(times, hasAccess):
-        if a and not inAccess:
-            tStart = t
-            inAccess = True
-        elif not a and inAccess:
-            accessWindows.append((tStart, t))
-            inAccess = False
-
-    if inAccess:
-        accessWindows.append((tStart, times[-1]))
+    accessFn = make_access_fn(AccessGeometry.from_module(access), times, geoRec, lloRec)
+    start, stop, duration = extract_windows(times, hasAccess, access_fn=accessFn)
+    utcStart = to_utc(timeInit, start).astype(datetime)
+    utcEnd = to_utc(timeInit, stop).astype(datetime)
 
     print("\nGEO → LLO 通信窗口（UTC）：")
-    for k, (t0, t1) in enumerate(accessWindows):
-        utcStart = timeInit + timedelta(seconds=t0)
-        utcEnd = timeInit + timedelta(seconds=t1)
+    for k in range(len(start)):
         print(
             f"Window {k+1}: "
-            f"{utcStart}  →  {utcEnd}   "
-            f"({(t1-t0)/60:.1f} min)"
+            f"{utcStart[k]}  →  {utcEnd[k]}   "
+            f"({duration[k]/60:.1f} min)"
         )
 
     # ==================================================
@@ -243,15 +121,6 @@ def run(show_plots=True):
         plt.grid(True)
         plt.show()
 
-    # ==================================================
-    # 11. 卸载 SPICE
-    # ==================================================
-    gravFactory.unloadSpiceKernels()
-    pyswice.unload_c(spiceObject.SPICEDataPath + 'de430.bsp')
-    pyswice.unload_c(spiceObject.SPICEDataPath + 'naif0012.tls')
-    pyswice.unload_c(spiceObject.SPICEDataPath + 'de-403-masses.tpc')
-    pyswice.unload_c(spiceObject.SPICEDataPath + 'pck00010.tpc')
-
 
 if __name__ == "__main__":
     run(True)
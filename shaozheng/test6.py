@@ -2,75 +2,33 @@ import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 
-from Basilisk.utilities import (
-    SimulationBaseClass,
-    macros,
-    orbitalMotion,
-    simIncludeGravBody,
-    vizSupport
-)
-from Basilisk.simulation import spacecraft, spacecraftLocation
-from Basilisk.topLevelModules import pyswice
+from Basilisk.utilities import macros, orbitalMotion, simIncludeGravBody
 from Basilisk.utilities.pyswice_spk_utilities import spkRead
 
+import spiceKernels
+from accessSupport import AccessGeometry, extract_windows, make_access_fn, to_utc
+from multiRate import WindowRule, add_rate_controller
+from orbitalMotionBatch import keplerPropagate
+from scenarioBuilder import SIM_TASK_NAME, ScenarioBuilder
+from stopConditions import stop_on_access
+from trajectoryPlayback import HermiteInterpolator
 
-def run(show_plots=True):
+START_TIME_UTC = "2026 January 04 15:00:00.0"
+SPICE_TIME_FORMAT = "%Y %B %d %H:%M:%S.%f"
 
-    # ==========================================================
-    # 1. 仿真基础配置
-    # ==========================================================
-    simTaskName = "dynTask"
-    simProcessName = "dynProcess"
-
-    scSim = SimulationBaseClass.SimBaseClass()
-    scSim.SetProgressBar(True)
-
-    dynProcess = scSim.CreateNewProcess(simProcessName)
-    timeStep = macros.sec2nano(120.0)
-    dynProcess.addTask(scSim.CreateNewTask(simTaskName, timeStep))
-
-    simTime = macros.day2nano(20)
-
-    # ==========================================================
-    # 2. 引力环境 + SPICE
-    # ==========================================================
-    gravFactory = simIncludeGravBody.gravBodyFactory()
-
-    earth = gravFactory.createEarth()
-    earth.isCentralBody = True
-
-    moon = gravFactory.createMoon()
-    moon.isCentralBody = False
-
-    muEarth = earth.mu
-    muMoon = moon.mu
+# GEO → LLO 天线参数
+ACCESS_AHAT_B = [1, 0, 0]
+ACCESS_THETA = np.deg2rad(25.0)
+ACCESS_MAX_RANGE = 6.0e8
+POLAR_FLATTENING = 0.996
 
-    startTimeUTC = "2026 January 04 15:00:00.0"
-    timeInit = datetime.strptime(startTimeUTC, "%Y %B %d %H:%M:%S.%f")
+# 多速率步长：预筛窗口边沿前后 EDGE_PAD_SEC 内用细步长
+FINE_STEP_SEC = 10.0
+EDGE_PAD_SEC = 1800.0
 
-    spice = gravFactory.createSpiceInterface(
-        time=startTimeUTC,
-        epochInMsg=True
-    )
-    spice.zeroBase = 'Earth'
-    scSim.AddModelToTask(simTaskName, spice)
-
-    pyswice.furnsh_c(spice.SPICEDataPath + "de430.bsp")
-    pyswice.furnsh_c(spice.SPICEDataPath + "naif0012.tls")
-    pyswice.furnsh_c(spice.SPICEDataPath + "pck00010.tpc")
-
-    # ==========================================================
-    # 3. GEO 观测卫星
-    # ==========================================================
-    geo = spacecraft.Spacecraft()
-    geo.ModelTag = "GEO_Obs"
-
-    geo.hub.mHub = 3000
-    geo.hub.IHubPntBc_B = np.diag([2000, 2200, 1800])
-
-    gravFactory.addBodiesTo(geo)
-    scSim.AddModelToTask(simTaskName, geo)
 
+def geo_elements():
+    """GEO 地心轨道根数"""
     oe_geo = orbitalMotion.ClassicElements()
     oe_geo.a = 42164e3
     oe_geo.e = 5e-5
@@ -78,26 +36,11 @@ def run(show_plots=True):
     oe_geo.Omega = 60 * macros.D2R
     oe_geo.omega = 0.0
     oe_geo.f = 0.0
+    return oe_geo
 
-    r_geo, v_geo = orbitalMotion.elem2rv(muEarth, oe_geo)
-
-    geo.hub.r_CN_NInit = r_geo
-    geo.hub.v_CN_NInit = v_geo
-    geo.hub.sigma_BNInit = [[0], [0], [0]]
-    geo.hub.omega_BN_BInit = [[0], [0], [0]]
-
-    # ==========================================================
-    # 4. LLO 目标卫星（月心 → 地心）
-    # ==========================================================
-    llo = spacecraft.Spacecraft()
-    llo.ModelTag = "LLO_Target"
-
-    llo.hub.mHub = 600
-    llo.hub.IHubPntBc_B = np.diag([300, 280, 250])
-
-    gravFactory.addBodiesTo(llo)
-    scSim.AddModelToTask(simTaskName, llo)
 
+def llo_elements():
+    """LLO 月心轨道根数"""
     oe_llo = orbitalMotion.ClassicElements()
     oe_llo.a = 1838e3
     oe_llo.e = 0.005
@@ -105,65 +48,122 @@ def run(show_plots=True):
     oe_llo.Omega = 30 * macros.D2R
     oe_llo.omega = 0.0
     oe_llo.f = 180 * macros.D2R
+    return oe_llo
 
-    rLLO_M, vLLO_M = orbitalMotion.elem2rv(muMoon, oe_llo)
-
-    moonState = 1000 * spkRead(
-        'moon',
-        startTimeUTC,
-        'J2000',
-        'earth'
-    )
-
-    rMoon = moonState[0:3]
-    vMoon = moonState[3:6]
-
-    llo.hub.r_CN_NInit = rMoon + rLLO_M
-    llo.hub.v_CN_NInit = vMoon + vLLO_M
-    llo.hub.sigma_BNInit = [[0], [0], [0]]
-    llo.hub.omega_BN_BInit = [[0], [0], [0]]
-
-    # ==========================================================
-    # 5. GEO → LLO 建链检测
-    # ==========================================================
-    access = spacecraftLocation.SpacecraftLocation()
-    access.ModelTag = "GEO_LLO_Access"
-
-    access.primaryScStateInMsg.subscribeTo(geo.scStateOutMsg)
-    access.addSpacecraftToModel(llo.scStateOutMsg)
-
-    access.aHat_B = [1, 0, 0]
-    access.theta = np.deg2rad(25.0)
-    access.maximumRange = 6.0e8
-
-    access.rEquator = earth.radEquator
-    access.rPolar = earth.radEquator * 0.996
-
-    scSim.AddModelToTask(simTaskName, access)
 
-    # ==========================================================
-    # 6. 数据记录
-    # ==========================================================
-    accessRec = access.accessOutMsgs[0].recorder()
-    scSim.AddModelToTask(simTaskName, accessRec)
+def prescreen_access(days=90.0, stepSec=600.0, moonStepSec=3600.0):
+    """
+    不运行 Basilisk 动力学的快速预筛：GEO、LLO 用二体解析传播，月球用 SPICE 星历
+    （每 ``moonStepSec`` 读一次再 Hermite 插值），按 SpacecraftLocation 的判据批量计算 access。
 
-    # ==========================================================
-    # 7. 可视化（可选）
-    # ==========================================================
-    if vizSupport.vizFound:
-        viz = vizSupport.enableUnityVisualization(
-            scSim,
-            simTaskName,
-            [geo, llo],
-            saveFile="GEO_LLO_Link"
-        )
+    Returns:
+        tuple: ``(start, stop, duration)`` 窗口数组，单位 s
+    """
+    timeInit = datetime.strptime(START_TIME_UTC, SPICE_TIME_FORMAT)
+    times = np.arange(0.0, days * 86400.0 + stepSec, stepSec)
 
-    # ==========================================================
-    # 8. 运行仿真
-    # ==========================================================
-    scSim.InitializeSimulation()
-    scSim.ConfigureStopTime(simTime)
-    scSim.ExecuteSimulation()
+    gravFactory = simIncludeGravBody.gravBodyFactory()
+    gravFactory.createEarth()
+    gravFactory.createMoon()
+    moonTimes = np.arange(0.0, times[-1] + 2.0 * moonStepSec, moonStepSec)
+    with spiceKernels.spice_interface(gravFactory, START_TIME_UTC):
+        moonStates = np.array([
+            1000 * spkRead('moon', (timeInit + timedelta(seconds=t)).strftime(SPICE_TIME_FORMAT), 'J2000', 'earth')
+            for t in moonTimes])
+    rMoon, _ = HermiteInterpolator(moonTimes, moonStates[:, 0:3], moonStates[:, 3:6]).evaluate(times)
+
+    muEarth = orbitalMotion.MU_EARTH * 1e9
+    muMoon = orbitalMotion.MU_MOON * 1e9
+    r_geo, _ = keplerPropagate(muEarth, geo_elements(), times)
+    rLLO_M, _ = keplerPropagate(muMoon, llo_elements(), times)
+
+    rEquator = orbitalMotion.REQ_EARTH * 1000.0
+    geometry = AccessGeometry(aHat_B=ACCESS_AHAT_B, theta=ACCESS_THETA, maximumRange=ACCESS_MAX_RANGE,
+                              rEquator=rEquator, rPolar=rEquator * POLAR_FLATTENING)
+    hasAccess = geometry.evaluate(r_geo, rMoon + rLLO_M).hasAccess
+    start, stop, duration = extract_windows(times, hasAccess)
+
+    print(f"\n预筛 {days:.0f} 天：{len(start)} 个候选窗口，总时长 {np.sum(duration) / 3600:.2f} 小时")
+    return start, stop, duration
+
+
+def _elements_spec(oe):
+    """ClassicElements → 场景描述中的根数（角度为度）"""
+    return {"a": oe.a, "e": oe.e, "i": oe.i * macros.R2D, "Omega": oe.Omega * macros.R2D,
+            "omega": oe.omega * macros.R2D, "f": oe.f * macros.R2D}
+
+
+def link_spec():
+    """GEO → LLO 建链场景描述（见 scenarioBuilder），轨道与天线参数取自本模块常量"""
+    return {
+        "name": "GEO_LLO_Link",
+        "stepSec": 120.0,
+        "durationSec": 20 * 86400.0,
+        "bodies": [{"name": "earth", "central": True}, {"name": "moon"}],
+        "spice": {"time": START_TIME_UTC, "zeroBase": "Earth"},
+        "spacecraft": [
+            {"name": "GEO_Obs", "mass": 3000.0, "inertia": [2000.0, 2200.0, 1800.0],
+             "elements": _elements_spec(geo_elements())},
+            # 月心根数，按起始历元的月球状态换算到地心
+            {"name": "LLO_Target", "mass": 600.0, "inertia": [300.0, 280.0, 250.0], "centralBody": "moon",
+             "elements": _elements_spec(llo_elements())},
+        ],
+        # 两星状态用于窗口边沿细化
+        "recorders": [{"spacecraft": "GEO_Obs"}, {"spacecraft": "LLO_Target"}],
+        "access": [{"name": "GEO_LLO_Access", "primary": "GEO_Obs", "targets": ["LLO_Target"],
+                    "aHat_B": ACCESS_AHAT_B, "thetaDeg": float(np.degrees(ACCESS_THETA)),
+                    "maximumRange": ACCESS_MAX_RANGE, "occultingBody": "earth",
+                    "polarFlattening": 1.0 - POLAR_FLATTENING}],
+        "viz": {"saveFile": "GEO_LLO_Link"},
+    }
+
+
+def run(show_plots=True, stopAfterFirstWindow=False, adaptiveStep=False):
+    """
+    GEO → LLO 建链仿真（20 天）。
+
+    Args:
+        show_plots (bool): 是否绘制 Access 时间轴
+        stopAfterFirstWindow (bool): 第一个通信窗口结束即停止仿真（功能性验证只需一个窗口）
+        adaptiveStep (bool): 是否在预筛得到的窗口边沿附近切换到细步长，其余时段保持 120 s
+    """
+
+    # ==========================================================
+    # 1-7. 场景构建（见 link_spec）：地球 + 月球（SPICE 星历）、GEO 观测卫星、
+    #      LLO 目标卫星、GEO → LLO 建链检测、数据记录、可视化
+    # SPICE 内核交由进程级管理器加载，with 块结束时即使异常也归还引用
+    # ==========================================================
+    with ScenarioBuilder(link_spec()) as builder:
+        scenario = builder.build(initialize=False)
+        scSim = scenario.scSim
+        scSim.SetProgressBar(True)
+        timeStep = macros.sec2nano(builder.spec["stepSec"])
+        simTime = macros.sec2nano(builder.spec["durationSec"])
+
+        access, (accessRec,) = scenario.access["GEO_LLO_Access"]
+        geoRec = scenario.recorders["GEO_Obs"]
+        lloRec = scenario.recorders["LLO_Target"]
+
+        # ==========================================================
+        # 8. 运行仿真
+        # ==========================================================
+        if adaptiveStep:
+            edgeStart, edgeStop, _ = prescreen_access(days=simTime * macros.NANO2SEC / 86400.0)
+            edges = np.concatenate([edgeStart, edgeStop])
+            rule = WindowRule(np.column_stack([edges, edges]), FINE_STEP_SEC,
+                              timeStep * macros.NANO2SEC, padSec=EDGE_PAD_SEC)
+            add_rate_controller(scSim, SIM_TASK_NAME, rule)
+
+        stopMonitor = None
+        if stopAfterFirstWindow:
+            stopMonitor = stop_on_access(scSim, access.accessOutMsgs[0], macros.NANO2SEC * timeStep, rising=False)
+
+        scSim.InitializeSimulation()
+        scenario.run()
+        if stopMonitor is not None:
+            print(stopMonitor.report())
+
+    timeInit = datetime.strptime(START_TIME_UTC, SPICE_TIME_FORMAT)
 
     # ==========================================================
     # 9. 通信窗口统计
@@ -171,27 +171,18 @@ def run(show_plots=True):
     times = accessRec.times() * macros.NANO2SEC
     accessFlag = accessRec.hasAccess
 
-    windows = []
-    inAccess = False
-
-    for t, a in zip(times, accessFlag):
-        if a and not inAccess:
-            t0 = t
-            inAccess = True
-        elif not a and inAccess:
-            windows.append((t0, t))
-            inAccess = False
-
-    if inAccess:
-        windows.append((t0, times[-1]))
+    accessFn = make_access_fn(AccessGeometry.from_module(access), times, geoRec, lloRec)
+    start, stop, duration = extract_windows(times, accessFlag, access_fn=accessFn)
+    utcStart = to_utc(timeInit, start).astype(datetime)
+    utcEnd = to_utc(timeInit, stop).astype(datetime)
 
     print("\nGEO → LLO 通信窗口：")
-    for i, (t0, t1) in enumerate(windows):
+    for i in range(len(start)):
         print(
             f"Window {i+1}: "
-            f"{timeInit + timedelta(seconds=t0)} → "
-            f"{timeInit + timedelta(seconds=t1)} "
-            f"({(t1-t0)/60:.1f} min)"
+            f"{utcStart[i]} → "
+            f"{utcEnd[i]} "
+            f"({duration[i]/60:.1f} min)"
         )
 
     # ==========================================================
@@ -206,8 +197,6 @@ def run(show_plots=True):
         plt.grid(True)
         plt.show()
 
-    gravFactory.unloadSpiceKernels()
-
 
 if __name__ == "__main__":
     run(True)
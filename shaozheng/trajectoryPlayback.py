@@ -0,0 +1,284 @@
+#
+# trajectoryPlayback.py
+#
+# 表格轨迹（DRO.csv 等）回放用的插值引擎。
+#   - 位置 + 速度三次 Hermite 插值；速度须与位置/时间单位一致（DRO.csv 的速度是 CR3BP 归一化单位，
+#     需给出 velocityScale），构造时用位置差分校验速度，不一致时退回线性插值
+#   - 单调游标：按时间顺序回放时每次查询 O(1) 摊销，不再每步 searchsorted
+#   - evaluate() 一次性向量化计算所有任务时刻的状态，可在仿真开始前预计算
+#   - load_trajectory_table() 只读取需要的列组，并写二进制缓存（.npy，内存映射读取）
+#
+
+import json
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# DRO.csv 列布局：第 0 列时间，其后每个物体 6 列 (x, y, z, vx, vy, vz)
+TABLE_BODIES = ("earth", "moon", "satellite")
+CHUNK_ROWS = 1 << 20
+CACHE_VERSION = 1
+# DRO.csv 位置以地月距离为单位、时间为秒，速度为 CR3BP 归一化单位（地月距离 / 时间单位），
+# 时间单位 sqrt(LU^3 / (mu_E + mu_M)) ≈ 375199 s；回放时速度乘以 DRO_VELOCITY_SCALE
+CR3BP_EARTH_MOON_TU = 375199.0
+DRO_VELOCITY_SCALE = 1.0 / CR3BP_EARTH_MOON_TU
+# 速度与位置差分的相对偏差超过该值时认为单位不一致
+VELOCITY_CHECK_TOLERANCE = 0.1
+
+
+def body_columns(body):
+    """返回物体在表格中的列下标（6 列）。"""
+    k = TABLE_BODIES.index(body)
+    return list(range(1 + 6 * k, 7 + 6 * k))
+
+
+def _cache_paths(file_path, bodies):
+    base = file_path + "." + "-".join(bodies)
+    return base + ".npy", base + ".json"
+
+
+def _read_columns(file_path, bodies):
+    """分块读取所需列，同时流式检查时间列严格递增。"""
+    with open(file_path, "r") as f:
+        n_cols = len(f.readline().split(","))
+    if n_cols < 1 + 6 * len(TABLE_BODIES):
+        raise ValueError("CSV 至少需要 19 列：time + Earth(6) + Moon(6) + Satellite(6)")
+
+    usecols = [0] + [c for body in bodies for c in body_columns(body)]
+    chunks = []
+    t_last = -np.inf
+    for chunk in pd.read_csv(file_path, header=None, usecols=usecols, dtype=np.float64,
+                             chunksize=CHUNK_ROWS, engine="c"):
+        block = chunk[usecols].to_numpy()
+        t = block[:, 0]
+        if t[0] <= t_last or np.any(np.diff(t) <= 0):
+            raise ValueError("时间列必须严格递增")
+        t_last = t[-1]
+        chunks.append(block)
+    if not chunks:
+        raise ValueError("CSV 中没有数据行")
+    return np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
+
+
+def load_trajectory_table(file_path, bodies=("satellite",), use_cache=True):
+    """
+    读取 DRO.csv 格式的星历表。
+
+    只解析 ``bodies`` 对应的列组。首次读取后在数据文件旁写入 ``.npy`` 缓存
+    （以文件 mtime 与大小为键），之后直接内存映射加载，返回的数组均为缓存的零拷贝视图。
+
+    Args:
+        file_path (str): CSV 路径
+        bodies (tuple): ``TABLE_BODIES`` 中的物体名
+        use_cache (bool): 是否读写二进制缓存
+
+    Returns:
+        tuple: ``(times, states)``，``states[body] = (positions, velocities)``，各为 ``(N,3)``
+    """
+    bodies = tuple(bodies)
+    for body in bodies:
+        if body not in TABLE_BODIES:
+            raise ValueError(f"未知物体: {body}，可选 {TABLE_BODIES}")
+
+    stat = os.stat(file_path)
+    key = {"version": CACHE_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+           "bodies": list(bodies)}
+    cache_file, meta_file = _cache_paths(file_path, bodies)
+
+    table = None
+    if use_cache and os.path.exists(cache_file) and os.path.exists(meta_file):
+        with open(meta_file, "r") as f:
+            if json.load(f) == key:
+                table = np.load(cache_file, mmap_mode="r")
+    if table is None:
+        table = _read_columns(file_path, bodies)
+        if use_cache:
+            # 先写临时文件再替换，避免中断时留下损坏的缓存
+            np.save(cache_file + ".tmp.npy", table)
+            os.replace(cache_file + ".tmp.npy", cache_file)
+            with open(meta_file, "w") as f:
+                json.dump(key, f)
+            table = np.load(cache_file, mmap_mode="r")
+
+    times = table[:, 0]
+    states = {}
+    for k, body in enumerate(bodies):
+        c = 1 + 6 * k
+        states[body] = (table[:, c:c + 3], table[:, c + 3:c + 6])
+    return times, states
+
+
+def hermite_weights(s, h):
+    """
+    三次 Hermite 基函数权重。
+
+    Args:
+        s (float or ndarray): 区间内归一化时间 (t - t0) / h，取值 [0, 1]
+        h (float or ndarray): 区间长度 t1 - t0
+
+    Returns:
+        tuple: ``(wr, wv)``，各为 4 个系数组成的元组，依次作用于 (r0, v0, r1, v1)；
+        ``wr`` 给出位置，``wv`` 给出速度（对 t 的导数）
+    """
+    s2 = s * s
+    s3 = s2 * s
+    wr = (2.0 * s3 - 3.0 * s2 + 1.0,
+          (s3 - 2.0 * s2 + s) * h,
+          -2.0 * s3 + 3.0 * s2,
+          (s3 - s2) * h)
+    wv = ((6.0 * s2 - 6.0 * s) / h,
+          3.0 * s2 - 4.0 * s + 1.0,
+          (-6.0 * s2 + 6.0 * s) / h,
+          3.0 * s2 - 2.0 * s)
+    return wr, wv
+
+
+def linear_weights(s, h):
+    """线性插值权重，形式同 :func:`hermite_weights`，速度取区间内的位置差分"""
+    one = np.ones_like(s)
+    zero = np.zeros_like(s)
+    wr = (1.0 - s, zero, s, zero)
+    wv = (-one / h, zero, one / h, zero)
+    return wr, wv
+
+
+def velocity_scale_ratio(times, positions, velocities):
+    """
+    位置差分速度与给定速度之比（模长之比的中位数），单位一致时约为 1。
+
+    DRO.csv 的时间列为秒、速度为 CR3BP 归一化单位，该比值约为 1 / 375200。
+
+    Returns:
+        float: 比值，速度全为零时为 None
+    """
+    times = np.asarray(times, dtype=float)
+    positions = np.asarray(positions, dtype=float)
+    velocities = np.asarray(velocities, dtype=float)
+    # 区间中点的差分速度与两端速度均值比较
+    dt = np.diff(times).reshape((-1,) + (1,) * (positions.ndim - 1))
+    fd = np.linalg.norm(np.diff(positions, axis=0) / dt, axis=-1).ravel()
+    vm = np.linalg.norm(0.5 * (velocities[1:] + velocities[:-1]), axis=-1).ravel()
+    valid = vm > 0.0
+    if not np.any(valid):
+        return None
+    return float(np.median(fd[valid] / vm[valid]))
+
+
+class HermiteInterpolator:
+    """
+    带单调游标的位置/速度三次 Hermite 插值器。
+
+    ``positions``/``velocities`` 的第 0 维对应 ``times``，其余维度任意，
+    例如单个物体 ``(N,3)``，多个物体 ``(N,nBody,3)``。超出时间范围时保持端点状态。
+
+    Args:
+        velocityScale (float): 速度乘以该系数后为 位置单位 / 时间单位
+        checkVelocity (bool): 用位置差分校验缩放后的速度；不一致时告警并退回线性插值
+            （``self.linear`` 为 True，输出速度取位置差分）
+    """
+    def __init__(self, times, positions, velocities, velocityScale=1.0, checkVelocity=True):
+        self.times = np.asarray(times, dtype=float)
+        self.positions = np.asarray(positions, dtype=float)
+        self.velocities = np.asarray(velocities, dtype=float) * velocityScale
+        if len(self.times) < 2:
+            raise ValueError("插值至少需要 2 个轨迹点")
+        if self.positions.shape != self.velocities.shape or self.positions.shape[0] != len(self.times):
+            raise ValueError("位置、速度与时间的长度不一致")
+        self.linear = False
+        if checkVelocity:
+            ratio = velocity_scale_ratio(self.times, self.positions, self.velocities)
+            if ratio is not None and abs(ratio - 1.0) > VELOCITY_CHECK_TOLERANCE:
+                warnings.warn(f"速度与位置差分相差 {ratio:.4g} 倍（velocityScale 应约为 {velocityScale * ratio:.4g}），"
+                              f"改用线性插值")
+                self.linear = True
+        self._cursor = 0
+
+    def _weights(self, s, h):
+        return linear_weights(s, h) if self.linear else hermite_weights(s, h)
+
+    def locate(self, sim_time):
+        """
+        返回 ``sim_time`` 所在区间的左端点下标。
+
+        时间单调前进时只向后移动游标；发生回退时才用二分查找重新定位。
+        """
+        times = self.times
+        idx = self._cursor
+        if sim_time < times[idx]:
+            idx = max(int(np.searchsorted(times, sim_time, side='right')) - 1, 0)
+        last = len(times) - 2
+        while idx < last and sim_time >= times[idx + 1]:
+            idx += 1
+        self._cursor = idx
+        return idx
+
+    def weights(self, sim_time):
+        """
+        计算 ``sim_time`` 的区间下标与插值权重，可复用于同一时间轴上的多组数据。
+
+        Returns:
+            tuple: ``(idx, wr, wv)``，见 :func:`hermite_weights`（退回线性时为 :func:`linear_weights`）
+        """
+        times = self.times
+        sim_time = min(max(sim_time, times[0]), times[-1])
+        idx = self.locate(sim_time)
+        h = times[idx + 1] - times[idx]
+        wr, wv = self._weights((sim_time - times[idx]) / h, h)
+        return idx, wr, wv
+
+    def apply(self, idx, wr, wv, positions=None, velocities=None):
+        """用 :meth:`weights` 的结果组合任意一组（默认本插值器的）位置/速度数据。"""
+        if positions is None:
+            positions, velocities = self.positions, self.velocities
+        r0, r1 = positions[idx], positions[idx + 1]
+        v0, v1 = velocities[idx], velocities[idx + 1]
+        r = wr[0] * r0 + wr[1] * v0 + wr[2] * r1 + wr[3] * v1
+        v = wv[0] * r0 + wv[1] * v0 + wv[2] * r1 + wv[3] * v1
+        return r, v
+
+    def interpolate_state(self, sim_time):
+        """插值得到 ``sim_time`` 时刻的位置与速度。"""
+        return self.apply(*self.weights(sim_time))
+
+    def evaluate(self, sample_times):
+        """
+        向量化地一次计算多个时刻的状态。
+
+        Args:
+            sample_times (ndarray): 任意顺序的时间数组，长度 M
+
+        Returns:
+            tuple: ``(r, v)``，第 0 维长度为 M
+        """
+        times = self.times
+        t = np.clip(np.asarray(sample_times, dtype=float), times[0], times[-1])
+        idx = np.clip(np.searchsorted(times, t, side='right') - 1, 0, len(times) - 2)
+        h = times[idx + 1] - times[idx]
+        wr, wv = self._weights((t - times[idx]) / h, h)
+        # 权重形状 (M,) 扩展到数据的尾部维度
+        expand = (slice(None),) + (None,) * (self.positions.ndim - 1)
+        wr = [w[expand] for w in wr]
+        wv = [w[expand] for w in wv]
+        return self.apply(idx, wr, wv)
+
+
+class PrecomputedPlayback:
+    """
+    按固定任务步长预先插值好整段回放，运行时每步只做一次数组取值。
+
+    不在预计算时间网格上的查询回退到游标插值。
+    """
+    def __init__(self, interpolator, t_start, dt, n_steps):
+        self.interpolator = interpolator
+        self.t_start = float(t_start)
+        self.dt = float(dt)
+        self.sample_times = self.t_start + self.dt * np.arange(n_steps)
+        self.positions, self.velocities = interpolator.evaluate(self.sample_times)
+
+    def interpolate_state(self, sim_time):
+        k = int(round((sim_time - self.t_start) / self.dt))
+        if 0 <= k < len(self.sample_times) and abs(self.sample_times[k] - sim_time) <= 1e-9 * max(1.0, self.dt):
+            return self.positions[k], self.velocities[k]
+        return self.interpolator.interpolate_state(sim_time)
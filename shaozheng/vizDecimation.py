@@ -0,0 +1,213 @@
+#
+# vizDecimation.py
+#
+# Vizard 记录文件的自适应关键帧抽稀与压缩。
+# enableUnityVisualization 每个任务步写一帧，300 小时的 60 s 步长仿真就有 18000 帧。
+# 这里读取已写好的 .bin（见 vizReader），只保留必要的关键帧：
+#   - Vizard 回放时不在帧间插值，物体停在上一帧的位置，轨迹线是各帧位置连成的折线。
+#     缺省按折线（linear）重建被丢弃的中间帧，任一航天器/天体的位置误差超过 tolerance
+#     （或姿态 MRP 误差超过 rotationTolerance）时保留新的关键帧；相邻关键帧间隔不超过
+#     maxGapSec 与 maxGapFrames 个记录步长中的较大者，限制回放时的跳动。"hold" 按停留在上一帧计算误差（最严格），
+#     "hermite" 只适用于自行插值的回放器（如 trajectoryPlayback）
+#   - 首帧（含 settings、epoch）、末帧、物体集合变化的帧以及事件时刻前后的帧始终保留
+#   - 保留的帧原样复制（不重新编码 protobuf），没有可丢弃的帧时不写输出；gzip 压缩输出只用于归档，Vizard 不能直接打开，
+#     回放前需解压（vizReader 可以直接读取）
+#
+
+import gzip
+import os
+
+import numpy as np
+
+from trajectoryPlayback import hermite_weights, linear_weights
+from vizReader import VizRecording
+
+DEFAULT_TOLERANCE = 100.0          # 位置误差 (m)
+DEFAULT_ROTATION_TOLERANCE = 1e-3  # MRP 分量误差，约 4e-3 rad
+DEFAULT_MAX_GAP_SEC = 60.0         # 相邻关键帧最大间隔 (s)
+DEFAULT_MAX_GAP_FRAMES = 10        # 相邻关键帧最大间隔至少为该数目的记录步长
+DEFAULT_RECONSTRUCTION = "linear"
+
+
+def _encode_varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def hold_weights(s, h):
+    """停留在区间起点的权重，形式同 :func:`trajectoryPlayback.hermite_weights`"""
+    one = np.ones_like(s)
+    zero = np.zeros_like(s)
+    return (one, zero, zero, zero), (zero, zero, zero, zero)
+
+
+# 被丢弃帧的重建方式 → 权重函数
+RECONSTRUCTIONS = {"hold": hold_weights, "linear": linear_weights, "hermite": hermite_weights}
+
+
+def _segment_ok(times, positions, velocities, rotations, i, j, tolerance, rotationTolerance, weights):
+    """只用关键帧 i、j 重建 (i, j) 内各帧时误差是否都在容差内"""
+    if j - i < 2:
+        return True
+    k = np.arange(i + 1, j)
+    h = times[j] - times[i]
+    s = ((times[k] - times[i]) / h)[:, None, None]
+    wr, _ = weights(s, h)
+    r = wr[0] * positions[i] + wr[1] * velocities[i] + wr[2] * positions[j] + wr[3] * velocities[j]
+    if np.max(np.linalg.norm(r - positions[k], axis=-1)) > tolerance:
+        return False
+    if rotations is not None:
+        # MRP 没有对应的速度项，Hermite 时按线性重建
+        wq = linear_weights(s, h)[0] if weights is hermite_weights else wr
+        q = wq[0] * rotations[i] + wq[2] * rotations[j]
+        if np.max(np.abs(q - rotations[k])) > rotationTolerance:
+            return False
+    return True
+
+
+def select_keyframes(times, positions, velocities, rotations=None, forced=None,
+                     tolerance=DEFAULT_TOLERANCE, rotationTolerance=DEFAULT_ROTATION_TOLERANCE,
+                     maxGapSec=DEFAULT_MAX_GAP_SEC, reconstruction=DEFAULT_RECONSTRUCTION):
+    """
+    贪心选取关键帧：从当前关键帧出发，倍增探测再二分，找到误差仍在容差内的最远帧。
+
+    Args:
+        times (ndarray): 帧时刻 ``(N,)``
+        positions, velocities (ndarray): ``(N, nObj, 3)``
+        rotations (ndarray): 可选，航天器姿态 MRP ``(N, nSc, 3)``
+        forced (ndarray): 必须保留的帧，布尔 ``(N,)``
+        maxGapSec (float): 相邻关键帧的最大间隔 (s)，None 表示不限
+        reconstruction (str): 被丢弃帧的重建方式，见 ``RECONSTRUCTIONS``
+
+    Returns:
+        ndarray: 布尔掩码 ``(N,)``
+    """
+    if reconstruction not in RECONSTRUCTIONS:
+        raise ValueError(f"未知重建方式 '{reconstruction}'，可选 {list(RECONSTRUCTIONS)}")
+    weights = RECONSTRUCTIONS[reconstruction]
+    n = len(times)
+    keep = np.zeros(n, dtype=bool) if forced is None else np.asarray(forced, dtype=bool).copy()
+    keep[0] = keep[-1] = True
+    forcedIdx = np.nonzero(keep)[0]
+
+    def ok(i, j):
+        return _segment_ok(times, positions, velocities, rotations, i, j, tolerance, rotationTolerance, weights)
+
+    i = 0
+    while i < n - 1:
+        # 区间不能越过下一个强制保留帧
+        limit = forcedIdx[np.searchsorted(forcedIdx, i, side='right')]
+        if maxGapSec is not None:
+            limit = min(limit, max(int(np.searchsorted(times, times[i] + maxGapSec, side='right')) - 1, i + 1))
+        step = 2
+        good = i + 1
+        while good < limit:
+            j = min(i + step, limit)
+            if not ok(i, j):
+                break
+            good = j
+            step *= 2
+        bad = min(i + step, limit)
+        if good < limit:
+            while bad - good > 1:
+                mid = (good + bad) // 2
+                if ok(i, mid):
+                    good = mid
+                else:
+                    bad = mid
+        keep[good] = True
+        i = good
+    return keep
+
+
+def decimate_recording(inPath, outPath=None, tolerance=DEFAULT_TOLERANCE,
+                       rotationTolerance=DEFAULT_ROTATION_TOLERANCE, keepTimes=(), eventPadding=1,
+                       maxGapSec=DEFAULT_MAX_GAP_SEC, maxGapFrames=DEFAULT_MAX_GAP_FRAMES,
+                       reconstruction=DEFAULT_RECONSTRUCTION, compress=False):
+    """
+    抽稀一个 Vizard 记录文件。
+
+    Args:
+        inPath (str): 原始 .bin
+        outPath (str): 输出路径，缺省为 ``<原名>_decimated.bin``（压缩时再加 ``.gz``）
+        tolerance (float): 被丢弃帧的位置重建误差容差 (m)
+        rotationTolerance (float): 姿态 MRP 分量容差
+        keepTimes (iterable): 事件时刻 (s)，如通信窗口边沿、最近接近时刻
+        eventPadding (int): 事件时刻前后各额外保留的帧数
+        maxGapSec (float): 相邻关键帧的最大间隔 (s)，限制回放时的跳动；None 表示不限
+        maxGapFrames (int): 间隔上限至少放宽到该数目的记录步长（取中位步长），
+            步长较大的记录（如 60 s）不会因 ``maxGapSec`` 而保留全部帧
+        reconstruction (str): "linear"（缺省，Vizard 轨迹折线）、"hold"（停在上一帧）
+            或 "hermite"（只适用于自行插值的回放器）
+        compress (bool): gzip 压缩输出，只用于归档：Vizard 不能打开 .gz 文件，回放前需解压
+
+    Returns:
+        tuple: ``(outPath, info)``，``info`` 含帧数与文件大小；全部帧都需保留时不写输出，
+        ``outPath`` 为 None，``outputBytes`` 等于 ``inputBytes``
+    """
+    if outPath is None:
+        root, ext = os.path.splitext(inPath)
+        outPath = root + "_decimated" + ext + (".gz" if compress else "")
+
+    with VizRecording(inPath) as rec:
+        times = rec.times
+        n = len(rec)
+        forced = np.zeros(n, dtype=bool)
+
+        # 所有物体的位置/速度：(N, nObj, 3)，物体缺失的帧强制保留
+        positions, velocities, rotations = [], [], []
+        for name in rec.spacecraft_names:
+            _, state = rec.trajectory(name, fields=("position", "velocity", "rotation"))
+            positions.append(state["position"])
+            velocities.append(state["velocity"])
+            rotations.append(state["rotation"])
+        for name in rec.body_names:
+            _, state = rec.trajectory(name, body=True)
+            positions.append(state["position"])
+            velocities.append(state["velocity"])
+        positions = np.stack(positions, axis=1)
+        velocities = np.stack(velocities, axis=1)
+        rotations = np.stack(rotations, axis=1) if rotations else None
+        missing = np.isnan(positions).any(axis=(1, 2)) | np.isnan(velocities).any(axis=(1, 2))
+        if rotations is not None:
+            missing |= np.isnan(rotations).any(axis=(1, 2))
+        forced |= missing
+        forced[1:] |= missing[:-1]
+        forced[:-1] |= missing[1:]
+        positions = np.nan_to_num(positions)
+        velocities = np.nan_to_num(velocities)
+        if rotations is not None:
+            rotations = np.nan_to_num(rotations)
+
+        # 事件时刻两侧的帧
+        for t in np.atleast_1d(np.asarray(keepTimes, dtype=float)):
+            k = int(np.searchsorted(times, t))
+            forced[max(k - 1 - eventPadding, 0):min(k + 1 + eventPadding, n)] = True
+
+        if maxGapSec is not None and n > 1:
+            maxGapSec = max(maxGapSec, maxGapFrames * float(np.median(np.diff(times))))
+        keep = select_keyframes(times, positions, velocities, rotations, forced,
+                                tolerance, rotationTolerance, maxGapSec, reconstruction)
+        keptFrames = int(np.count_nonzero(keep))
+        info = {"frames": n, "keptFrames": keptFrames, "inputBytes": os.path.getsize(inPath)}
+        if keptFrames == n:
+            info["outputBytes"] = info["inputBytes"]
+            return None, info
+
+        opener = gzip.open if compress else open
+        with opener(outPath + ".tmp", "wb") as f:
+            for k in np.nonzero(keep)[0]:
+                frame = rec.frame_bytes(k).tobytes()  # 不保留映射视图，便于关闭文件
+                f.write(_encode_varint(len(frame)))
+                f.write(frame)
+    os.replace(outPath + ".tmp", outPath)
+
+    info["outputBytes"] = os.path.getsize(outPath)
+    return outPath, info
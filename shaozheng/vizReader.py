@@ -0,0 +1,301 @@
+#
+# vizReader.py
+#
+# Vizard 记录文件（_VizFiles/*.bin）的随机访问读取器。
+# 文件由连续的帧组成：每帧是 varint 长度前缀 + 一条 VizMessage protobuf：
+#   1 currentTime     { 1 frameNumber, 2 simTimeElapsed (double, ns) }
+#   2 celestialBodies { 1 bodyName, 2 position, 3 velocity, 4 rotation (packed double) }
+#   3 spacecraft      { 1 spacecraftName, 2 position, 3 velocity, 4 rotation (packed double) }
+#   其余字段（settings、epoch 等）读取时跳过
+#
+#   - 首次打开时扫描一遍帧边界与时刻，索引写入 .idx.npy 缓存（以文件大小与 mtime 为键）
+#   - 文件以内存映射方式访问，按时刻定位帧为 O(log n)
+#   - 某个航天器的轨迹在第一次请求时才定位其字段偏移，之后直接按偏移从映射中收集成 NumPy 数组
+#   - gzip 压缩的记录（见 vizDecimation）整体解压到内存后按同样方式访问
+#
+
+import gzip
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+INDEX_VERSION = 1
+GZIP_MAGIC = b"\x1f\x8b"
+INDEX_DTYPE = np.dtype([("offset", "<i8"), ("length", "<i8"), ("frameNumber", "<i8"), ("simTime", "<f8")])
+
+# VizMessage 字段号
+FIELD_CURRENT_TIME = 1
+FIELD_CELESTIAL_BODIES = 2
+FIELD_SPACECRAFT = 3
+STATE_FIELDS = {"position": 2, "velocity": 3, "rotation": 4}
+
+WIRE_VARINT, WIRE_FIXED64, WIRE_LEN, WIRE_FIXED32 = 0, 1, 2, 5
+
+
+def _varint(buf, i):
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[i]
+        i += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, i
+        shift += 7
+
+
+def _fields(buf, start, stop):
+    """遍历 [start, stop) 内的 protobuf 字段，产出 ``(字段号, 线型, 值或数据起点, 数据长度)``"""
+    i = start
+    while i < stop:
+        key, i = _varint(buf, i)
+        field, wire = key >> 3, key & 7
+        if wire == WIRE_VARINT:
+            value, i = _varint(buf, i)
+            yield field, wire, value, 0
+        elif wire == WIRE_FIXED64:
+            yield field, wire, i, 8
+            i += 8
+        elif wire == WIRE_LEN:
+            n, i = _varint(buf, i)
+            yield field, wire, i, n
+            i += n
+        elif wire == WIRE_FIXED32:
+            yield field, wire, i, 4
+            i += 4
+        else:
+            raise ValueError(f"不支持的 protobuf 线型 {wire}（偏移 {i}）")
+
+
+def _index_paths(path):
+    base = path + ".idx"
+    return base + ".npy", base + ".json"
+
+
+class VizRecording:
+    """
+    一个 Vizard .bin 文件的只读视图。
+
+    Args:
+        path (str): .bin 文件路径
+        use_cache (bool): 是否读写帧索引缓存
+    """
+    def __init__(self, path, use_cache=True):
+        self.path = path
+        self._file = open(path, "rb")
+        if self._file.read(2) == GZIP_MAGIC:
+            self._file.seek(0)
+            with gzip.GzipFile(fileobj=self._file) as f:
+                self._mm = f.read()
+        else:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._bytes = np.frombuffer(self._mm, dtype=np.uint8)
+        self.index = self._load_index(use_cache)
+        self.times = self.index["simTime"] * 1e-9
+        self._offsets = {}
+
+    def close(self):
+        # 先释放指向映射的 NumPy 视图，否则 mmap 无法关闭
+        self._bytes = None
+        self._offsets = {}
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    # ------------------------------------------------------------------
+    # 帧索引
+    # ------------------------------------------------------------------
+    def _load_index(self, use_cache):
+        stat = os.stat(self.path)
+        key = {"version": INDEX_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        index_file, meta_file = _index_paths(self.path)
+        if use_cache and os.path.exists(index_file) and os.path.exists(meta_file):
+            with open(meta_file, "r") as f:
+                if json.load(f) == key:
+                    return np.load(index_file)
+        index = self._build_index()
+        if use_cache:
+            np.save(index_file + ".tmp.npy", index)
+            os.replace(index_file + ".tmp.npy", index_file)
+            with open(meta_file, "w") as f:
+                json.dump(key, f)
+        return index
+
+    def _build_index(self):
+        mm = self._mm
+        size = len(mm)
+        rows = []
+        i = 0
+        while i < size:
+            length, start = _varint(mm, i)
+            if start + length > size:
+                raise ValueError(f"{self.path}: 第 {len(rows)} 帧被截断")
+            frameNumber, simTime = -1, np.nan
+            for field, wire, pos, n in _fields(mm, start, start + length):
+                if field == FIELD_CURRENT_TIME and wire == WIRE_LEN:
+                    for sub, subWire, value, _ in _fields(mm, pos, pos + n):
+                        if sub == 1 and subWire == WIRE_VARINT:
+                            frameNumber = value
+                        elif sub == 2 and subWire == WIRE_FIXED64:
+                            simTime = struct.unpack_from("<d", mm, value)[0]
+                    break
+            rows.append((start, length, frameNumber, simTime))
+            i = start + length
+        return np.array(rows, dtype=INDEX_DTYPE)
+
+    def frame_at(self, t):
+        """不晚于仿真时刻 ``t`` (s) 的最后一帧的下标（t 可为数组）"""
+        k = np.searchsorted(self.times, t, side="right") - 1
+        return np.clip(k, 0, len(self) - 1)
+
+    def frame_bytes(self, k):
+        """第 k 帧的原始 protobuf 字节（映射上的零拷贝视图）"""
+        offset, length = int(self.index["offset"][k]), int(self.index["length"][k])
+        return self._bytes[offset:offset + length]
+
+    # ------------------------------------------------------------------
+    # 单帧解码
+    # ------------------------------------------------------------------
+    def _decode_object(self, pos, n):
+        mm = self._mm
+        name = None
+        state = {}
+        for field, wire, sub, m in _fields(mm, pos, pos + n):
+            if field == 1 and wire == WIRE_LEN:
+                name = mm[sub:sub + m].decode("utf-8")
+            elif wire == WIRE_LEN:
+                for key, number in STATE_FIELDS.items():
+                    if field == number:
+                        state[key] = np.frombuffer(mm, dtype="<f8", count=m // 8, offset=sub).copy()
+        return name, state
+
+    def decode_frame(self, k):
+        """
+        解码第 k 帧中的时间、天体与航天器状态。
+
+        Returns:
+            dict: ``{'frameNumber', 'time', 'celestialBodies': {名称: 状态}, 'spacecraft': {名称: 状态}}``，
+            状态为 ``{'position', 'velocity', 'rotation'}`` 数组
+        """
+        offset, length = int(self.index["offset"][k]), int(self.index["length"][k])
+        frame = {"frameNumber": int(self.index["frameNumber"][k]), "time": float(self.times[k]),
+                 "celestialBodies": {}, "spacecraft": {}}
+        for field, wire, pos, n in _fields(self._mm, offset, offset + length):
+            if wire != WIRE_LEN:
+                continue
+            if field == FIELD_CELESTIAL_BODIES:
+                name, state = self._decode_object(pos, n)
+                frame["celestialBodies"][name] = state
+            elif field == FIELD_SPACECRAFT:
+                name, state = self._decode_object(pos, n)
+                frame["spacecraft"][name] = state
+        return frame
+
+    def state_at(self, t, name):
+        """不晚于 ``t`` 的最近一帧中航天器（或天体）的状态"""
+        frame = self.decode_frame(int(self.frame_at(t)))
+        if name in frame["spacecraft"]:
+            return frame["spacecraft"][name]
+        return frame["celestialBodies"][name]
+
+    @property
+    def spacecraft_names(self):
+        return list(self.decode_frame(0)["spacecraft"])
+
+    @property
+    def body_names(self):
+        return list(self.decode_frame(0)["celestialBodies"])
+
+    # ------------------------------------------------------------------
+    # 轨迹提取
+    # ------------------------------------------------------------------
+    def _field_offsets(self, kind, name):
+        """
+        每帧中 ``name`` 的 position/velocity/rotation 数据偏移与字节数，首次请求时扫描并缓存。
+        缺失的字段偏移为 -1。
+        """
+        cacheKey = (kind, name)
+        if cacheKey in self._offsets:
+            return self._offsets[cacheKey]
+        mm = self._mm
+        nameBytes = name.encode("utf-8")
+        offsets = np.full((len(self), len(STATE_FIELDS)), -1, dtype=np.int64)
+        sizes = np.zeros(len(STATE_FIELDS), dtype=np.int64)
+        for k, (start, length) in enumerate(zip(self.index["offset"].tolist(), self.index["length"].tolist())):
+            for field, wire, pos, n in _fields(mm, start, start + length):
+                if field != kind or wire != WIRE_LEN:
+                    continue
+                found = {}
+                objName = None
+                for sub, subWire, subPos, m in _fields(mm, pos, pos + n):
+                    if sub == 1 and subWire == WIRE_LEN:
+                        objName = mm[subPos:subPos + m]
+                    elif subWire == WIRE_LEN and 2 <= sub <= 1 + len(STATE_FIELDS):
+                        found[sub - 2] = (subPos, m)
+                if objName == nameBytes:
+                    for j, (subPos, m) in found.items():
+                        offsets[k, j] = subPos
+                        sizes[j] = m
+                    break
+        if not np.any(offsets >= 0):
+            raise KeyError(f"{self.path} 中没有 '{name}'")
+        self._offsets[cacheKey] = (offsets, sizes)
+        return offsets, sizes
+
+    def _gather(self, offsets, size, frames):
+        """按字节偏移从映射中收集 ``(len(frames), size/8)`` 的 float64 数组，缺帧为 NaN"""
+        off = offsets[frames]
+        out = np.full((len(off), size // 8), np.nan)
+        valid = off >= 0
+        if size and np.any(valid):
+            rows = self._bytes[off[valid, None] + np.arange(size)]
+            out[valid] = rows.view("<f8")
+        return out
+
+    def trajectory(self, name, t0=None, t1=None, fields=("position", "velocity"), body=False):
+        """
+        提取航天器（``body=True`` 时为天体）在 [t0, t1] 内各帧的状态。
+
+        Args:
+            name (str): 航天器或天体名称
+            t0, t1 (float): 仿真时间范围 (s)，缺省为全程
+            fields (tuple): ``STATE_FIELDS`` 中的字段
+
+        Returns:
+            tuple: ``(times, {field: (N, k) 数组})``
+        """
+        kind = FIELD_CELESTIAL_BODIES if body else FIELD_SPACECRAFT
+        offsets, sizes = self._field_offsets(kind, name)
+        lo = 0 if t0 is None else int(np.searchsorted(self.times, t0, side="left"))
+        hi = len(self) if t1 is None else int(np.searchsorted(self.times, t1, side="right"))
+        frames = np.arange(lo, hi)
+        out = {}
+        for key in fields:
+            j = list(STATE_FIELDS).index(key)
+            out[key] = self._gather(offsets[:, j], int(sizes[j]), frames)
+        return self.times[lo:hi], out
+
+
+def compare_trajectories(recA, recB, name, field="position"):
+    """
+    在两份记录的公共时刻上比较同一航天器的状态。
+
+    Returns:
+        tuple: ``(times, diffNorm)``，``diffNorm`` 为对应时刻状态差的范数
+    """
+    times, iA, iB = np.intersect1d(recA.times, recB.times, return_indices=True)
+    _, a = recA.trajectory(name, fields=(field,))
+    _, b = recB.trajectory(name, fields=(field,))
+    return times, np.linalg.norm(a[field][iA] - b[field][iB], axis=1)